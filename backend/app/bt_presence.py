@@ -0,0 +1,313 @@
+"""
+블루투스 장치 연결 상태 — provider + 백그라운드 poller.
+
+provider 는 페어링된 장치 목록을 [{name, mac_address, status, bt_type}] 으로 돌려준다
+(status 는 Windows PnP 표기를 따라 연결됨 = "OK").
+- powershell: Windows Get-PnpDevice
+- bluez:      Linux BlueZ — busctl 로 D-Bus ObjectManager 를 한 번 조회
+- fake:       고정 목록 (테스트·블루투스 없는 환경)
+
+BluetoothPoller 는 interval 마다 provider 를 조회해 MAC → status 맵을 메모리에
+두고, 직전 조회와 달라진 MAC 의 장비만 devices.status 에 반영한다. API 는 캐시된
+상태(updated_at 포함)를 바로 돌려줄 수 있다.
+"""
+import json
+import platform
+import re
+import shutil
+import subprocess
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .identity import normalize_mac
+from .models import Device
+
+
+def _extract_mac(instance_id: str) -> str | None:
+    """InstanceId에서 BT MAC 주소 추출. 두 가지 형식 지원:
+    1) BTHENUM\\DEV_AABBCCDDEEFF\\...
+    2) BTHENUM\\{GUID}_VID&...\\7&xxx&0&AABBCCDDEEFF_C00000000
+    """
+    # 패턴 1: DEV_ 접두사 (대소문자 무시)
+    m = re.search(r'DEV_([0-9A-Fa-f]{12})', instance_id, re.IGNORECASE)
+    if m:
+        raw = m.group(1).upper()
+        return ':'.join(raw[i:i+2] for i in range(0, 12, 2))
+    # 패턴 2: GUID 엔트리의 끝부분 &0&MAC_C
+    m = re.search(r'&0&([0-9A-Fa-f]{12})_', instance_id)
+    if m:
+        raw = m.group(1).upper()
+        return ':'.join(raw[i:i+2] for i in range(0, 12, 2))
+    return None
+
+
+def _guess_bt_type(name: str) -> str:
+    """BT 장치 유형 추정 (이름 기반 간이 분류)"""
+    name_lower = name.lower()
+    if any(kw in name_lower for kw in ('headphone', 'headset', 'earphone', 'buds', 'speaker', 'audio', 'airpods', 'soundbar')):
+        return 'bt_audio'
+    if any(kw in name_lower for kw in ('mouse', 'keyboard', 'gamepad', 'controller', 'pen', 'stylus')):
+        return 'bt_input'
+    return 'bt_other'
+
+
+class PowerShellProvider:
+    name = "powershell"
+
+    @staticmethod
+    def available() -> bool:
+        return platform.system() == "Windows"
+
+    def scan(self) -> list:
+        """
+        PowerShell Get-PnpDevice로 블루투스 장치 목록 조회.
+        InstanceId에서 MAC 주소를 추출하고, MAC 기준으로 중복 제거.
+        """
+        cmd = [
+            'powershell', '-NoProfile', '-Command',
+            (
+                'Get-PnpDevice -Class Bluetooth -ErrorAction SilentlyContinue | '
+                'Where-Object { $_.InstanceId -match "BTHENUM" } | '
+                'Select-Object FriendlyName, Status, InstanceId, Class | '
+                'ConvertTo-Json -Compress'
+            )
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            if result.returncode != 0 or not result.stdout.strip():
+                return []
+
+            data = json.loads(result.stdout)
+            # PowerShell returns a single object (not array) when there's only 1 result
+            if isinstance(data, dict):
+                data = [data]
+
+            # MAC별 가장 좋은 엔트리를 선택 (프로파일 중복 제거)
+            seen_macs: dict[str, dict] = {}  # mac -> best entry
+            no_mac_entries = []
+
+            for item in data:
+                name = item.get('FriendlyName', '').strip()
+                instance_id = item.get('InstanceId', '')
+                status = item.get('Status', '')
+
+                if not name:
+                    continue
+
+                mac = _extract_mac(instance_id)
+                entry = {
+                    'name': name,
+                    'mac_address': mac,
+                    'status': status,
+                    'bt_type': _guess_bt_type(name),
+                }
+
+                if mac:
+                    prev = seen_macs.get(mac)
+                    if prev is None:
+                        seen_macs[mac] = entry
+                    else:
+                        # "Avrcp 전송" 등 프로파일 접미사 없는 이름 우선, OK 상태 우선
+                        is_better = (
+                            len(name) < len(prev['name']) or
+                            (status == 'OK' and prev['status'] != 'OK')
+                        )
+                        if is_better:
+                            seen_macs[mac] = entry
+                else:
+                    no_mac_entries.append(entry)
+
+            return list(seen_macs.values()) + no_mac_entries
+        except Exception:
+            return []
+
+
+class BluezProvider:
+    name = "bluez"
+
+    @staticmethod
+    def available() -> bool:
+        return platform.system() == "Linux" and shutil.which("busctl") is not None
+
+    def scan(self) -> list:
+        """org.bluez 의 Device1 객체 중 페어링되었거나 연결된 장치"""
+        cmd = [
+            'busctl', '--system', '--json=short', 'call', 'org.bluez', '/',
+            'org.freedesktop.DBus.ObjectManager', 'GetManagedObjects',
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            if result.returncode != 0 or not result.stdout.strip():
+                return []
+            objects = json.loads(result.stdout)["data"][0]
+        except Exception:
+            return []
+
+        entries = []
+        for ifaces in objects.values():
+            props = ifaces.get("org.bluez.Device1")
+            if not props:
+                continue
+
+            def value(key, default=None):
+                return props.get(key, {}).get("data", default)
+
+            connected = bool(value("Connected", False))
+            if not (value("Paired", False) or connected):
+                continue
+            mac = normalize_mac(value("Address")) or None
+            name = (value("Alias") or value("Name") or mac or "").strip()
+            if not name:
+                continue
+            icon = value("Icon") or ""
+            if icon.startswith("audio"):
+                bt_type = 'bt_audio'
+            elif icon.startswith("input"):
+                bt_type = 'bt_input'
+            else:
+                bt_type = _guess_bt_type(name)
+            entries.append({
+                'name': name,
+                'mac_address': mac,
+                'status': 'OK' if connected else 'Disconnected',
+                'bt_type': bt_type,
+            })
+        return entries
+
+
+class FakeProvider:
+    name = "fake"
+
+    def __init__(self, entries: Optional[list] = None):
+        self.entries = list(entries or [])
+
+    @staticmethod
+    def available() -> bool:
+        return True
+
+    def scan(self) -> list:
+        return [dict(e) for e in self.entries]
+
+
+_PROVIDERS = {"powershell": PowerShellProvider, "bluez": BluezProvider, "fake": FakeProvider}
+
+
+def get_provider(name: Optional[str] = None, **kwargs):
+    """
+    provider 인스턴스 반환.
+    name 미지정 시 powershell → bluez 순으로 사용 가능한 것, 없으면 빈 fake.
+    """
+    if name is None:
+        name = next((n for n in ("powershell", "bluez") if _PROVIDERS[n].available()), "fake")
+    return _PROVIDERS[name](**kwargs)
+
+
+def _device_status(provider_status: Optional[str]) -> str:
+    return 'active' if provider_status == 'OK' else 'inactive'
+
+
+class BluetoothPoller:
+    def __init__(self, provider=None, interval: float = 30.0):
+        self.provider = provider or get_provider()
+        self.interval = interval                  # 초. 0 이하면 백그라운드 조회 안 함
+        self.updated_at: Optional[datetime] = None
+        self._entries: List[dict] = []
+        self._status: Dict[str, str] = {}         # MAC → provider status
+        self._reconciled = False                  # 최초 1회는 전체 BT 장비를 맞춘다
+        self._poll_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def entries(self) -> List[dict]:
+        return [dict(e) for e in self._entries]
+
+    def status_of(self, mac: Optional[str]) -> str:
+        """캐시 기준 devices.status 값 ('active' / 'inactive')"""
+        return _device_status(self._status.get(normalize_mac(mac)))
+
+    def snapshot(self) -> dict:
+        return {
+            "provider": self.provider.name,
+            "interval": self.interval,
+            "updated_at": self.updated_at,
+            "devices": self.entries(),
+        }
+
+    def poll(self, db: Optional[Session] = None) -> int:
+        """provider 조회 → 캐시 갱신 → 상태가 바뀐 장비만 DB 반영. 갱신된 장비 수 반환."""
+        with self._poll_lock:
+            entries = self.provider.scan()
+            status = {
+                normalize_mac(e['mac_address']): e['status']
+                for e in entries if e.get('mac_address')
+            }
+            changed = {
+                mac for mac in status.keys() | self._status.keys()
+                if _device_status(status.get(mac)) != _device_status(self._status.get(mac))
+            }
+            own_session = db is None
+            db = db or SessionLocal()
+            try:
+                updated = self._apply(db, status, None if not self._reconciled else changed)
+            finally:
+                if own_session:
+                    db.close()
+            self._entries = entries
+            self._status = status
+            self._reconciled = True
+            self.updated_at = datetime.utcnow()
+            return updated
+
+    def _apply(self, db: Session, status: Dict[str, str], macs: Optional[set]) -> int:
+        if macs is not None and not macs:
+            return 0
+        query = db.query(Device).filter(Device.address_kind == "bt", Device.mac_normalized.isnot(None))
+        if macs is not None:
+            query = query.filter(Device.mac_normalized.in_(macs))
+        updated = 0
+        for dev in query:
+            new_status = _device_status(status.get(dev.mac_normalized))
+            if dev.status != new_status:
+                dev.status = new_status
+                updated += 1
+        if updated:
+            db.commit()
+        return updated
+
+    def set_interval(self, interval: float) -> None:
+        self.interval = interval
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if self.interval > 0:
+                try:
+                    self.poll()
+                except Exception:
+                    pass
+                self._wake.wait(self.interval)
+            else:
+                self._wake.wait()
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="bt-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """백그라운드 조회를 멈춘다. 진행 중인 조회는 timeout 까지 기다린다 (이후 start() 로 다시 시작 가능)."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+bt_poller = BluetoothPoller()
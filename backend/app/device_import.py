@@ -0,0 +1,136 @@
+"""
+장비 일괄 등록/갱신 (upsert).
+
+스캔·공유기·블루투스 가져오기가 공통으로 쓴다. 네트워크와 기존 장비를 키 목록으로
+한 번씩만 조회하고, 신규 장비는 한 번의 flush 로 묶어 INSERT 한다 (SQLAlchemy 가
+executemany / multi-row INSERT 로 보냄). 커밋은 호출자가 한다.
+
+기존 장비 매칭: MAC → (MAC 이 없는 쪽이 있을 때) 같은 네트워크의 같은 IP.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .identity import DeviceIdentityIndex, normalize_mac
+from .models import Device, Network
+from .oui import lookup as oui_lookup, lookup_many as oui_lookup_many
+from .schemas import DeviceBulkItem, DeviceBulkResult, DeviceBulkRowResult
+
+
+def _resolve_networks(db: Session, items: List[DeviceBulkItem]) -> Dict[str, int]:
+    """subnet → network id. 없는 subnet 은 네트워크를 만든다."""
+    subnets = {i.subnet for i in items if i.network_id is None and i.subnet}
+    if not subnets:
+        return {}
+    by_subnet = {
+        subnet: nid
+        for nid, subnet in db.query(Network.id, Network.subnet).filter(Network.subnet.in_(subnets))
+    }
+    for item in items:
+        if item.network_id is None and item.subnet and item.subnet not in by_subnet:
+            net = Network(name=item.network_name or item.subnet, subnet=item.subnet)
+            db.add(net)
+            db.flush()
+            by_subnet[item.subnet] = net.id
+    return by_subnet
+
+
+def _find_existing(index: DeviceIdentityIndex, mac: Optional[str], ip: str, network_id: int) -> Optional[Device]:
+    if mac:
+        dev = index.by_mac(mac)
+        if dev is not None:
+            return dev
+    dev = index.by_ip(ip)
+    # 양쪽 모두 MAC 이 있는데 다르면 같은 IP 를 재사용한 다른 장비
+    if dev is not None and dev.network_id == network_id and not (mac and dev.mac_address):
+        return dev
+    return None
+
+
+def upsert_devices(db: Session, items: List[DeviceBulkItem], update_existing: bool = True) -> DeviceBulkResult:
+    ids = {i.network_id for i in items if i.network_id is not None}
+    known_ids = {nid for (nid,) in db.query(Network.id).filter(Network.id.in_(ids))} if ids else set()
+    by_subnet = _resolve_networks(db, items)
+
+    index = DeviceIdentityIndex.load(
+        db,
+        macs=[i.mac_address for i in items if i.mac_address],
+        ips=[i.ip_address for i in items],
+    )
+
+    macs = list({normalize_mac(i.mac_address) for i in items if i.mac_address})
+    vendors = dict(zip(macs, oui_lookup_many(macs)))
+
+    def vendor_of(mac: Optional[str]) -> str:
+        if not mac:
+            return ""
+        return vendors[mac] if mac in vendors else oui_lookup(mac)
+
+    rows: List[DeviceBulkRowResult] = []
+    pending: List[tuple] = []     # (row, Device) — flush 후 id 채움
+    touched: set = set()          # 이 요청에서 만들거나 갱신한 장비 (요청 내 중복 판정용)
+
+    for n, item in enumerate(items):
+        if item.network_id is not None:
+            network_id = item.network_id if item.network_id in known_ids else None
+        else:
+            network_id = by_subnet.get(item.subnet)
+        if network_id is None:
+            rows.append(DeviceBulkRowResult(index=n, action="skipped", reason="network not found"))
+            continue
+
+        mac = normalize_mac(item.mac_address) or None
+        existing = _find_existing(index, mac, item.ip_address, network_id)
+
+        if existing is not None and id(existing) in touched:
+            rows.append(DeviceBulkRowResult(index=n, action="skipped", reason="duplicate in request"))
+            continue
+
+        if existing is not None:
+            if not update_existing:
+                rows.append(DeviceBulkRowResult(index=n, action="skipped", id=existing.id, reason="already registered"))
+                continue
+            existing.ip_address = item.ip_address
+            existing.hostname = item.hostname or existing.hostname
+            existing.network_id = network_id
+            if mac and not existing.mac_address:
+                existing.mac_address = mac
+            existing.vendor = vendor_of(existing.mac_address) or existing.vendor
+            # 사용자가 입력했을 수 있는 값은 비어 있을 때만 채움
+            if item.os and not existing.os:
+                existing.os = item.os
+            if item.device_type and not existing.device_type:
+                existing.device_type = item.device_type
+            if item.open_ports:
+                existing.open_ports = item.open_ports
+            index.reindex(existing)
+            touched.add(id(existing))
+            rows.append(DeviceBulkRowResult(index=n, action="updated", id=existing.id))
+            continue
+
+        device = Device(
+            hostname=item.hostname,
+            ip_address=item.ip_address,
+            mac_address=mac,
+            vendor=vendor_of(mac) or None,
+            os=item.os,
+            device_type=item.device_type,
+            open_ports=item.open_ports,
+            status=item.status or "active",
+            network_id=network_id,
+        )
+        db.add(device)
+        index.add(device)
+        touched.add(id(device))
+        row = DeviceBulkRowResult(index=n, action="created")
+        rows.append(row)
+        pending.append((row, device))
+
+    db.flush()
+    for row, device in pending:
+        row.id = device.id
+
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+    for row in rows:
+        counts[row.action] += 1
+    return DeviceBulkResult(rows=rows, **counts)
@@ -0,0 +1,113 @@
+"""
+장비 식별 인덱스 — 정규화한 MAC / 소문자 hostname / IP 로 Device 를 O(1) 매칭한다.
+
+요청 단위로 만든다. 스캔처럼 전체 장비를 이미 읽는 경로는 그 목록으로,
+단건 등록처럼 키가 정해진 경로는 load() 로 후보 장비만 읽어 만든다.
+요청 중 장비를 추가·수정하면 add()/reindex() 로 인덱스를 맞춘다.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from .models import Device, normalize_mac  # noqa: F401 — normalize_mac 은 여기서도 쓰도록 재노출
+
+_IN_CHUNK = 500  # IN (...) 파라미터 수 제한 대응
+
+
+def _chunks(values: list):
+    for i in range(0, len(values), _IN_CHUNK):
+        yield values[i:i + _IN_CHUNK]
+
+
+class DeviceIdentityIndex:
+    def __init__(self, devices: Iterable[Device] = ()):
+        self._by_mac: Dict[str, List[Device]] = {}
+        self._by_hostname: Dict[str, List[Device]] = {}
+        self._by_ip: Dict[str, List[Device]] = {}
+        self._keys: Dict[int, tuple] = {}  # id(device) → 색인된 (mac, hostname, ip)
+        for dev in devices:
+            self.add(dev)
+
+    @classmethod
+    def load(
+        cls,
+        db: Session,
+        macs: Iterable[str] = (),
+        hostnames: Iterable[str] = (),
+        ips: Iterable[str] = (),
+    ) -> "DeviceIdentityIndex":
+        """주어진 키 중 하나라도 일치하는 장비만 읽어 인덱스를 만든다."""
+        mac_keys = sorted({normalize_mac(m) for m in macs if m})
+        host_keys = sorted({h.lower() for h in hostnames if h})
+        ip_keys = sorted({ip for ip in ips if ip})
+        # 모두 인덱스 컬럼/식 — mac_normalized, lower(hostname), ip_address
+        conds = []
+        conds += [Device.mac_normalized.in_(c) for c in _chunks(mac_keys)]
+        conds += [func.lower(Device.hostname).in_(c) for c in _chunks(host_keys)]
+        conds += [Device.ip_address.in_(c) for c in _chunks(ip_keys)]
+        if not conds:
+            return cls()
+        return cls(db.query(Device).filter(or_(*conds)).order_by(Device.id).all())
+
+    @staticmethod
+    def _key_of(dev: Device) -> tuple:
+        return (
+            normalize_mac(dev.mac_address),
+            (dev.hostname or "").lower(),
+            dev.ip_address or "",
+        )
+
+    def add(self, dev: Device) -> None:
+        mac, hostname, ip = key = self._key_of(dev)
+        self._keys[id(dev)] = key
+        if mac:
+            self._by_mac.setdefault(mac, []).append(dev)
+        if hostname:
+            self._by_hostname.setdefault(hostname, []).append(dev)
+        if ip:
+            self._by_ip.setdefault(ip, []).append(dev)
+
+    def remove(self, dev: Device) -> None:
+        key = self._keys.pop(id(dev), None)
+        if key is None:
+            return
+        for table, k in zip((self._by_mac, self._by_hostname, self._by_ip), key):
+            bucket = table.get(k)
+            if bucket and dev in bucket:
+                bucket.remove(dev)
+                if not bucket:
+                    del table[k]
+
+    def reindex(self, dev: Device) -> None:
+        """장비의 MAC/hostname/IP 가 바뀐 뒤 호출."""
+        if self._keys.get(id(dev)) == self._key_of(dev):
+            return
+        self.remove(dev)
+        self.add(dev)
+
+    def by_mac(self, mac: Optional[str]) -> Optional[Device]:
+        bucket = self._by_mac.get(normalize_mac(mac))
+        return bucket[0] if bucket else None
+
+    def by_hostname(self, hostname: Optional[str]) -> Optional[Device]:
+        bucket = self._by_hostname.get((hostname or "").lower())
+        return bucket[0] if bucket else None
+
+    def by_ip(self, ip: Optional[str]) -> Optional[Device]:
+        bucket = self._by_ip.get(ip or "")
+        return bucket[0] if bucket else None
+
+    def match(
+        self,
+        mac: Optional[str] = None,
+        hostname: Optional[str] = None,
+        ip: Optional[str] = None,
+    ) -> Optional[Device]:
+        """MAC → hostname → IP 순서로 매칭. hostname 이 IP 문자열 그대로면 건너뛴다."""
+        dev = self.by_mac(mac) if mac else None
+        if dev is None and hostname and hostname.lower() != (ip or "").lower():
+            dev = self.by_hostname(hostname)
+        if dev is None and ip:
+            dev = self.by_ip(ip)
+        return dev
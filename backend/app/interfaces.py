@@ -0,0 +1,253 @@
+"""
+로컬 IPv4 인터페이스 탐색.
+
+- Linux: 프로세스를 띄우지 않고 ioctl(SIOCGIFADDR/SIOCGIFNETMASK),
+  /sys/class/net/<if>/address, /proc/net/route 에서 직접 읽는다.
+- Windows: ipconfig /all 파싱 (기존 방식).
+
+InterfaceCache 는 결과를 짧은 TTL 로 캐시한다. 만료된 뒤의 요청은 기존 값을
+바로 돌려받고, 갱신은 백그라운드 스레드에서 한 번만 수행된다. 목록이 실제로
+바뀌면 version 이 증가하고 등록된 listener 가 호출된다.
+"""
+import ipaddress
+import platform
+import re
+import socket
+import struct
+import subprocess
+import threading
+import time
+
+_SIOCGIFADDR = 0x8915
+_SIOCGIFNETMASK = 0x891B
+
+
+def _iface_entry(adapter: str, ip: str, mask: str, gateway, mac):
+    try:
+        net = ipaddress.IPv4Network(f'{ip}/{mask}', strict=False)
+    except ValueError:
+        return None
+    if net.is_loopback or net.is_link_local:
+        return None
+    return {'ip': ip, 'cidr': str(net), 'adapter': adapter, 'gateway': gateway, 'mac': mac}
+
+
+def _linux_default_gateways() -> dict:
+    """{인터페이스명: 기본 게이트웨이 IP} — /proc/net/route 의 0.0.0.0/0 경로."""
+    gateways: dict = {}
+    try:
+        with open('/proc/net/route') as f:
+            next(f, None)  # 헤더
+            for line in f:
+                fields = line.split()
+                if len(fields) < 4 or fields[1] != '00000000':
+                    continue
+                if not int(fields[3], 16) & 0x2:  # RTF_GATEWAY
+                    continue
+                gateways.setdefault(fields[0], socket.inet_ntoa(struct.pack('<L', int(fields[2], 16))))
+    except OSError:
+        pass
+    return gateways
+
+
+def _read_sysfs(name: str, attr: str) -> str:
+    try:
+        with open(f'/sys/class/net/{name}/{attr}') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def _read_linux() -> list:
+    import fcntl
+
+    gateways = _linux_default_gateways()
+    interfaces = []
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for _idx, name in socket.if_nameindex():
+            if _read_sysfs(name, 'operstate') == 'down':
+                continue
+            ifreq = struct.pack('256s', name.encode()[:15])
+            try:
+                ip = socket.inet_ntoa(fcntl.ioctl(sock.fileno(), _SIOCGIFADDR, ifreq)[20:24])
+                mask = socket.inet_ntoa(fcntl.ioctl(sock.fileno(), _SIOCGIFNETMASK, ifreq)[20:24])
+            except OSError:
+                continue  # IPv4 주소 없음
+            mac = _read_sysfs(name, 'address').upper() or None
+            if mac == '00:00:00:00:00:00':
+                mac = None
+            entry = _iface_entry(name, ip, mask, gateways.get(name), mac)
+            if entry:
+                interfaces.append(entry)
+    finally:
+        sock.close()
+    return interfaces
+
+
+def _read_ipconfig() -> list:
+    """
+    ipconfig /all을 파싱해 로컬 IPv4 인터페이스 목록 반환.
+    어댑터 이름, 서브넷 CIDR, 기본 게이트웨이, MAC 주소를 함께 추출한다.
+    """
+    try:
+        result = subprocess.run(['ipconfig', '/all'], capture_output=True, timeout=10)
+        output = ''
+        for enc in ('utf-8', 'cp949', 'euc-kr'):
+            try:
+                output = result.stdout.decode(enc)
+                break
+            except Exception:
+                continue
+
+        interfaces = []
+
+        # 어댑터별로 섹션을 나눠 파싱
+        current_adapter = ''
+        current_ip = None
+        current_mask = None
+        current_gw = None
+        current_mac = None
+
+        def _flush():
+            nonlocal current_ip, current_mask, current_gw, current_mac
+            if current_ip and current_mask:
+                try:
+                    net = ipaddress.IPv4Network(f'{current_ip}/{current_mask}', strict=False)
+                    if not net.is_loopback and not net.is_link_local:
+                        interfaces.append({
+                            'ip': current_ip,
+                            'cidr': str(net),
+                            'adapter': current_adapter,
+                            'gateway': current_gw,
+                            'mac': current_mac,
+                        })
+                except Exception:
+                    pass
+            current_ip = current_mask = current_gw = current_mac = None
+
+        for line in output.splitlines():
+            # 어댑터 섹션 헤더: 들여쓰기 없이 ':'로 끝나는 줄
+            if line and not line[0].isspace() and line.strip().endswith(':'):
+                _flush()
+                header = line.strip().rstrip(':')
+                # "이더넷 어댑터 이더넷" → "이더넷"
+                # "Wireless LAN adapter Wi-Fi" → "Wi-Fi"  (대소문자 무관)
+                header_lower = header.lower()
+                for kw in ('어댑터 ', 'adapter '):
+                    if kw in header_lower:
+                        idx = header_lower.index(kw)
+                        current_adapter = header[idx + len(kw):]
+                        break
+                else:
+                    current_adapter = header
+                continue
+
+            # MAC 주소 (Physical Address / 물리적 주소)
+            mac_m = re.search(
+                r'(?:Physical Address|물리적 주소)[^:]*:\s*'
+                r'([0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}'
+                r'[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2})',
+                line
+            )
+            if mac_m and not current_mac:
+                current_mac = mac_m.group(1).upper().replace('-', ':')
+                continue
+
+            ip_m = re.search(r'IPv4[^:]*:\s*([\d.]+)', line)
+            if ip_m:
+                current_ip = ip_m.group(1)
+                continue
+
+            # 서브넷 마스크: 255.로 시작하는 값
+            mask_m = re.search(r':\s*(255\.[\d.]+)\s*$', line.strip())
+            if mask_m and current_ip and not current_mask:
+                current_mask = mask_m.group(1)
+                continue
+
+            # 기본 게이트웨이 (영문·한국어 공통)
+            gw_m = re.search(r'(?:Default Gateway|기본 게이트웨이)[^:]*:\s*([\d.]+)', line)
+            if gw_m:
+                current_gw = gw_m.group(1)
+
+        _flush()
+        return interfaces
+    except Exception:
+        return []
+
+
+def discover_interfaces() -> list:
+    """현재 플랫폼의 네이티브 소스에서 인터페이스 목록을 읽는다 (캐시 없음)."""
+    system = platform.system()
+    if system == 'Windows':
+        return _read_ipconfig()
+    if system == 'Linux':
+        try:
+            return _read_linux()
+        except Exception:
+            return []
+    return []
+
+
+class InterfaceCache:
+    def __init__(self, ttl: float = 10.0, loader=discover_interfaces):
+        self.ttl = ttl
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self.version = 0
+        self._listeners = []
+
+    def add_listener(self, fn) -> None:
+        """목록이 바뀔 때마다 fn(version) 호출 (최초 로드 제외)"""
+        self._listeners.append(fn)
+
+    def _load(self) -> None:
+        value = self._loader()
+        with self._lock:
+            changed = value != self._value
+            initial = self._value is None
+            if changed:
+                self._value = value
+                self.version += 1
+            self._loaded_at = time.monotonic()
+            self._refreshing = False
+            version = self.version
+        if changed and not initial:
+            for fn in self._listeners:
+                fn(version)
+
+    def _refresh_in_background(self) -> None:
+        try:
+            self._load()
+        except Exception:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self) -> list:
+        with self._lock:
+            value = self._value
+            stale = time.monotonic() - self._loaded_at >= self.ttl
+            start_refresh = value is not None and stale and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+        if value is None:
+            # 최초 1회는 동기로 읽는다
+            self._load()
+            return self._value
+        if start_refresh:
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        return value
+
+    def warm(self) -> None:
+        """시작 시 호출 — 첫 요청이 탐색 시간을 기다리지 않도록 백그라운드에서 미리 읽는다."""
+        with self._lock:
+            if self._refreshing or self._value is not None:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, daemon=True).start()
+
+
+interface_cache = InterfaceCache()
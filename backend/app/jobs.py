@@ -0,0 +1,235 @@
+"""
+백그라운드 작업 실행기.
+
+scan_jobs 테이블을 영속 큐로 사용한다. 워커 스레드는 pending 작업을 조건부
+UPDATE 로 선점(claim)한 뒤 실행하므로, 여러 프로세스가 같은 DB 를 써도 한
+작업은 한 번만 실행된다. 작업 종류(kind)별 처리 함수는 register() 로 등록하고,
+주기 작업(예: 스캔 스케줄 확인)은 add_periodic() 으로 등록한다.
+
+선점한 작업에는 claimed_by(프로세스 식별자)와 heartbeat_at 을 기록하고, 실행 중에는
+lease_seconds/3 마다 heartbeat_at 을 갱신한다. heartbeat 가 lease_seconds 넘게 끊긴
+running 작업(프로세스가 죽음)만 다시 pending 으로 돌린다 — 살아 있는 다른 프로세스가
+실행 중인 작업은 건드리지 않는다.
+
+처리 함수 시그니처: handler(db, job) -> 결과(JSON 직렬화 가능) 또는 None.
+긴 작업은 중간 커밋 후 raise_if_cancelled(job) 로 취소 요청을 확인한다.
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from .database import SessionLocal
+from .models import ScanJob
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobRunner:
+    def __init__(self, workers: int = 2, poll_interval: float = 2.0, lease_seconds: float = 60.0):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._running: set = set()               # 이 프로세스가 실행 중인 job id (heartbeat 대상)
+        self._threads: List[threading.Thread] = []
+        self._handlers: Dict[str, Callable] = {}
+        self._periodic: List[list] = [           # [interval, fn, 다음 실행 시각]
+            [lease_seconds / 3, self._heartbeat, 0.0],
+            [lease_seconds / 2, self._recover, 0.0],
+        ]
+        self._secrets: Dict[int, dict] = {}      # job id → DB 에 저장하지 않는 파라미터
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._started = False
+        self._lock = threading.Lock()
+
+    def register(self, kind: str, handler: Callable) -> None:
+        self._handlers[kind] = handler
+
+    def add_periodic(self, interval: float, fn: Callable[[], None]) -> None:
+        self._periodic.append([interval, fn, 0.0])
+
+    # ── 큐 조작 ─────────────────────────────────────────────────────────────
+
+    def enqueue(self, db, kind: str, params: Optional[dict] = None, secrets: Optional[dict] = None, **fields) -> ScanJob:
+        """작업을 pending 으로 저장하고 워커를 깨운다. secrets 는 메모리에만 보관한다."""
+        if kind not in self._handlers:
+            raise ValueError(f"unknown job kind: {kind}")
+        job = ScanJob(kind=kind, params=json.dumps(params) if params else None, status="pending", **fields)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        if secrets:
+            self._secrets[job.id] = secrets
+        self._wake.set()
+        return job
+
+    def requeue(self, db, job: ScanJob) -> None:
+        """중단·실패한 작업을 다시 pending 으로 (sweep 은 체크포인트부터 재개)."""
+        job.status = "pending"
+        job.cancel_requested = False
+        job.error = None
+        db.commit()
+        self._wake.set()
+
+    def cancel(self, db, job: ScanJob) -> None:
+        """pending 이면 즉시 취소, running 이면 취소를 요청해 다음 체크포인트에서 멈추게 한다."""
+        if job.status == "pending":
+            job.status = "cancelled"
+        elif job.status == "running":
+            job.cancel_requested = True
+        db.commit()
+
+    def secrets(self, job_id: int) -> dict:
+        return self._secrets.get(job_id, {})
+
+    @staticmethod
+    def raise_if_cancelled(job: ScanJob) -> None:
+        # 커밋 후 만료된 속성은 DB 에서 다시 읽히므로 다른 프로세스의 취소 요청도 보인다
+        if job.cancel_requested:
+            raise JobCancelled()
+
+    # ── 워커 ────────────────────────────────────────────────────────────────
+
+    def _claim(self, db) -> Optional[int]:
+        candidates = (
+            db.query(ScanJob.id)
+            .filter(ScanJob.status == "pending", ScanJob.kind.in_(list(self._handlers)))
+            .order_by(ScanJob.id)
+            .limit(8)
+            .all()
+        )
+        for (job_id,) in candidates:
+            claimed = (
+                db.query(ScanJob)
+                .filter(ScanJob.id == job_id, ScanJob.status == "pending")
+                .update({
+                    ScanJob.status: "running",
+                    ScanJob.claimed_by: self.worker_id,
+                    ScanJob.heartbeat_at: datetime.utcnow(),
+                }, synchronize_session=False)
+            )
+            db.commit()
+            if claimed:
+                with self._lock:
+                    self._running.add(job_id)
+                return job_id
+        return None
+
+    def _execute(self, job_id: int) -> None:
+        db = SessionLocal()
+        try:
+            job = db.get(ScanJob, job_id)
+            try:
+                result = self._handlers[job.kind](db, job)
+                job.status = "done"
+                if result is not None:
+                    job.result = json.dumps(result, ensure_ascii=False)
+            except JobCancelled:
+                db.rollback()
+                job.status = "cancelled"
+            except Exception as e:
+                db.rollback()
+                job.status = "failed"
+                job.error = str(e) or type(e).__name__
+            db.commit()
+        finally:
+            db.close()
+            self._secrets.pop(job_id, None)
+            with self._lock:
+                self._running.discard(job_id)
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                job_id = self._claim(db)
+            except Exception:
+                job_id = None
+            finally:
+                db.close()
+            if job_id is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            self._execute(job_id)
+
+    def _scheduler(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for entry in self._periodic:
+                interval, fn, due = entry
+                if now >= due:
+                    entry[2] = now + interval
+                    try:
+                        fn()
+                    except Exception:
+                        pass
+            self._stop.wait(1.0)
+
+    def _heartbeat(self) -> None:
+        """이 프로세스가 실행 중인 작업의 lease 연장"""
+        with self._lock:
+            running = list(self._running)
+        if not running:
+            return
+        db = SessionLocal()
+        try:
+            db.query(ScanJob).filter(ScanJob.id.in_(running), ScanJob.claimed_by == self.worker_id).update(
+                {ScanJob.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _recover(self) -> None:
+        """lease 가 만료된(실행하던 프로세스가 죽은) running 작업을 다시 큐에 넣는다."""
+        expired = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        db = SessionLocal()
+        try:
+            db.query(ScanJob).filter(
+                ScanJob.status == "running",
+                (ScanJob.heartbeat_at.is_(None)) | (ScanJob.heartbeat_at < expired),
+            ).update({ScanJob.status: "pending", ScanJob.claimed_by: None}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+        self._wake.set()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._stop.clear()
+        self._recover()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ] + [threading.Thread(target=self._scheduler, name="job-scheduler", daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        새 작업 선점을 멈추고 워커를 기다린다. timeout 안에 끝나지 않은 작업은 프로세스 종료와 함께
+        끊기고, lease 가 만료되면 다른(또는 다음) 프로세스가 다시 실행한다.
+        """
+        self._stop.set()
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        with self._lock:
+            self._started = False
+            self._threads = []
+
+
+job_runner = JobRunner()
@@ -1,88 +1,49 @@
+import logging
 import platform
 import sys
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from .bt_presence import bt_poller
 from .database import engine
+from .interfaces import interface_cache
+from .jobs import job_runner
+from .migrations import log_report, run_migrations
 from . import models
-from .routers import networks, devices, topology, scan
+from .routers import networks, devices, topology, scan, scan_jobs
 from .routers.scan import _get_interfaces
 from .routers.solutions import sol_router, assign_router
-from .routers.vulnerabilities import router as vuln_router
+from .routers.vulnerabilities import router as vuln_router, fleet_router as vuln_fleet_router
 from .routers.router_import import router as router_import_router
 from .routers.bluetooth import router as bluetooth_router
 
-models.Base.metadata.create_all(bind=engine)
+# uvicorn 은 자기 로거만 설정한다 — app.* 로거의 INFO 도 보이도록 (이미 설정돼 있으면 그대로)
+_app_logger = logging.getLogger("app")
+if not _app_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s - %(message)s"))
+    _app_logger.addHandler(_handler)
+    _app_logger.setLevel(logging.INFO)
 
-# 기존 DB 에 신규 컬럼 추가 + 기존 장비 vendor 역채움 + 네트워크 중복 제거
-def _migrate():
-    from .database import SessionLocal
-    from .oui import lookup as oui_lookup
-    import sqlalchemy
-    db = SessionLocal()
-    try:
-        db.execute(sqlalchemy.text("ALTER TABLE devices ADD COLUMN vendor TEXT"))
-        db.commit()
-    except Exception:
-        pass  # 이미 존재하면 무시
-    try:
-        rows = db.execute(sqlalchemy.text(
-            "SELECT id, mac_address FROM devices "
-            "WHERE mac_address IS NOT NULL AND (vendor IS NULL OR vendor = '')"
-        )).fetchall()
-        for row in rows:
-            v = oui_lookup(row[1] or "")
-            if v:
-                db.execute(sqlalchemy.text(
-                    "UPDATE devices SET vendor = :v WHERE id = :id"
-                ), {"v": v, "id": row[0]})
-        db.commit()
-    except Exception:
-        pass
-    
-    # 네트워크 중복 제거: 서브넷이 중복인 경우 하나만 남기고 삭제
-    try:
-        duplicates = db.execute(sqlalchemy.text(
-            "SELECT subnet, COUNT(*) as cnt FROM networks GROUP BY subnet HAVING cnt > 1"
-        )).fetchall()
-        for dup in duplicates:
-            subnet = dup[0]
-            nets = db.execute(
-                sqlalchemy.text("SELECT id FROM networks WHERE subnet = :subnet"),
-                {"subnet": subnet}
-            ).fetchall()
-            for net_id in nets[1:]:
-                devices_in_net = db.execute(
-                    sqlalchemy.text("SELECT id FROM devices WHERE network_id = :nid"),
-                    {"nid": net_id[0]}
-                ).fetchall()
-                target_net_id = nets[0][0]
-                for dev in devices_in_net:
-                    db.execute(
-                        sqlalchemy.text("UPDATE devices SET network_id = :tid WHERE id = :did"),
-                        {"tid": target_net_id, "did": dev[0]}
-                    )
-                db.execute(
-                    sqlalchemy.text("DELETE FROM networks WHERE id = :nid"),
-                    {"nid": net_id[0]}
-                )
-            db.commit()
-    except Exception:
-        pass
-    
-    # 서브넷 유니크 인덱스 추가
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # 테이블 생성 + 기존 DB 스키마 보정 — 워커 여러 개가 동시에 시작해도 잠금 안에서 한 번만.
+    # 적용한 버전은 기록되어 다시 실행되지 않는다
+    log_report(run_migrations(engine, models.Base.metadata))
+    interface_cache.warm()
+    job_runner.start()  # 작업 종류별 처리 함수는 routers 임포트 시 등록됨
+    bt_poller.start()
     try:
-        db.execute(sqlalchemy.text("CREATE UNIQUE INDEX IF NOT EXISTS uq_networks_subnet ON networks (subnet)"))
-        db.commit()
-    except Exception:
-        pass
+        yield
     finally:
-        db.close()
+        bt_poller.stop()
+        job_runner.stop()
 
-_migrate()
 
-app = FastAPI(title="SecurityVisualizer API", version="1.0.0")
+app = FastAPI(title="SecurityVisualizer API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -90,6 +51,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(networks.router)
@@ -98,7 +60,10 @@ app.include_router(sol_router)
 app.include_router(assign_router)
 app.include_router(topology.router)
 app.include_router(scan.router)
+app.include_router(scan_jobs.router)
+app.include_router(scan_jobs.schedule_router)
 app.include_router(vuln_router)
+app.include_router(vuln_fleet_router)
 app.include_router(router_import_router)
 app.include_router(bluetooth_router)
 
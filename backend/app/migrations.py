@@ -0,0 +1,257 @@
+"""
+버전 기반 스키마 마이그레이션.
+
+적용한 버전은 schema_migrations 테이블에 기록하고, 시작할 때는 아직 적용하지 않은
+버전만 순서대로 실행한다. 각 마이그레이션은 하나의 트랜잭션이다. 실패하면
+롤백하고 예외를 그대로 올려 서버 시작을 멈춘다 (조용히 넘어가지 않는다).
+
+새 테이블은 시작 시 create_all 이 최신 정의로 만든다. 따라서 마이그레이션은
+"기존 테이블에 없는 컬럼/인덱스 추가 + 데이터 정리"만 한다. 컬럼 추가는 존재 여부를
+확인한 뒤 하므로, 새로 만든 DB 에서도 그대로 실행할 수 있다.
+
+새 마이그레이션은 MIGRATIONS 끝에 다음 번호로 추가한다. 이미 배포한 항목은 고치지 않는다.
+
+여러 워커가 동시에 시작해도 한 번만 실행되도록 create_all 과 마이그레이션 전체를 잠금 안에서
+한다. PostgreSQL 은 advisory lock 을 잡고 마이그레이션마다 트랜잭션을 나눈다. SQLite 는
+BEGIN IMMEDIATE 로 쓰기 잠금을 잡은 한 트랜잭션 안에서 모두 실행한다 (하나라도 실패하면
+이번 실행분 전체가 롤백된다). 잠금을 얻은 뒤 적용 버전을 다시 읽으므로, 기다리던 워커는
+이미 적용된 것을 건너뛴다.
+
+서버 시작과 별도로 실행할 수도 있다:  python -m app.migrations
+"""
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from .models import normalize_mac
+from .oui import lookup_many as oui_lookup_many
+
+logger = logging.getLogger(__name__)
+
+_ADVISORY_LOCK_KEY = 0x5356_4D49     # PostgreSQL advisory lock 키 ("SVMI")
+_LOCK_WAIT = 300.0                   # 다른 워커의 마이그레이션을 기다리는 최대 시간 (초)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Float, nullable=False),
+)
+
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+def _add_columns(conn: Connection, table: str, columns: List[Tuple[str, str]]) -> None:
+    """[(컬럼명, 타입·기본값 DDL)] 중 없는 컬럼만 추가"""
+    for name, ddl in columns:
+        if not _has_column(conn, table, name):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+
+# ── 마이그레이션 ─────────────────────────────────────────────────────────────
+
+def _m001_device_vendor(conn: Connection) -> None:
+    _add_columns(conn, "devices", [("vendor", "TEXT")])
+
+
+def _m002_backfill_vendor(conn: Connection) -> None:
+    """
+    vendor 가 빈 장비를 OUI 로 채운다. 서로 다른 MAC 마다 한 번씩, 전체 MAC 으로 조회해야
+    MA-M/MA-S(28/36비트) 할당도 실시간 조회(oui.lookup)와 같은 결과가 나온다.
+    """
+    missing = "mac_address IS NOT NULL AND (vendor IS NULL OR vendor = '')"
+    by_mac: dict = {}   # 정규화 MAC → 저장된 원래 표기들
+    for (raw,) in conn.execute(text(f"SELECT DISTINCT mac_address FROM devices WHERE {missing}")):
+        by_mac.setdefault(normalize_mac(raw), []).append(raw)
+    macs = list(by_mac)
+    params = [
+        {"v": vendor, "m": raw}
+        for mac, vendor in zip(macs, oui_lookup_many(macs)) if vendor
+        for raw in by_mac[mac]
+    ]
+    if params:
+        conn.execute(text(f"UPDATE devices SET vendor = :v WHERE {missing} AND mac_address = :m"), params)
+
+
+def _m003_dedupe_network_subnets(conn: Connection) -> None:
+    """같은 subnet 의 네트워크를 가장 오래된 것 하나로 합치고 subnet 유니크 인덱스 추가"""
+    keep = "SELECT MIN(id) FROM networks GROUP BY subnet"
+    conn.execute(text(
+        "UPDATE devices SET network_id = ("
+        "  SELECT MIN(n2.id) FROM networks n1 JOIN networks n2 ON n2.subnet = n1.subnet"
+        "  WHERE n1.id = devices.network_id"
+        f") WHERE network_id NOT IN ({keep})"
+    ))
+    conn.execute(text(f"DELETE FROM networks WHERE id NOT IN ({keep})"))
+    conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_networks_subnet ON networks (subnet)"))
+
+
+def _m004_device_open_ports(conn: Connection) -> None:
+    """TCP probe 로 확인한 열린 포트 (새 테이블은 create_all 이 만든다)"""
+    _add_columns(conn, "devices", [("open_ports", "TEXT")])
+
+
+def _m005_device_lookup_columns(conn: Connection) -> None:
+    """정규화 MAC·주소 종류 컬럼 역채움 + 조회용 인덱스 (create_all 은 기존 테이블에 인덱스를 만들지 않음)"""
+    _add_columns(conn, "devices", [
+        ("mac_normalized", "TEXT"),
+        ("address_kind", "TEXT NOT NULL DEFAULT 'ip'"),
+    ])
+    conn.execute(text(
+        "UPDATE devices SET mac_normalized = UPPER(REPLACE(TRIM(mac_address), '-', ':')) "
+        "WHERE mac_normalized IS NULL AND mac_address IS NOT NULL AND TRIM(mac_address) <> ''"
+    ))
+    # 같은 MAC 이 여러 장비에 있으면 가장 오래된(id 가 가장 작은) 장비만 값을 유지 (유니크 인덱스 조건).
+    # 나머지는 MAC 으로 매칭되지 않게 되므로 경고로 남긴다
+    duplicates = (
+        "mac_normalized IS NOT NULL AND id NOT IN "
+        "(SELECT MIN(id) FROM devices WHERE mac_normalized IS NOT NULL GROUP BY mac_normalized)"
+    )
+    rows = conn.execute(text(f"SELECT id, mac_normalized FROM devices WHERE {duplicates} ORDER BY id")).all()
+    if rows:
+        logger.warning(
+            "MAC 중복 장비 %d개의 mac_normalized 를 비움 (MAC 매칭 제외): %s",
+            len(rows), ", ".join(f"{did}({mac})" for did, mac in rows),
+        )
+        conn.execute(text(f"UPDATE devices SET mac_normalized = NULL WHERE {duplicates}"))
+    conn.execute(text("UPDATE devices SET address_kind = 'bt' WHERE address_kind <> 'bt' AND ip_address LIKE 'bt:%'"))
+    for ddl in (
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_devices_mac_normalized ON devices (mac_normalized)",
+        "CREATE INDEX IF NOT EXISTS ix_devices_ip_address ON devices (ip_address)",
+        "CREATE INDEX IF NOT EXISTS ix_devices_address_kind ON devices (address_kind)",
+        "CREATE INDEX IF NOT EXISTS ix_devices_network_id ON devices (network_id)",
+        "CREATE INDEX IF NOT EXISTS ix_devices_hostname_lower ON devices (lower(hostname))",
+        "CREATE INDEX IF NOT EXISTS ix_device_vulnerabilities_device_id ON device_vulnerabilities (device_id)",
+        "CREATE INDEX IF NOT EXISTS ix_device_solutions_device_id ON device_solutions (device_id)",
+        "CREATE INDEX IF NOT EXISTS ix_device_solutions_solution_id ON device_solutions (solution_id)",
+    ):
+        conn.execute(text(ddl))
+
+
+def _m006_topology_revision(conn: Connection) -> None:
+    """DB 기반 토폴로지 리비전 행 (테이블은 create_all 이 만든다)"""
+    conn.execute(
+        text("INSERT INTO topology_revision (id, value, epoch) SELECT 1, 0, :epoch "
+             "WHERE NOT EXISTS (SELECT 1 FROM topology_revision WHERE id = 1)"),
+        {"epoch": format(int(time.time()), "x")},
+    )
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "device_vendor", _m001_device_vendor),
+    (2, "backfill_vendor", _m002_backfill_vendor),
+    (3, "dedupe_network_subnets", _m003_dedupe_network_subnets),
+    (4, "device_open_ports", _m004_device_open_ports),
+    (5, "device_lookup_columns", _m005_device_lookup_columns),
+    (6, "topology_revision", _m006_topology_revision),
+]
+
+
+def _applied_versions(conn: Connection) -> set:
+    return {row[0] for row in conn.execute(schema_migrations.select().with_only_columns(schema_migrations.c.version))}
+
+
+def _apply(conn: Connection, transaction: Callable) -> List[Tuple[int, str, float]]:
+    """미적용 마이그레이션 실행. transaction() 은 마이그레이션 하나를 감쌀 (연결) 컨텍스트."""
+    done = _applied_versions(conn)
+    report = []
+    for version, name, fn in MIGRATIONS:
+        if version in done:
+            continue
+        started = time.perf_counter()
+        with transaction() as tx:
+            fn(tx)
+            elapsed = (time.perf_counter() - started) * 1000
+            tx.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow(), duration_ms=elapsed,
+            ))
+        report.append((version, name, elapsed))
+    return report
+
+
+@contextmanager
+def _sqlite_write_lock(engine: Engine):
+    """드라이버 자동 트랜잭션을 끄고 BEGIN IMMEDIATE 로 DB 쓰기 잠금을 잡은 연결"""
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        deadline = time.monotonic() + _LOCK_WAIT
+        while True:
+            try:
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                break
+            except OperationalError as e:
+                # busy_timeout 이 지나도 다른 워커가 잠금을 쥐고 있음
+                if "locked" not in str(e).lower() or time.monotonic() > deadline:
+                    raise
+        try:
+            yield conn
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+
+
+@contextmanager
+def _advisory_lock(engine: Engine):
+    """PostgreSQL 세션 advisory lock — 잠금 연결은 마이그레이션 연결과 별개"""
+    with engine.connect() as lock_conn:
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        lock_conn.commit()
+        try:
+            yield
+        finally:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+            lock_conn.commit()
+
+
+def run_migrations(engine: Engine, metadata: Optional[MetaData] = None) -> List[Tuple[int, str, float]]:
+    """
+    (잠금 안에서) metadata.create_all 후 미적용 마이그레이션 실행.
+    [(버전, 이름, 소요 ms)] 반환 (이번에 실행한 것만).
+    """
+    if engine.dialect.name == "sqlite":
+        with _sqlite_write_lock(engine) as conn:
+            _metadata.create_all(conn)
+            if metadata is not None:
+                metadata.create_all(conn)
+            return _apply(conn, lambda: nullcontext(conn))
+
+    lock = _advisory_lock(engine) if engine.dialect.name == "postgresql" else nullcontext()
+    with lock:
+        with engine.begin() as conn:
+            _metadata.create_all(conn)
+            if metadata is not None:
+                metadata.create_all(conn)
+        with engine.connect() as conn:
+            return _apply(conn, engine.begin)
+
+
+def format_report(report: List[Tuple[int, str, float]]) -> str:
+    if not report:
+        return "[migrations] 최신 상태 — 실행할 마이그레이션 없음"
+    lines = [f"[migrations] {len(report)}개 적용"]
+    lines += [f"  {version:03d} {name:<28} {ms:8.1f} ms" for version, name, ms in report]
+    return "\n".join(lines)
+
+
+def log_report(report: List[Tuple[int, str, float]]) -> None:
+    for line in format_report(report).splitlines():
+        logger.info(line)
+
+
+if __name__ == "__main__":
+    from .database import Base, engine
+    from . import models  # noqa: F401 — 테이블 정의 등록
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    log_report(run_migrations(engine, Base.metadata))
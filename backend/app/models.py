@@ -1,8 +1,23 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, UniqueConstraint
-from sqlalchemy.orm import relationship
+import json
+from datetime import datetime
+
+from typing import Optional
+
+from sqlalchemy import BigInteger, Column, Integer, Float, Boolean, String, Text, DateTime, ForeignKey, Enum, Index, UniqueConstraint, func
+from sqlalchemy.orm import relationship, validates
 from .database import Base
 
 
+def normalize_mac(mac: Optional[str]) -> str:
+    """"aa-bb-cc-dd-ee-ff" → "AA:BB:CC:DD:EE:FF". 없으면 빈 문자열."""
+    return (mac or "").strip().upper().replace("-", ":")
+
+
+def address_kind(ip_address: Optional[str]) -> str:
+    """Device.ip_address 종류 — 블루투스 장비는 "bt:<MAC>" 형식"""
+    return "bt" if (ip_address or "").startswith("bt:") else "ip"
+
+
 class Network(Base):
     __tablename__ = "networks"
 
@@ -25,18 +40,35 @@ class Device(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     hostname = Column(String, nullable=False)
-    ip_address = Column(String, nullable=False)
+    ip_address = Column(String, nullable=False, index=True)
+    address_kind = Column(String, nullable=False, default="ip", index=True)  # ip / bt — ip_address 에서 자동 설정
     mac_address = Column(String, nullable=True)
+    mac_normalized = Column(String, nullable=True, unique=True, index=True)  # normalize_mac(mac_address) — 조회·중복 방지용
     vendor = Column(String, nullable=True)       # MAC OUI 기반 제조사
     os = Column(String, nullable=True)
     device_type = Column(String, nullable=True)  # server, workstation, router, etc.
+    open_ports = Column(String, nullable=True)   # 마지막 TCP probe 의 열린 포트 "22,80,443"
     status = Column(String, default="active")  # active, inactive, unknown
-    network_id = Column(Integer, ForeignKey("networks.id"), nullable=False)
+    network_id = Column(Integer, ForeignKey("networks.id"), nullable=False, index=True)
 
     network = relationship("Network", back_populates="devices")
     device_solutions = relationship("DeviceSolution", back_populates="device", cascade="all, delete-orphan")
     device_vulnerabilities = relationship("DeviceVulnerability", back_populates="device", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_devices_hostname_lower", func.lower(hostname)),
+    )
+
+    @validates("mac_address")
+    def _sync_mac_normalized(self, _key, value):
+        self.mac_normalized = normalize_mac(value) or None
+        return value
+
+    @validates("ip_address")
+    def _sync_address_kind(self, _key, value):
+        self.address_kind = address_kind(value)
+        return value
+
 
 class SecuritySolution(Base):
     __tablename__ = "security_solutions"
@@ -54,7 +86,7 @@ class DeviceVulnerability(Base):
     __tablename__ = "device_vulnerabilities"
 
     id          = Column(Integer, primary_key=True, index=True)
-    device_id   = Column(Integer, ForeignKey("devices.id"), nullable=False)
+    device_id   = Column(Integer, ForeignKey("devices.id"), nullable=False, index=True)
     cve_id      = Column(String, nullable=True)   # "CVE-2024-1234" (optional)
     title       = Column(String, nullable=False)
     severity    = Column(String, default="medium")  # critical/high/medium/low
@@ -68,10 +100,119 @@ class DeviceSolution(Base):
     __tablename__ = "device_solutions"
 
     id = Column(Integer, primary_key=True, index=True)
-    device_id = Column(Integer, ForeignKey("devices.id"), nullable=False)
-    solution_id = Column(Integer, ForeignKey("security_solutions.id"), nullable=False)
+    device_id = Column(Integer, ForeignKey("devices.id"), nullable=False, index=True)
+    solution_id = Column(Integer, ForeignKey("security_solutions.id"), nullable=False, index=True)
     installed_version = Column(String, nullable=True)
     status = Column(String, default="active")  # active, inactive, outdated
 
     device = relationship("Device", back_populates="device_solutions")
     solution = relationship("SecuritySolution", back_populates="device_solutions")
+
+
+class ScanJob(Base):
+    """
+    백그라운드 작업 (영속 큐). kind 별로 처리 함수가 다르다 — app.jobs 참고.
+    sweep 작업은 next_index 까지 처리된 것으로 체크포인트되어 중단 후 재개 가능.
+    """
+    __tablename__ = "scan_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, default="sweep")       # sweep, bluetooth_refresh, router_import, router_poll, vuln_autoscan
+    cidr = Column(String, nullable=True)         # sweep 대상 대역
+    status = Column(String, default="pending")   # pending, running, done, failed, cancelled
+    total = Column(Integer, default=0)           # 스캔 대상 호스트 수
+    next_index = Column(Integer, default=0)      # 다음에 probe 할 호스트 순번 (체크포인트)
+    live_count = Column(Integer, default=0)
+    rate = Column(Float, nullable=True)          # 초당 최대 probe 수 (None = 제한 없음)
+    chunk_size = Column(Integer, default=256)    # 동시에 in-flight 인 최대 probe 수
+    params = Column(Text, nullable=True)         # 작업 파라미터 JSON (비밀번호 등 민감 값 제외)
+    result = Column(Text, nullable=True)         # 완료 결과 JSON
+    cancel_requested = Column(Boolean, default=False)
+    schedule_id = Column(Integer, ForeignKey("scan_schedules.id"), nullable=True)
+    claimed_by = Column(String, nullable=True)      # 실행 중인 프로세스 (JobRunner.worker_id)
+    heartbeat_at = Column(DateTime, nullable=True)  # lease — 오래 갱신되지 않으면 다시 pending
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    results = relationship("ScanJobResult", back_populates="job", cascade="all, delete-orphan")
+
+    @property
+    def params_data(self):
+        return json.loads(self.params) if self.params else {}
+
+    @property
+    def result_data(self):
+        return json.loads(self.result) if self.result else None
+
+
+class ScanSchedule(Base):
+    """서브넷별 주기 스캔. next_run_at 이 지나면 sweep 작업을 큐에 넣는다."""
+    __tablename__ = "scan_schedules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cidr = Column(String, nullable=False)
+    interval_minutes = Column(Integer, nullable=False)
+    rate = Column(Float, nullable=True)
+    chunk_size = Column(Integer, default=256)
+    enabled = Column(Boolean, default=True)
+    last_run_at = Column(DateTime, nullable=True)
+    next_run_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ScanJobResult(Base):
+    __tablename__ = "scan_job_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("scan_jobs.id"), nullable=False, index=True)
+    ip_address = Column(String, nullable=False)
+    hostname = Column(String, nullable=False)
+    mac_address = Column(String, nullable=True)
+    vendor = Column(String, nullable=True)
+    already_registered = Column(Boolean, default=False)
+    role = Column(String, nullable=True)
+    open_ports = Column(String, nullable=True)
+    os = Column(String, nullable=True)
+    device_type = Column(String, nullable=True)
+
+    job = relationship("ScanJob", back_populates="results")
+
+
+class HostObservation(Base):
+    """IP 별 마지막 스캔 관측값. 델타 스캔의 기준이 된다 — app.observations 참고."""
+    __tablename__ = "host_observations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ip_address = Column(String, nullable=False, unique=True)
+    ip_int = Column(BigInteger, nullable=False, index=True)  # 대역 범위 조회용 정수 IPv4
+    mac_address = Column(String, nullable=True)
+    hostname = Column(String, nullable=True)
+    alive = Column(Boolean, default=False)               # 마지막 probe 에서 응답했는지
+    last_seen_at = Column(DateTime, nullable=True)       # 마지막으로 live 였던 시각
+    last_probed_at = Column(DateTime, nullable=True)
+    resolved_at = Column(DateTime, nullable=True)        # hostname 을 마지막으로 DNS 조회한 시각
+
+
+class TopologyRevision(Base):
+    """
+    DB 전체 토폴로지 리비전 (id=1 한 행). 추적 대상 테이블을 바꾼 트랜잭션이 같은
+    트랜잭션 안에서 value 를 1 올린다 — app.revision 참고. epoch 는 이 DB 를 구분한다.
+    """
+    __tablename__ = "topology_revision"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    epoch = Column(String, nullable=False)
+
+
+class TopologyChange(Base):
+    """리비전별 변경 로그 — 그 트랜잭션이 건드린 id 목록 (JSON 배열)"""
+    __tablename__ = "topology_changes"
+
+    revision = Column(Integer, primary_key=True, autoincrement=False)
+    networks = Column(Text, nullable=False, default="[]")
+    devices = Column(Text, nullable=False, default="[]")
+    solutions = Column(Text, nullable=False, default="[]")
+    full = Column(Boolean, nullable=False, default=False)
+    interfaces = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
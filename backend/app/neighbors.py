@@ -0,0 +1,96 @@
+"""
+ARP(이웃) 테이블 조회.
+
+- Linux: /proc/net/arp 를 직접 읽는다 (프로세스 실행 없음). 완료(ATF_COM)·고정
+  (ATF_PERM) 엔트리만 사용한다.
+- 그 외: arp -a 파싱 (Windows 출력 형식).
+
+NeighborTable 은 IP → MAC 맵을 캐시하고, refresh() 는 직전 스냅숏과 비교해
+바뀐 엔트리만 돌려준다.
+"""
+import platform
+import re
+import subprocess
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+_ATF_COM = 0x02
+_ATF_PERM = 0x04
+
+
+def _read_proc_arp() -> Dict[str, str]:
+    mac_map: Dict[str, str] = {}
+    with open('/proc/net/arp') as f:
+        next(f, None)  # 헤더
+        for line in f:
+            fields = line.split()
+            if len(fields) < 6:
+                continue
+            ip, _hw_type, flags, mac = fields[:4]
+            if not int(flags, 16) & (_ATF_COM | _ATF_PERM):
+                continue  # 미완료(응답 없음) 엔트리
+            if mac == '00:00:00:00:00:00':
+                continue
+            mac_map[ip] = mac.upper()
+    return mac_map
+
+
+def _read_arp_command() -> Dict[str, str]:
+    mac_map: Dict[str, str] = {}
+    r = subprocess.run(['arp', '-a'], capture_output=True, text=True, timeout=5)
+    for line in r.stdout.splitlines():
+        m = re.match(r'\s+([\d.]+)\s+([\w-]{17})\s+\w+', line)
+        if m:
+            ip = m.group(1)
+            mac = m.group(2).upper().replace('-', ':')
+            mac_map[ip] = mac
+    return mac_map
+
+
+def read_neighbors() -> Dict[str, str]:
+    """현재 ARP 테이블 {IP: MAC}. 읽기 실패 시 빈 dict."""
+    try:
+        if platform.system() == 'Linux':
+            return _read_proc_arp()
+        return _read_arp_command()
+    except Exception:
+        return {}
+
+
+class NeighborTable:
+    def __init__(self, reader=read_neighbors, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._reader = reader
+        self._lock = threading.Lock()
+        self._table: Dict[str, str] = {}
+        self._refreshed_at = 0.0
+
+    def refresh(self, force: bool = False) -> Tuple[Dict[str, str], Set[str]]:
+        """
+        테이블을 다시 읽고 (추가·변경된 {IP: MAC}, 사라진 IP 집합) 을 반환.
+        force 가 아니면 min_interval 안의 반복 호출은 읽지 않고 빈 변경분을 반환한다.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self._refreshed_at < self.min_interval:
+                return {}, set()
+            new = self._reader()
+            old = self._table
+            changed = {ip: mac for ip, mac in new.items() if old.get(ip) != mac}
+            removed = set(old) - set(new)
+            self._table = new
+            self._refreshed_at = time.monotonic()
+            return changed, removed
+
+    def get(self, ip: str, refresh_on_miss: bool = True) -> Optional[str]:
+        mac = self._table.get(ip)
+        if mac is None and refresh_on_miss:
+            self.refresh()
+            mac = self._table.get(ip)
+        return mac
+
+    def snapshot(self) -> Dict[str, str]:
+        return dict(self._table)
+
+
+neighbor_table = NeighborTable()
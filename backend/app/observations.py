@@ -0,0 +1,109 @@
+"""
+호스트 관측 기록 — 스캔마다 IP 별 live 여부·MAC·hostname·시각을 남긴다.
+
+델타 스캔은 이 기록으로 직전에 live 였던 호스트만 먼저 probe 하고, 변하지 않은
+호스트는 저장된 hostname 을 재사용해 DNS 조회를 건너뛴다. record() 는 이번
+probe 결과와 직전 관측을 비교해 added / removed / changed 를 돌려준다.
+커밋은 호출자가 한다.
+"""
+import ipaddress
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from .identity import normalize_mac
+from .models import HostObservation
+
+
+def load(db: Session, net) -> Dict[str, HostObservation]:
+    """net 안의 관측 기록 {IP: HostObservation}"""
+    return load_range(db, net.network_address, net.broadcast_address)
+
+
+def load_range(db: Session, first, last) -> Dict[str, HostObservation]:
+    """first~last (양끝 포함) 범위의 관측 기록"""
+    first = int(ipaddress.ip_address(first))
+    last = int(ipaddress.ip_address(last))
+    rows = (
+        db.query(HostObservation)
+        .filter(HostObservation.ip_int >= first, HostObservation.ip_int <= last)
+        .all()
+    )
+    return {row.ip_address: row for row in rows}
+
+
+def reusable_hostname(
+    obs: Optional[HostObservation],
+    mac: Optional[str],
+    ttl: float,
+    negative_ttl: float,
+) -> Optional[str]:
+    """
+    MAC 이 그대로이고 유효 기간 안에 조회한 hostname 이면 반환 (DNS 생략).
+    PTR 이 없던 호스트(hostname == IP) 는 negative_ttl 동안만 재사용한다.
+    """
+    if obs is None or not obs.alive or not obs.hostname or obs.resolved_at is None:
+        return None
+    if normalize_mac(obs.mac_address) != normalize_mac(mac):
+        return None
+    max_age = ttl if obs.hostname != obs.ip_address else negative_ttl
+    if datetime.utcnow() - obs.resolved_at > timedelta(seconds=max_age):
+        return None
+    return obs.hostname
+
+
+def record(
+    db: Session,
+    observed: Dict[str, HostObservation],
+    probed: Iterable[str],
+    found: Dict[str, Tuple[str, Optional[str]]],
+    resolved: Iterable[str] = (),
+) -> dict:
+    """
+    probe 결과를 기록하고 직전 관측과의 차이를 반환.
+
+    observed: load() 결과 (갱신되며 새 엔트리도 추가된다)
+    probed:   이번에 probe 한 IP — 여기 있는데 found 에 없으면 dead 로 기록
+    found:    {IP: (hostname, MAC)} — 이번에 live 로 확인된 호스트
+    resolved: 이번에 DNS 를 조회한 IP (resolved_at 갱신)
+    """
+    now = datetime.utcnow()
+    resolved = set(resolved)
+    added, removed, changed = [], [], []
+
+    for ip, (hostname, mac) in found.items():
+        obs = observed.get(ip)
+        if obs is None:
+            obs = HostObservation(ip_address=ip, ip_int=int(ipaddress.ip_address(ip)))
+            db.add(obs)
+            observed[ip] = obs
+        if not obs.alive:
+            added.append(ip)
+        else:
+            if mac and obs.mac_address and normalize_mac(mac) != normalize_mac(obs.mac_address):
+                changed.append({"ip_address": ip, "field": "mac_address", "old": obs.mac_address, "new": mac})
+            if hostname != ip and obs.hostname and hostname.lower() != obs.hostname.lower():
+                changed.append({"ip_address": ip, "field": "hostname", "old": obs.hostname, "new": hostname})
+        obs.alive = True
+        obs.last_seen_at = now
+        obs.last_probed_at = now
+        if mac:
+            obs.mac_address = mac
+        if hostname != ip or not obs.hostname:
+            obs.hostname = hostname
+        if ip in resolved:
+            obs.resolved_at = now
+
+    for ip in probed:
+        if ip in found:
+            continue
+        obs = observed.get(ip)
+        if obs is None:
+            continue  # 기록 없는 dead 호스트는 저장하지 않음
+        if obs.alive:
+            removed.append(ip)
+            obs.alive = False
+        obs.last_probed_at = now
+
+    return {"added": added, "removed": removed, "changed": changed}
@@ -1,6 +1,27 @@
 # OUI (Organizationally Unique Identifier) lookup
+# 1순위: IEEE MA-L/MA-M/MA-S 전체 레지스트리를 컴파일한 인덱스 파일 (app.oui_index 참고).
+#        OUI_INDEX_FILE 또는 backend/data/oui.bin — 첫 조회 때 mmap 으로 연다.
+#        파일이 교체되면 (python -m app.oui_index 는 os.replace 로 쓴다) 재시작 없이 다시 연다.
+# 인덱스 파일이 없으면 아래 내장 목록 사용.
 # Source: IEEE MA-L public registry — compact subset for common consumer/enterprise hardware
 # Key format: "XX:XX:XX" (uppercase, colon-separated)
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+INDEX_PATH = os.environ.get(
+    "OUI_INDEX_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "oui.bin")
+)
+
+logger = logging.getLogger(__name__)
+
+_index = None
+_index_stat = None               # 마지막으로 연 파일의 (inode, mtime, 크기) — 파일이 없으면 None
+_index_checked = float("-inf")   # 마지막 stat 시각 (monotonic)
+_INDEX_CHECK_INTERVAL = 5.0      # 파일 교체 확인 간격 (초) — 조회마다 stat 하지 않도록
+_index_lock = threading.Lock()
 
 _OUI: dict[str, str] = {
     # ── Apple ──────────────────────────────────────────────────────────────
@@ -498,21 +519,106 @@ _OUI: dict[str, str] = {
 }
 
 
+def _index_file_stat():
+    try:
+        st = os.stat(INDEX_PATH)
+    except OSError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _get_index():
+    """
+    인덱스 파일을 처음 필요할 때 연다 (import 시점에는 열지 않음). 이후 _INDEX_CHECK_INTERVAL 마다
+    inode·mtime·크기를 확인해 파일이 교체됐으면 새 파일을 mmap 한다. 없거나 깨졌으면 None.
+    이전 mmap 은 닫지 않는다 — 진행 중인 조회가 끝나고 참조가 사라지면 해제된다.
+    """
+    global _index, _index_stat, _index_checked
+    if time.monotonic() - _index_checked < _INDEX_CHECK_INTERVAL:
+        return _index
+    with _index_lock:
+        if time.monotonic() - _index_checked >= _INDEX_CHECK_INTERVAL:
+            stat = _index_file_stat()
+            if stat != _index_stat:
+                index = None
+                if stat is not None:
+                    from .oui_index import OuiIndex
+                    try:
+                        index = OuiIndex(INDEX_PATH)
+                    except (OSError, ValueError) as e:
+                        logger.warning("인덱스 파일 로드 실패, 내장 목록 사용: %s", e)
+                _index, _index_stat = index, stat
+            _index_checked = time.monotonic()
+    return _index
+
+
+_STRIP = str.maketrans("", "", ":-.")
+_builtin_by_int = None
+
+
+def _builtin_get(value: int):
+    """내장 목록 (24비트만) 조회"""
+    global _builtin_by_int
+    if _builtin_by_int is None:
+        _builtin_by_int = {int(k.replace(":", ""), 16): v for k, v in _OUI.items()}
+    return _builtin_by_int.get(value >> 24)
+
+
+def _parse(mac: str) -> Tuple[Optional[str], int, int]:
+    """
+    구분자를 지운 16진수를 48비트 정수로 한 번에 변환. (확정된 결과, 값, 16진 자릿수) 반환 —
+    형식 오류·랜덤 MAC·접두사가 짧은 경우는 조회 없이 결과가 정해진다.
+    """
+    digits = (mac or "").translate(_STRIP)[:12]
+    try:
+        value = int(digits, 16) if len(digits) >= 2 else -1
+    except ValueError:
+        value = -1
+    if value < 0:
+        return "", 0, 0
+    # 첫 바이트의 bit1 (0x02) 이 1이면 Locally Administered Address (랜덤 MAC)
+    if (value >> (4 * len(digits) - 8)) & 0x02:
+        return "랜덤 MAC", 0, 0
+    if len(digits) < 6:
+        return "", 0, 0
+    return None, value << (4 * (12 - len(digits))), len(digits)
+
+
+def lookup_many(macs: Iterable[str]) -> List[str]:
+    """
+    MAC 주소 목록 → 제조사 목록 (같은 순서). 같은 MAC 은 한 번만 변환·조회하고,
+    인덱스 검색은 배치 전체를 정렬해 한 번에 한다 (OuiIndex.lookup_ints).
+    """
+    macs = list(macs)
+    vendors: Dict[str, str] = {}
+    pending: List[str] = []
+    values: List[Tuple[int, int]] = []
+    for mac in macs:
+        if mac in vendors:
+            continue
+        vendor, value, digits = _parse(mac)
+        vendors[mac] = vendor or ""
+        if vendor is None:
+            pending.append(mac)
+            values.append((value, digits))
+    if values:
+        index = _get_index()
+        found = index.lookup_ints(values) if index is not None else [_builtin_get(v) for v, _ in values]
+        for mac, name in zip(pending, found):
+            vendors[mac] = name or ""
+    return [vendors[mac] for mac in macs]
+
+
 def lookup(mac: str) -> str:
     """
-    MAC 주소 앞 3바이트(OUI)로 제조사를 반환.
+    MAC 주소로 제조사를 반환. 인덱스가 있으면 36/28/24비트 순으로 가장 긴 접두사 일치.
     - 랜덤 MAC(로컬 관리 주소, 2번째 비트=1): "랜덤 MAC" 반환
     - 미확인 OUI: 빈 문자열 반환
+    여러 개를 조회할 때는 lookup_many 를 쓴다.
     """
-    if not mac:
-        return ""
-    normalized = mac.upper().replace("-", ":").replace(".", ":")
-    # 첫 바이트의 bit1 (0x02) 이 1이면 Locally Administered Address (랜덤 MAC)
-    try:
-        first_byte = int(normalized[:2], 16)
-        if first_byte & 0x02:
-            return "랜덤 MAC"
-    except ValueError:
-        return ""
-    oui = normalized[:8]   # "XX:XX:XX"
-    return _OUI.get(oui, "")
+    vendor, value, digits = _parse(mac)
+    if vendor is not None:
+        return vendor
+    index = _get_index()
+    found = index.lookup_int(value, digits) if index is not None else _builtin_get(value)
+    return found or ""
@@ -0,0 +1,188 @@
+"""
+IEEE MAC 주소 블록 레지스트리(MA-L / MA-M / MA-S, IAB) → 메모리 매핑 접두사 인덱스.
+
+오프라인에서 IEEE 가 배포하는 CSV 를 받아 한 번 컴파일한다.
+    python -m app.oui_index oui.csv mam.csv oui36.csv [iab.csv] [-o data/oui.bin]
+(https://standards-oui.ieee.org/oui/oui.csv, .../oui28/mam.csv, .../oui36/oui36.csv)
+
+파일 형식 (little-endian, 섹션은 8바이트 정렬):
+  헤더      "OUI1", 접두사 수(24/28/36비트), 제조사 수, 문자열 바이트 수
+  keys      u64[n24 + n28 + n36]  길이별로 구간을 나눠 각각 오름차순 정렬한 접두사 값
+  vendors   u32[같은 수]          keys 와 같은 순서의 제조사 번호
+  bounds    u32[제조사 수 + 1]     제조사 이름의 blob 내 시작 위치
+  blob      UTF-8 제조사 이름 (중복 제거)
+
+조회는 mmap 한 파일 위에서 이진 탐색만 하므로 프로세스마다 복사본을 만들지 않는다 —
+uvicorn 워커 여러 개가 같은 페이지 캐시를 공유한다.
+"""
+import argparse
+import csv
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAGIC = b"OUI1"
+_HEADER = struct.Struct("<4sIIIII")        # magic, n24, n28, n36, 제조사 수, blob 바이트 수
+_HEADER_SIZE = 32
+PREFIX_BITS = (36, 28, 24)                 # 긴 접두사부터 (longest-prefix match)
+_REGISTRY_BITS = {"MA-L": 24, "MA-M": 28, "MA-S": 36, "IAB": 36}
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def read_registry(paths: Iterable[str]) -> Dict[Tuple[int, int], str]:
+    """IEEE CSV 들 → {(비트 수, 접두사 값): 제조사}. Registry 열로 접두사 길이를 정한다."""
+    prefixes: Dict[Tuple[int, int], str] = {}
+    for path in paths:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                bits = _REGISTRY_BITS.get((row.get("Registry") or "").strip())
+                assignment = (row.get("Assignment") or "").strip()
+                name = " ".join((row.get("Organization Name") or "").split())
+                if not bits or not name or len(assignment) * 4 != bits:
+                    continue
+                prefixes[(bits, int(assignment, 16))] = name
+    return prefixes
+
+
+def write_index(prefixes: Dict[Tuple[int, int], str], out_path: str) -> None:
+    names = sorted(set(prefixes.values()))
+    name_ids = {name: i for i, name in enumerate(names)}
+    sections = {bits: sorted((p, name_ids[v]) for (b, p), v in prefixes.items() if b == bits) for bits in (24, 28, 36)}
+    ordered = sections[24] + sections[28] + sections[36]
+
+    blob = bytearray()
+    bounds = [0]
+    for name in names:
+        blob += name.encode("utf-8")
+        bounds.append(len(blob))
+
+    keys = struct.pack(f"<{len(ordered)}Q", *(p for p, _ in ordered))
+    vendors = struct.pack(f"<{len(ordered)}I", *(v for _, v in ordered))
+    bounds_raw = struct.pack(f"<{len(bounds)}I", *bounds)
+
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        header = _HEADER.pack(MAGIC, len(sections[24]), len(sections[28]), len(sections[36]), len(names), len(blob))
+        f.write(header.ljust(_HEADER_SIZE, b"\0"))
+        for chunk in (keys, vendors, bounds_raw):
+            f.write(chunk.ljust(_align(len(chunk)), b"\0"))
+        f.write(blob)
+    # 실행 중인 서버는 기존 파일을 mmap 한 채로 두고, 교체를 감지하면 새 파일을 연다 (app.oui._get_index)
+    os.replace(tmp, out_path)
+
+
+class OuiIndex:
+    """mmap 한 인덱스 파일. 조회 시 필요한 페이지만 읽는다."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER_SIZE:
+            raise ValueError(f"OUI 인덱스 파일이 잘렸습니다: {path}")
+        magic, n24, n28, n36, n_names, blob_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"OUI 인덱스 파일이 아닙니다: {path}")
+        total = n24 + n28 + n36
+        size = _HEADER_SIZE + _align(total * 8) + _align(total * 4) + _align((n_names + 1) * 4) + blob_len
+        if len(self._mm) < size:
+            raise ValueError(f"OUI 인덱스 파일이 잘렸습니다: {path}")
+        pos = _HEADER_SIZE
+        keys = memoryview(self._mm)[pos:pos + total * 8]
+        pos += _align(total * 8)
+        vendors = memoryview(self._mm)[pos:pos + total * 4]
+        pos += _align(total * 4)
+        bounds = memoryview(self._mm)[pos:pos + (n_names + 1) * 4]
+        pos += _align((n_names + 1) * 4)
+        self._blob = memoryview(self._mm)[pos:pos + blob_len]
+        if sys.byteorder == "little":
+            self._keys, self._vendors, self._bounds = keys.cast("Q"), vendors.cast("I"), bounds.cast("I")
+        else:   # 빅 엔디언에서는 복사 후 바이트 순서 변환
+            self._keys, self._vendors, self._bounds = (
+                _swapped(keys, "Q"), _swapped(vendors, "I"), _swapped(bounds, "I"),
+            )
+        # 길이별 구간 [시작, 끝)
+        self._ranges = {24: (0, n24), 28: (n24, n24 + n28), 36: (n24 + n28, total)}
+        self.counts = {24: n24, 28: n28, 36: n36}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _name(self, vendor_id: int) -> str:
+        return bytes(self._blob[self._bounds[vendor_id]:self._bounds[vendor_id + 1]]).decode("utf-8")
+
+    def lookup_int(self, mac48: int, digits: int = 12) -> Optional[str]:
+        """48비트 MAC 값 → 가장 긴 접두사의 제조사. digits 는 입력에 실제로 있던 16진 자릿수."""
+        for bits in PREFIX_BITS:
+            if digits * 4 < bits:
+                continue
+            lo, hi = self._ranges[bits]
+            if lo == hi:
+                continue
+            key = mac48 >> (48 - bits)
+            i = bisect_left(self._keys, key, lo, hi)
+            if i < hi and self._keys[i] == key:
+                return self._name(self._vendors[i])
+        return None
+
+    def lookup_ints(self, values: Sequence[Tuple[int, int]]) -> List[Optional[str]]:
+        """
+        [(48비트 MAC 값, 16진 자릿수)] 일괄 조회. 길이별로 배치의 접두사를 정렬한 뒤 인덱스를
+        앞에서부터 한 번만 훑는다 (이진 탐색 시작점이 계속 앞으로만 이동).
+        """
+        out: List[Optional[str]] = [None] * len(values)
+        names: Dict[int, str] = {}
+        for bits in PREFIX_BITS:
+            lo, hi = self._ranges[bits]
+            if lo == hi:
+                continue
+            shift = 48 - bits
+            batch = sorted(
+                (value >> shift, i) for i, (value, digits) in enumerate(values)
+                if out[i] is None and digits * 4 >= bits
+            )
+            pos = lo
+            for key, i in batch:
+                pos = bisect_left(self._keys, key, pos, hi)
+                if pos == hi:
+                    break
+                if self._keys[pos] == key:
+                    vendor_id = self._vendors[pos]
+                    name = names.get(vendor_id)
+                    if name is None:
+                        name = names[vendor_id] = self._name(vendor_id)
+                    out[i] = name
+        return out
+
+
+def _swapped(view: memoryview, fmt: str) -> array:
+    arr = array(fmt)
+    arr.frombytes(view.tobytes())
+    arr.byteswap()
+    return arr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IEEE MA-L/MA-M/MA-S CSV → OUI 인덱스 파일")
+    parser.add_argument("csv", nargs="+", help="IEEE 레지스트리 CSV (oui.csv, mam.csv, oui36.csv, iab.csv)")
+    parser.add_argument("-o", "--output", default=None, help="출력 경로 (기본: OUI_INDEX_FILE 또는 backend/data/oui.bin)")
+    args = parser.parse_args()
+
+    from .oui import INDEX_PATH
+    out = args.output or INDEX_PATH
+    prefixes = read_registry(args.csv)
+    write_index(prefixes, out)
+    counts = {bits: sum(1 for b, _ in prefixes if b == bits) for bits in (24, 28, 36)}
+    print(f"{out}: 24비트 {counts[24]}개, 28비트 {counts[28]}개, 36비트 {counts[36]}개, "
+          f"{os.path.getsize(out) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
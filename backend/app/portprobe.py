@@ -0,0 +1,183 @@
+"""
+비동기 TCP connect probe + 간이 서비스 지문.
+
+ICMP 를 막은 호스트도 TCP 포트에는 응답(SYN-ACK 또는 RST)하므로 liveness 판정에
+쓴다. 열린 포트 중 서버가 먼저 말하는 서비스(SSH/FTP/SMTP/Telnet)는 첫 줄을,
+HTTP 는 HEAD 응답의 Server 헤더를 읽어 OS·장비 유형 힌트를 만든다.
+
+호스트 단위로 동시 실행 수를 제한하고(호스트당 포트 수 × 동시 호스트 수 ≤
+concurrency), 호스트당 소요 시간은 deadline 으로 제한한다. deadline 은 호스트의
+probe 가 실제로 시작될 때부터 잰다.
+비특권 프로세스에서도 동작하도록 SYN(half-open) 대신 connect 를 사용한다.
+"""
+import asyncio
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 흔한 관리·서비스 포트 — 지문에 쓰는 포트를 포함
+DEFAULT_PORTS = (22, 23, 53, 80, 135, 139, 443, 445, 515, 554, 631, 3389, 8080, 9100)
+
+_SERVER_FIRST = {21, 22, 23, 25, 110, 143}
+_HTTP = {80, 8000, 8008, 8080, 8888}
+
+_SERVER_RE = re.compile(rb'^server:\s*(.+?)\r?$', re.IGNORECASE | re.MULTILINE)
+
+# (배너 부분 문자열, OS 힌트, 장비 유형 힌트) — 위에서부터 첫 일치
+_BANNER_HINTS = [
+    ("microsoft-iis", "Windows Server", "server"),
+    ("ubuntu", "Ubuntu", None),
+    ("debian", "Debian", None),
+    ("raspbian", "Debian", None),
+    ("centos", "CentOS", None),
+    ("red hat", "Red Hat", None),
+    ("freebsd", "FreeBSD", None),
+    ("routeros", "RouterOS", "router"),
+    ("mikrotik", "RouterOS", "router"),
+    ("openwrt", "OpenWrt", "router"),
+    ("cisco", "Cisco IOS", "router"),
+    ("fortigate", "FortiOS", "firewall"),
+    ("fortinet", "FortiOS", "firewall"),
+    ("pan-os", "PAN-OS", "firewall"),
+]
+
+
+def _fd_budget(requested: int) -> int:
+    """열린 파일 수 제한(ulimit -n) 안에서 쓸 수 있는 동시 연결 수"""
+    if sys.platform == "win32":
+        return requested
+    import resource
+    soft, _hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return requested
+    return max(16, min(requested, soft - 128))
+
+
+@dataclass
+class PortProbeResult:
+    ip: str
+    open_ports: List[int] = field(default_factory=list)
+    refused: bool = False                      # RST 응답 — 포트는 닫혔지만 호스트는 live
+    banners: Dict[int, str] = field(default_factory=dict)
+
+    @property
+    def alive(self) -> bool:
+        return bool(self.open_ports) or self.refused
+
+
+def format_ports(ports: Iterable[int]) -> Optional[str]:
+    """[22, 80] → "22,80" (Device.open_ports 저장 형식). 없으면 None."""
+    ports = sorted(set(ports))
+    return ",".join(str(p) for p in ports) if ports else None
+
+
+def parse_ports(value: Optional[str]) -> List[int]:
+    return [int(p) for p in value.split(",") if p.strip().isdigit()] if value else []
+
+
+def fingerprint(result: PortProbeResult) -> Tuple[Optional[str], Optional[str]]:
+    """(OS 힌트, 장비 유형 힌트). 배너 → 포트 조합 순으로 추정한다."""
+    text = " ".join(result.banners.values()).lower()
+    for needle, os_hint, type_hint in _BANNER_HINTS:
+        if needle in text:
+            return os_hint, type_hint
+
+    ports = set(result.open_ports)
+    if "dropbear" in text:
+        return "Embedded Linux", None
+    if ports & {9100, 515, 631} and not ports & {135, 445, 3389}:
+        return None, "other"   # 프린터
+    if 554 in ports:
+        return None, "other"   # IP 카메라 (RTSP)
+    if ports & {135, 445} and 3389 in ports:
+        return "Windows", "workstation"
+    if ports & {135, 139, 445}:
+        return "Windows", None
+    if 53 in ports and ports & {80, 443}:
+        return None, "router"
+    if "openssh" in text:
+        return "Linux", None
+    return None, None
+
+
+class TcpProber:
+    """
+    스캔 한 번에 하나씩 만든다 (semaphore 가 실행 중인 이벤트 루프에 묶이므로).
+    """
+
+    def __init__(
+        self,
+        ports: Iterable[int] = DEFAULT_PORTS,
+        concurrency: int = 1024,
+        connect_timeout: float = 0.5,
+        deadline: float = 2.0,
+        banner_timeout: float = 0.5,
+    ):
+        self.ports = tuple(sorted(set(ports)))
+        self.concurrency = _fd_budget(concurrency)   # 동시 TCP 연결 수 상한
+        self.connect_timeout = connect_timeout
+        self.deadline = deadline                # 호스트당 최대 소요 시간
+        self.banner_timeout = banner_timeout
+        self._sem: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(max(1, self.concurrency // max(len(self.ports), 1)))
+        return self._sem
+
+    async def _grab_banner(self, reader, writer, ip: str, port: int) -> Optional[str]:
+        try:
+            if port in _HTTP:
+                writer.write(f"HEAD / HTTP/1.0\r\nHost: {ip}\r\n\r\n".encode())
+                await writer.drain()
+                data = await asyncio.wait_for(reader.read(1024), self.banner_timeout)
+                m = _SERVER_RE.search(data)
+                return m.group(1).decode(errors="replace").strip() if m else None
+            if port in _SERVER_FIRST:
+                data = await asyncio.wait_for(reader.readline(), self.banner_timeout)
+                return data.decode(errors="replace").strip()[:200] or None
+        except (asyncio.TimeoutError, OSError):
+            return None
+        return None
+
+    async def _probe_port(self, result: PortProbeResult, port: int) -> None:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(result.ip, port), self.connect_timeout,
+            )
+        except ConnectionRefusedError:
+            result.refused = True
+            return
+        except (asyncio.TimeoutError, OSError):
+            return  # filtered / 경로 없음
+        try:
+            result.open_ports.append(port)
+            banner = await self._grab_banner(reader, writer, result.ip, port)
+            if banner:
+                result.banners[port] = banner
+        finally:
+            writer.close()
+
+    async def probe(self, ip: str) -> PortProbeResult:
+        """ip 의 모든 포트를 동시에 probe. deadline 이 지나면 그때까지의 결과를 반환."""
+        result = PortProbeResult(ip)
+        async with self._semaphore():
+            tasks = [asyncio.create_task(self._probe_port(result, port)) for port in self.ports]
+            _done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        result.open_ports.sort()
+        return result
+
+    async def probe_many(self, ips: Iterable[str]) -> Dict[str, PortProbeResult]:
+        """live 로 판정된 호스트만 {ip: 결과} 로 반환"""
+        results = await asyncio.gather(*(self.probe(ip) for ip in ips))
+        return {r.ip: r for r in results if r.alive}
+
+    def probe_many_sync(self, ips: Iterable[str]) -> Dict[str, PortProbeResult]:
+        """동기 코드(스레드)용 — 새 이벤트 루프에서 probe_many 실행"""
+        self._sem = None
+        return asyncio.run(self.probe_many(list(ips)))
@@ -0,0 +1,169 @@
+"""
+역방향 DNS(PTR) 조회기.
+
+- 제한된 스레드 풀에서 동시에 조회하고, 조회마다 짧은 타임아웃을 둔다.
+  타임아웃된 조회도 백그라운드에서 끝나면 캐시에 기록돼 다음 스캔에 쓰인다.
+- TTL + LRU 캐시가 성공(호스트명)과 실패(PTR 없음)를 모두 기억한다.
+- 같은 IP 의 동시 조회는 하나의 in-flight 조회로 합친다.
+- in-flight 조회 수는 max_inflight 로 제한한다. 넘치는 조회는 풀에 쌓지 않고
+  바로 타임아웃으로 처리한다 (응답 없는 DNS 서버 때문에 대기열이 끝없이 늘지 않도록).
+"""
+import asyncio
+import concurrent.futures
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+
+def _lookup(ip: str) -> Optional[str]:
+    """PTR 레코드의 첫 라벨. 없으면 None."""
+    try:
+        name = socket.gethostbyaddr(ip)[0]
+    except (socket.herror, socket.gaierror, OSError):
+        return None
+    return name.split('.')[0] or None
+
+
+class ReverseResolver:
+    def __init__(
+        self,
+        max_workers: int = 64,
+        timeout: float = 1.0,
+        ttl: float = 3600.0,
+        negative_ttl: float = 300.0,
+        maxsize: int = 8192,
+        max_inflight: Optional[int] = None,
+    ):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._max_workers = max_workers
+        self.max_inflight = max_inflight or max_workers * 4
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rdns")
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, tuple[Optional[str], float]]" = OrderedDict()  # ip → (name, 만료 시각)
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.timeouts = 0
+
+    def _get_cached(self, ip: str):
+        """(hit 여부, 이름). 호출자가 lock 을 잡고 있어야 한다."""
+        entry = self._cache.get(ip)
+        if entry is None:
+            return False, None
+        name, expires = entry
+        if expires < time.monotonic():
+            del self._cache[ip]
+            return False, None
+        self._cache.move_to_end(ip)
+        return True, name
+
+    def _store(self, ip: str, name: Optional[str]) -> None:
+        ttl = self.ttl if name else self.negative_ttl
+        with self._lock:
+            self._cache[ip] = (name, time.monotonic() + ttl)
+            self._cache.move_to_end(ip)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+            self._inflight.pop(ip, None)
+
+    def _run(self, ip: str) -> Optional[str]:
+        name = _lookup(ip)
+        self._store(ip, name)
+        return name
+
+    def _submit(self, ip: str):
+        """캐시 hit 이면 (True, 이름), 아니면 (False, Future). in-flight 가 가득 차면 (False, None)."""
+        with self._lock:
+            hit, name = self._get_cached(ip)
+            if hit:
+                self.hits += 1
+                return True, name
+            self.misses += 1
+            fut = self._inflight.get(ip)
+            if fut is None:
+                if len(self._inflight) >= self.max_inflight:
+                    return False, None
+                fut = self._pool.submit(self._run, ip)
+                self._inflight[ip] = fut
+            return False, fut
+
+    def _timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def resolve(self, ip: str) -> str:
+        """호스트명, 없거나 타임아웃이면 IP 그대로 반환."""
+        return self.resolve_many([ip])[ip]
+
+    def resolve_many(self, ips: Iterable[str]) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        ips = list(ips)
+        # max_inflight 씩 나눠 제출한다 — 정상 DNS 면 앞 묶음이 끝나 자리가 비고,
+        # 응답 없는 DNS 면 남은 조회가 자리를 얻지 못해 바로 타임아웃 처리된다
+        for start in range(0, len(ips), self.max_inflight):
+            out.update(self._resolve_window(ips[start:start + self.max_inflight]))
+        return out
+
+    def _resolve_window(self, ips: List[str]) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        pending: Dict[str, concurrent.futures.Future] = {}
+        for ip in ips:
+            hit, value = self._submit(ip)
+            if hit:
+                out[ip] = value or ip
+            elif value is None:
+                self._timed_out()
+                out[ip] = ip
+            else:
+                pending[ip] = value
+        # 풀 크기를 넘는 요청은 대기열에서 기다리므로 배치 수만큼 기한을 늘린다
+        batches = -(-len(pending) // self._max_workers) if pending else 0
+        deadline = time.monotonic() + self.timeout * batches
+        for ip, fut in pending.items():
+            try:
+                name = fut.result(timeout=max(deadline - time.monotonic(), 0))
+            except concurrent.futures.TimeoutError:
+                self._timed_out()
+                name = None
+            out[ip] = name or ip
+        return out
+
+    async def aresolve(self, ip: str) -> str:
+        hit, value = self._submit(ip)
+        if hit:
+            return value or ip
+        if value is None:
+            self._timed_out()
+            return ip
+        try:
+            name = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(value)), self.timeout)
+        except asyncio.TimeoutError:
+            self._timed_out()
+            name = None
+        return name or ip
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._cache)
+            inflight = len(self._inflight)
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "timeouts": self.timeouts,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "size": size,
+            "inflight": inflight,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+resolver = ReverseResolver()
@@ -0,0 +1,235 @@
+"""
+토폴로지 리비전 카운터 + 변경 로그 (DB 에 저장).
+
+networks / devices / security_solutions / device_solutions / device_vulnerabilities
+중 하나라도 바뀐 트랜잭션은 커밋 직전(before_commit)에, 같은 트랜잭션 안에서
+topology_revision.value 를 1 올리고 그 트랜잭션이 건드린 네트워크·장비·솔루션 id 를
+topology_changes 에 남긴다. ORM 세션 이벤트로 감지하므로 라우터·백그라운드 작업
+어디서 쓰든 따로 호출할 필요가 없다. 로컬 인터페이스 목록이 바뀌어도(네트워크 상태·
+내 PC 판별이 달라짐) 리비전이 오른다.
+
+리비전 행 UPDATE 가 커밋까지 행(SQLite 는 DB) 쓰기 잠금을 잡으므로 리비전 순서는 커밋
+순서와 같고, 다른 프로세스(여러 uvicorn 워커, 작업 워커)의 쓰기도 모두 같은 값에 반영된다.
+토폴로지 스냅샷 캐시·ETag 의 키, /api/topology/changes 의 since 로 쓴다. epoch 는 DB 를
+새로 만들면 바뀐다.
+
+add_listener 는 이 프로세스의 커밋만 즉시 알린다. 다른 프로세스의 커밋은 current() 를
+주기적으로 읽어 알아낸다 (routers/topology 의 stream 참고).
+"""
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, insert, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .interfaces import interface_cache
+from .models import (
+    Device, DeviceSolution, DeviceVulnerability, Network, SecuritySolution, TopologyChange, TopologyRevision,
+)
+
+_TRACKED = (Network, Device, SecuritySolution, DeviceSolution, DeviceVulnerability)
+_PENDING_KEY = "topology_changes"
+_REVISION_KEY = "topology_revision"
+_REV = TopologyRevision.__table__
+_LOG = TopologyChange.__table__
+
+
+def new_epoch() -> str:
+    return format(int(time.time()), "x")
+
+
+@dataclass
+class Change:
+    """한 트랜잭션(또는 인터페이스 변경)이 건드린 엔티티"""
+    networks: Set[int] = field(default_factory=set)
+    devices: Set[int] = field(default_factory=set)
+    solutions: Set[int] = field(default_factory=set)
+    full: bool = False          # 범위를 알 수 없는 변경 (bulk UPDATE/DELETE) — 전체 재조회
+    interfaces: bool = False    # 모든 네트워크 노드 + 내 PC 재계산
+
+    def merge(self, other: "Change") -> None:
+        self.networks |= other.networks
+        self.devices |= other.devices
+        self.solutions |= other.solutions
+        self.full = self.full or other.full
+        self.interfaces = self.interfaces or other.interfaces
+
+
+def _ids(values: Set[Optional[int]]) -> str:
+    return json.dumps(sorted(v for v in values if v is not None))
+
+
+class RevisionCounter:
+    def __init__(self, log_size: int = 2000):
+        self.log_size = log_size              # 이보다 오래된 변경 로그는 지운다 (since 가 더 오래되면 reset)
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[int], None]] = []
+
+    # ── 쓰기 (커밋하는 트랜잭션 안에서) ─────────────────────────────────────
+
+    def bump(self, conn: Connection, change: Change) -> int:
+        """리비전 +1 과 변경 로그 기록. 커밋 전 같은 트랜잭션의 connection 으로 호출."""
+        if conn.execute(update(_REV).where(_REV.c.id == 1).values(value=_REV.c.value + 1)).rowcount == 0:
+            # 마이그레이션을 거치지 않고 create_all 만 한 DB
+            conn.execute(insert(_REV).values(id=1, value=1, epoch=new_epoch()))
+        value = conn.execute(select(_REV.c.value).where(_REV.c.id == 1)).scalar_one()
+        conn.execute(insert(_LOG).values(
+            revision=value,
+            networks=_ids(change.networks),
+            devices=_ids(change.devices),
+            solutions=_ids(change.solutions),
+            full=change.full,
+            interfaces=change.interfaces,
+        ))
+        if value % 100 == 0:
+            conn.execute(delete(_LOG).where(_LOG.c.revision <= value - self.log_size))
+        return value
+
+    def record(self, change: Change) -> None:
+        """세션 밖의 변경(인터페이스 목록 등)을 별도 트랜잭션으로 기록"""
+        db = SessionLocal()
+        try:
+            _pending(db).merge(change)
+            db.commit()
+        finally:
+            db.close()
+
+    # ── 읽기 ─────────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def current(db: Session) -> Tuple[int, str]:
+        """(현재 리비전, epoch). 아직 한 번도 기록되지 않았으면 (0, "0")."""
+        row = db.execute(select(_REV.c.value, _REV.c.epoch).where(_REV.c.id == 1)).first()
+        return (row.value, row.epoch) if row else (0, "0")
+
+    def since(self, db: Session, revision: int, current: int) -> Optional[Change]:
+        """
+        revision 이후 current 까지의 변경을 합친 것.
+        로그가 이미 지워졌거나 모르는 리비전이면 None (전체 재조회 필요).
+        """
+        if revision > current or revision < 0:
+            return None
+        merged = Change()
+        if revision == current:
+            return merged
+        rows = db.execute(
+            select(_LOG).where(_LOG.c.revision > revision, _LOG.c.revision <= current)
+        ).all()
+        if len(rows) != current - revision:
+            return None
+        for row in rows:
+            merged.merge(Change(
+                networks=set(json.loads(row.networks)),
+                devices=set(json.loads(row.devices)),
+                solutions=set(json.loads(row.solutions)),
+                full=row.full,
+                interfaces=row.interfaces,
+            ))
+        return merged
+
+    # ── 이 프로세스 안의 알림 ────────────────────────────────────────────────
+
+    def notify(self, value: int) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for fn in listeners:
+            try:
+                fn(value)
+            except Exception:
+                pass  # 커밋은 이미 끝났다 — listener 오류가 호출자에게 번지지 않게
+
+    def add_listener(self, fn: Callable[[int], None]) -> None:
+        """이 프로세스의 커밋 후 호출 — fn(새 리비전). 커밋한 스레드에서 호출되므로 가볍게 유지할 것."""
+        with self._lock:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn: Callable[[int], None]) -> None:
+        with self._lock:
+            if fn in self._listeners:
+                self._listeners.remove(fn)
+
+
+revision = RevisionCounter()
+
+
+def _interfaces_changed(_version: int) -> None:
+    try:
+        revision.record(Change(interfaces=True))
+    except Exception:
+        pass  # DB 준비 전(시작 중) 등 — 토폴로지는 인터페이스 목록 버전으로도 다시 만든다
+
+
+interface_cache.add_listener(_interfaces_changed)
+
+
+def _pending(session: Session) -> Change:
+    change = session.info.get(_PENDING_KEY)
+    if change is None:
+        change = session.info[_PENDING_KEY] = Change()
+    return change
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, _flush_context) -> None:
+    # after_flush 시점에는 new/dirty/deleted 와 속성 이력이 아직 flush 이전 상태
+    change = None
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, _TRACKED):
+            continue
+        change = change or _pending(session)
+        if isinstance(obj, Network):
+            change.networks.add(obj.id)
+        elif isinstance(obj, Device):
+            change.devices.add(obj.id)
+            # 장비 수로 Bluetooth 네트워크 상태가 정해지므로 소속 네트워크도 (이동 전 포함)
+            change.networks.add(obj.network_id)
+            change.networks.update(inspect(obj).attrs.network_id.history.deleted or ())
+        elif isinstance(obj, SecuritySolution):
+            change.solutions.add(obj.id)
+        else:
+            change.devices.add(obj.device_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state) -> None:
+    # query(...).update() / delete() / execute(insert(...), rows) 는 flush 를 거치지 않는다
+    if not (state.is_update or state.is_delete or state.is_insert) or state.bind_mapper is None \
+            or not issubclass(state.bind_mapper.class_, _TRACKED):
+        return
+    change = _pending(state.session)
+    rows = state.parameters
+    rows = [rows] if isinstance(rows, dict) else rows
+    if state.is_insert and issubclass(state.bind_mapper.class_, (DeviceSolution, DeviceVulnerability)) \
+            and rows and all("device_id" in row for row in rows):
+        # 장비별 취약점·솔루션 일괄 추가 — 해당 장비만 변경으로 기록
+        change.devices.update(row["device_id"] for row in rows)
+    else:
+        change.full = True
+
+
+@event.listens_for(Session, "before_commit")
+def _bump(session: Session) -> None:
+    # 커밋 때의 마지막 flush 는 before_commit 뒤에 일어나므로 먼저 flush 해 변경을 모두 모은다
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    change = session.info.pop(_PENDING_KEY, None)
+    if change is not None:
+        session.info[_REVISION_KEY] = revision.bump(session.connection(), change)
+
+
+@event.listens_for(Session, "after_commit")
+def _commit(session: Session) -> None:
+    value = session.info.pop(_REVISION_KEY, None)
+    if value is not None:
+        revision.notify(value)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_REVISION_KEY, None)
@@ -0,0 +1,398 @@
+"""
+라우터 어댑터 + 여러 라우터 동시 조회(poller).
+
+어댑터는 라우터 하나의 클라이언트 목록을 [{ip_address, mac_address, hostname}] 으로 돌려준다
+(mac_address 는 대문자 콜론 표기, 모르면 None).
+- dhcp_leases: DHCP 임대 파일 — ROUTER_LEASE_FILES 에 등록한 로컬 경로, file:// 또는 http(s):// URL 만
+               (dnsmasq/OpenWrt, ISC dhcpd.leases, ip neigh, arp -an, /proc/net/arp 형식 자동 인식)
+- snmp:        net-snmp snmpwalk 로 ipNetToMediaPhysAddress (ARP 테이블) 조회 — 비밀번호 = community
+- ssh:         ssh 로 명령을 실행해 그 출력을 dhcp_leases 와 같은 방식으로 해석 (키 인증만).
+               원격 명령·키 파일은 서버 설정(ROUTER_SSH_COMMAND, ROUTER_SSH_KEY_FILE)으로만 정한다
+- tplink:      routers/router_import 에서 등록 (직접 API → 브라우저 폴백)
+- FakeAdapter: 고정 목록 (테스트·벤치마크용, 등록하지 않음 — 클래스를 직접 만든다)
+
+url·options 는 API 요청에서 오므로 make_adapter() 는 종류별 request_options 에 있는 옵션만 받고,
+외부 명령에 넘기는 호스트는 '-' 로 시작할 수 없게 검사한 뒤 '--' 뒤에 둔다.
+snmp·ssh 는 명령 실행 함수(runner)를 받으므로 실제 장비 없이 출력 문자열로 확인할 수 있다.
+새 종류는 register_adapter() 로 등록한다.
+
+RouterPoller 는 어댑터 여러 개를 asyncio 세마포어로 동시 개수를 제한해 조회한다. 어댑터 호출은
+대부분 블로킹 I/O 이므로 기본 executor 가 아닌 전용 스레드 풀에서 실행한다. 한 라우터의 실패나
+시간 초과는 그 라우터의 error 로만 남고 나머지 조회는 계속된다.
+"""
+import asyncio
+import os
+import re
+import subprocess
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+_IPV4 = r"\d{1,3}(?:\.\d{1,3}){3}"
+_MAC = r"[0-9A-Fa-f]{1,2}(?:[:-][0-9A-Fa-f]{1,2}){5}"
+_IPV4_RE = re.compile(rf"(?<![\d.]){_IPV4}(?![\d.])")
+_MAC_RE = re.compile(rf"(?<![0-9A-Fa-f:-]){_MAC}(?![0-9A-Fa-f:-])")
+_LEASE_RE = re.compile(rf"lease\s+({_IPV4})\s*\{{(.*?)\}}", re.S)
+_INCOMPLETE = ("FAILED", "INCOMPLETE", "(incomplete)")
+
+# IP-MIB::ipNetToMediaPhysAddress — 인덱스 끝 4자리가 IP
+ARP_OID = "1.3.6.1.2.1.4.22.1.2"
+_SNMP_ROW_RE = re.compile(rf"^\.?{re.escape(ARP_OID)}\.\d+\.({_IPV4})\s+(?:=\s*)?(?:[\w-]+:\s*)?(.*)$")
+
+# 외부 명령 인자로 넘기는 호스트·사용자 이름 (옵션으로 해석될 수 있는 '-' 시작 금지)
+_HOST_RE = re.compile(r"^[A-Za-z0-9_.:\[\]%][A-Za-z0-9_.:\[\]%-]*$")
+_USER_RE = re.compile(r"^[A-Za-z0-9_.][A-Za-z0-9_.-]*$")
+
+# 서버 설정 — 요청으로 바꿀 수 없는 값
+LEASE_FILES = [p.strip() for p in os.environ.get("ROUTER_LEASE_FILES", "").split(",") if p.strip()]  # 쉼표로 구분
+SSH_COMMAND = os.environ.get(
+    "ROUTER_SSH_COMMAND",
+    "cat /tmp/dhcp.leases /var/lib/misc/dnsmasq.leases 2>/dev/null; ip neigh show 2>/dev/null || cat /proc/net/arp",
+)
+SSH_KEY_FILE = os.environ.get("ROUTER_SSH_KEY_FILE") or None
+
+
+class RouterAdapterError(Exception):
+    pass
+
+
+def _mac(text: Optional[str]) -> Optional[str]:
+    """aa-bb-c-dd… → AA:BB:0C:DD:… (00:00:00:00:00:00 은 None)"""
+    if not text:
+        return None
+    parts = re.split(r"[:-]", text.strip())
+    if len(parts) != 6:
+        return None
+    mac = ":".join(p.zfill(2) for p in parts).upper()
+    return None if mac == "00:00:00:00:00:00" else mac
+
+
+def _client(ip: str, mac: Optional[str], hostname: Optional[str] = None) -> dict:
+    return {"ip_address": ip, "mac_address": _mac(mac), "hostname": hostname or None}
+
+
+def _merge(clients: List[dict]) -> List[dict]:
+    """IP 기준으로 합침 — 먼저 나온 값을 두고 빈 MAC·이름만 뒤 항목으로 채운다"""
+    by_ip: Dict[str, dict] = {}
+    for c in clients:
+        prev = by_ip.get(c["ip_address"])
+        if prev is None:
+            by_ip[c["ip_address"]] = c
+        else:
+            prev["mac_address"] = prev["mac_address"] or c["mac_address"]
+            prev["hostname"] = prev["hostname"] or c["hostname"]
+    return list(by_ip.values())
+
+
+def _parse_isc_leases(text: str) -> List[dict]:
+    """ISC dhcpd.leases — 같은 IP 는 파일 뒤쪽 블록이 최신. binding state 가 active 가 아니면 제외."""
+    latest: Dict[str, Optional[dict]] = {}
+    for ip, body in _LEASE_RE.findall(text):
+        state = re.search(r"binding\s+state\s+(\w+)", body)
+        if state and state.group(1) != "active":
+            latest[ip] = None
+            continue
+        mac = re.search(rf"hardware\s+ethernet\s+({_MAC})", body)
+        name = re.search(r'client-hostname\s+"([^"]*)"', body)
+        latest[ip] = _client(ip, mac.group(1) if mac else None, name.group(1) if name else None)
+    return [c for c in latest.values() if c is not None]
+
+
+def parse_client_table(text: str) -> List[dict]:
+    """
+    DHCP 임대·ARP/이웃 테이블 텍스트에서 클라이언트 목록. 여러 형식이 섞여 있어도 된다
+    (예: dhcp.leases 뒤에 ip neigh 출력 — 같은 IP 는 합쳐서 이름과 MAC 을 함께 얻는다).
+    """
+    if _LEASE_RE.search(text):
+        return _merge(_parse_isc_leases(text))
+
+    clients = []
+    for line in text.splitlines():
+        parts = line.split()
+        if not parts or any(flag in parts for flag in _INCOMPLETE):
+            continue
+        # dnsmasq: <만료시각> <MAC> <IP> <호스트명|*> <client-id>
+        if len(parts) >= 4 and parts[0].isdigit() and _MAC_RE.fullmatch(parts[1]) and _IPV4_RE.fullmatch(parts[2]):
+            clients.append(_client(parts[2], parts[1], None if parts[3] == "*" else parts[3]))
+            continue
+        # ip neigh / arp -an / /proc/net/arp — 한 줄에 IP 와 MAC
+        ip = _IPV4_RE.search(line)
+        mac = _MAC_RE.search(line)
+        if ip and mac and _mac(mac.group(0)):
+            clients.append(_client(ip.group(0), mac.group(0)))
+    return _merge(clients)
+
+
+def parse_snmp_arp(text: str) -> List[dict]:
+    """snmpwalk -On 출력 (값 표기는 Hex-STRING·STRING·-Oq 모두 허용)"""
+    clients = []
+    for line in text.splitlines():
+        m = _SNMP_ROW_RE.match(line.strip())
+        if not m:
+            continue
+        octets = re.findall(r"[0-9A-Fa-f]{1,2}", m.group(2))
+        if len(octets) == 6:
+            clients.append(_client(m.group(1), ":".join(octets)))
+    return _merge(clients)
+
+
+def run_command(args: List[str], timeout: float) -> str:
+    """기본 runner — 종료 코드가 0 이 아니면 stderr 를 담아 RouterAdapterError"""
+    try:
+        result = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+    except FileNotFoundError:
+        raise RouterAdapterError(f"{args[0]} 명령을 찾을 수 없습니다")
+    except subprocess.TimeoutExpired:
+        raise RouterAdapterError(f"{args[0]} 이(가) {timeout:g}초 안에 끝나지 않았습니다")
+    if result.returncode != 0:
+        detail = (result.stderr or result.stdout).strip().splitlines()
+        raise RouterAdapterError(f"{args[0]} 실패 (종료 코드 {result.returncode}): {detail[-1] if detail else ''}")
+    return result.stdout
+
+
+# ── 어댑터 ──────────────────────────────────────────────────────────────────
+
+def _check_host(host: str, what: str = "호스트") -> str:
+    if not host or not _HOST_RE.match(host):
+        raise ValueError(f"{what} 형식이 잘못되었습니다: {host!r}")
+    return host
+
+
+class RouterAdapter:
+    kind = ""
+    default_url = ""
+    requires_password = False
+    request_options: tuple = ()       # API 요청의 options 로 받을 수 있는 인자
+
+    def __init__(self, url: Optional[str] = None, password: Optional[str] = None, timeout: float = 30.0):
+        self.url = url or self.default_url
+        self.password = password
+        self.timeout = timeout
+
+    def fetch_clients(self) -> List[dict]:
+        """클라이언트 목록 (블로킹). 실패하면 예외."""
+        raise NotImplementedError
+
+
+class DhcpLeaseFileAdapter(RouterAdapter):
+    """url 은 allowed(기본 ROUTER_LEASE_FILES) 에 있는 경로·URL 중 하나. 생략하면 첫 번째 것."""
+    kind = "dhcp_leases"
+
+    def __init__(self, url: Optional[str] = None, password: Optional[str] = None, timeout: float = 30.0,
+                 allowed: Optional[List[str]] = None):
+        allowed = LEASE_FILES if allowed is None else allowed
+        super().__init__(url or (allowed[0] if allowed else None), password, timeout)
+        if not self.url:
+            raise ValueError("조회할 임대 파일이 없습니다 (ROUTER_LEASE_FILES 설정)")
+        if self._normalize(self.url) not in {self._normalize(a) for a in allowed}:
+            raise ValueError(f"ROUTER_LEASE_FILES 에 등록되지 않은 임대 파일입니다: {self.url}")
+
+    @staticmethod
+    def _normalize(url: str) -> str:
+        scheme = urllib.parse.urlsplit(url).scheme
+        if scheme in ("http", "https"):
+            return url
+        if scheme == "file":
+            url = urllib.request.url2pathname(urllib.parse.urlsplit(url).path)
+        return os.path.realpath(url)
+
+    def _read(self) -> str:
+        scheme = urllib.parse.urlsplit(self.url).scheme
+        if scheme in ("http", "https"):
+            try:
+                with urllib.request.urlopen(self.url, timeout=self.timeout) as resp:
+                    return resp.read().decode("utf-8", "replace")
+            except OSError as e:
+                raise RouterAdapterError(f"임대 파일 조회 실패: {e}")
+        try:
+            with open(self._normalize(self.url), encoding="utf-8", errors="replace") as f:
+                return f.read()
+        except OSError as e:
+            raise RouterAdapterError(f"임대 파일을 읽을 수 없습니다: {e}")
+
+    def fetch_clients(self) -> List[dict]:
+        return parse_client_table(self._read())
+
+
+class SnmpAdapter(RouterAdapter):
+    """url: host, host:port 또는 snmp://host:port. 비밀번호(community) 기본 public."""
+    kind = "snmp"
+    request_options = ("version",)
+
+    def __init__(self, url: Optional[str] = None, password: Optional[str] = None, timeout: float = 30.0,
+                 version: str = "2c", runner: Callable[[List[str], float], str] = run_command):
+        super().__init__(url, password, timeout)
+        if version not in ("1", "2c"):
+            raise ValueError("SNMP version 은 1 또는 2c 여야 합니다")
+        self.version = version
+        self.target = _check_host(self.url.split("://", 1)[-1].rstrip("/"), "SNMP 주소")
+        self.runner = runner
+
+    def command(self) -> List[str]:
+        return [
+            "snmpwalk", f"-v{self.version}", "-c", self.password or "public",
+            "-On", "-Ox", "-t", str(max(1, int(self.timeout // 3))), "-r", "1",
+            "--", self.target, ARP_OID,
+        ]
+
+    def fetch_clients(self) -> List[dict]:
+        return parse_snmp_arp(self.runner(self.command(), self.timeout))
+
+
+class SshAdapter(RouterAdapter):
+    """
+    url: [ssh://]user@host[:port]. BatchMode 로 키 인증만 쓴다 (비밀번호 입력 프롬프트 없음).
+    command·key_file 은 서버 설정이 기본값이며 API 요청으로는 바꿀 수 없다 (request_options 없음).
+    기본 명령은 OpenWrt/dnsmasq 임대 파일과 이웃 테이블을 함께 출력한다.
+    """
+    kind = "ssh"
+
+    def __init__(self, url: Optional[str] = None, password: Optional[str] = None, timeout: float = 30.0,
+                 command: Optional[str] = None, key_file: Optional[str] = None,
+                 runner: Callable[[List[str], float], str] = run_command):
+        super().__init__(url, password, timeout)
+        try:
+            parsed = urllib.parse.urlsplit(self.url if "://" in self.url else f"ssh://{self.url}")
+            port = parsed.port
+        except ValueError:
+            raise ValueError(f"SSH 주소 형식이 잘못되었습니다: {self.url}")
+        self.host = _check_host(parsed.hostname or "", "SSH 주소")
+        if parsed.username is not None and not _USER_RE.match(parsed.username):
+            raise ValueError(f"SSH 사용자 이름 형식이 잘못되었습니다: {parsed.username!r}")
+        self.port = port or 22
+        self.username = parsed.username
+        self.remote_command = command or SSH_COMMAND
+        self.key_file = key_file or SSH_KEY_FILE
+        self.runner = runner
+
+    def command(self) -> List[str]:
+        args = [
+            "ssh", "-o", "BatchMode=yes", "-o", f"ConnectTimeout={max(1, int(self.timeout // 3))}",
+            "-o", "StrictHostKeyChecking=accept-new", "-p", str(self.port),
+        ]
+        if self.key_file:
+            args += ["-i", self.key_file]
+        target = f"{self.username}@{self.host}" if self.username else self.host
+        return args + ["--", target, self.remote_command]
+
+    def fetch_clients(self) -> List[dict]:
+        return parse_client_table(self.runner(self.command(), self.timeout))
+
+
+class FakeAdapter(RouterAdapter):
+    """테스트·벤치마크용 — _ADAPTERS 에 등록하지 않으므로 API 로는 만들 수 없다"""
+    kind = "fake"
+
+    def __init__(self, url: Optional[str] = None, password: Optional[str] = None, timeout: float = 30.0,
+                 clients: Optional[list] = None, delay: float = 0.0, error: Optional[str] = None):
+        super().__init__(url or "fake", password, timeout)
+        self.clients = list(clients or [])
+        self.delay = delay
+        self.error = error
+
+    def fetch_clients(self) -> List[dict]:
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise RouterAdapterError(self.error)
+        return [_client(c["ip_address"], c.get("mac_address"), c.get("hostname")) for c in self.clients]
+
+
+_ADAPTERS: Dict[str, type] = {
+    cls.kind: cls for cls in (DhcpLeaseFileAdapter, SnmpAdapter, SshAdapter)
+}
+
+
+def register_adapter(kind: str, cls: type) -> None:
+    _ADAPTERS[kind] = cls
+
+
+def adapter_kinds() -> List[str]:
+    return sorted(_ADAPTERS)
+
+
+def make_adapter(kind: str, url: Optional[str] = None, password: Optional[str] = None, **options) -> RouterAdapter:
+    """
+    API 요청으로 어댑터 인스턴스 생성. 알 수 없는 종류, request_options 에 없는 옵션,
+    빠진 비밀번호, 허용되지 않는 주소는 ValueError.
+    """
+    cls = _ADAPTERS.get(kind)
+    if cls is None:
+        raise ValueError(f"알 수 없는 라우터 종류: {kind} (지원: {', '.join(adapter_kinds())})")
+    if cls.requires_password and not password:
+        raise ValueError(f"{kind} 라우터에는 비밀번호가 필요합니다")
+    rejected = sorted(set(options) - set(cls.request_options))
+    if rejected:
+        raise ValueError(f"{kind} 라우터에서 지정할 수 없는 옵션: {', '.join(rejected)}")
+    try:
+        return cls(url, password, **options)
+    except TypeError as e:
+        raise ValueError(f"{kind} 라우터 옵션 오류: {e}")
+
+
+# ── 동시 조회 ───────────────────────────────────────────────────────────────
+
+class RouterPoller:
+    def __init__(self, concurrency: int = 8, timeout: float = 120.0):
+        self.concurrency = concurrency        # 동시에 조회하는 최대 라우터 수 (= 전용 스레드 수)
+        self.timeout = timeout                # 라우터 하나당 최대 대기 (초)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="router-poll")
+
+    async def fetch(self, adapter: RouterAdapter) -> List[dict]:
+        """어댑터 하나 조회. 시간 초과 시 결과를 기다리지 않을 뿐 스레드의 호출은 끝까지 실행된다."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(loop.run_in_executor(self._executor, adapter.fetch_clients), self.timeout)
+        except asyncio.TimeoutError:
+            raise RouterAdapterError(f"{self.timeout:g}초 안에 응답이 없습니다")
+
+    async def poll(
+        self,
+        adapters: List[RouterAdapter],
+        progress: Optional[Callable[[int, dict], None]] = None,
+        concurrency: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        모든 어댑터 조회. 결과는 adapters 순서대로 {kind, url, clients, error, elapsed_ms}.
+        progress(끝난 수, 결과) 는 라우터 하나가 끝날 때마다 호출되며, 여기서 난 예외는 조회 전체를 멈춘다
+        (작업 취소 확인용).
+        """
+        limit = asyncio.Semaphore(max(1, min(concurrency or self.concurrency, self.concurrency)))
+
+        async def one(i: int, adapter: RouterAdapter):
+            async with limit:
+                t0 = time.perf_counter()
+                clients, error = [], None
+                try:
+                    clients = await self.fetch(adapter)
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                return i, {
+                    "kind": adapter.kind, "url": adapter.url, "clients": clients, "error": error,
+                    "elapsed_ms": round((time.perf_counter() - t0) * 1000, 1),
+                }
+
+        results: List[Optional[dict]] = [None] * len(adapters)
+        tasks = [asyncio.ensure_future(one(i, a)) for i, a in enumerate(adapters)]
+        try:
+            for done, next_result in enumerate(asyncio.as_completed(tasks), 1):
+                i, result = await next_result
+                results[i] = result
+                if progress:
+                    progress(done, result)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return results
+
+    def poll_sync(self, adapters: List[RouterAdapter], progress=None, concurrency: Optional[int] = None) -> List[dict]:
+        """작업 워커 스레드 등 이벤트 루프 밖에서 호출"""
+        return asyncio.run(self.poll(adapters, progress, concurrency))
+
+
+router_poller = RouterPoller(
+    concurrency=int(os.environ.get("ROUTER_POLL_CONCURRENCY", "8")),
+    timeout=float(os.environ.get("ROUTER_POLL_TIMEOUT", "120")),
+)
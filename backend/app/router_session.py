@@ -0,0 +1,257 @@
+"""
+라우터 관리 페이지용 헤드리스 브라우저 세션 풀.
+
+- Chromium 프로세스 하나를 전용 스레드의 asyncio 루프에서 띄워 두고 계속 재사용한다
+  (Playwright 객체는 만든 루프 밖에서 쓸 수 없으므로 모든 조작을 그 루프로 보낸다).
+- (라우터 URL, 비밀번호) 마다 로그인한 context·page 와 세션 토큰(TP-Link stok)을 보관하고,
+  유휴 session_ttl 초가 지나거나 라우터가 세션 만료를 알리기 전까지 다시 로그인하지 않는다.
+- 동시에 쓰는 세션 수는 max_sessions 로 제한한다. 같은 라우터 요청은 한 세션을 차례로 쓴다.
+- 아무 세션도 없이 idle_timeout 초가 지나면 브라우저를 닫는다. 다음 요청 때 다시 띄운다.
+
+라우터 종류별 동작(로그인, 데이터 수집)은 login / collect 코루틴으로 받는다.
+  login(session, password) -> None      토큰은 session.wait_token() 으로 기다린다
+  collect(session) -> 결과              세션이 만료됐으면 SessionExpired
+"""
+import asyncio
+import atexit
+import hashlib
+import re
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SessionExpired(Exception):
+    """collect 중 라우터가 로그인 페이지로 돌려보내거나 토큰 만료를 알림 — 다시 로그인 후 재시도"""
+
+
+class RouterSession:
+    def __init__(self, key: Tuple[str, str], base_url: str, context, page, token_re: re.Pattern):
+        self.key = key
+        self.base_url = base_url
+        self.context = context
+        self.page = page
+        self.token: Optional[str] = None
+        self.logged_in_at = 0.0
+        self.last_used = time.monotonic()
+        self.users = 0                  # 이 세션을 기다리거나 쓰는 요청 수 (0 일 때만 정리 가능)
+        self.lock = asyncio.Lock()
+        self._token_re = token_re
+        self._token_seen = asyncio.Event()
+        # 요청 URL 에서 토큰을 잡는다 (route 가로채기와 달리 응답을 다시 보내지 않아도 됨)
+        context.on("request", self._on_request)
+
+    def _on_request(self, request) -> None:
+        m = self._token_re.search(request.url)
+        if m:
+            self.token = m.group(1)
+            self._token_seen.set()
+
+    def reset_token(self) -> None:
+        self.token = None
+        self._token_seen.clear()
+
+    async def wait_token(self, timeout: float) -> str:
+        """로그인 후 첫 토큰이 붙은 요청이 나갈 때까지 대기 (고정 sleep 대신)"""
+        try:
+            await asyncio.wait_for(self._token_seen.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if not self.token:
+            m = self._token_re.search(self.page.url)
+            if m:
+                self.token = m.group(1)
+        if not self.token:
+            raise Exception(f"세션 토큰 없음. URL={self.page.url}")
+        return self.token
+
+    async def close(self) -> None:
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+class RouterSessionPool:
+    def __init__(
+        self,
+        login: Callable[[RouterSession, str], Awaitable[None]],
+        collect: Callable[[RouterSession], Awaitable],
+        init_script: Optional[str] = None,
+        token_pattern: str = r";stok=([a-zA-Z0-9]{8,})",
+        max_sessions: int = 2,
+        session_ttl: float = 300.0,
+        idle_timeout: float = 600.0,
+        launch: Optional[Callable[[], Awaitable]] = None,
+    ):
+        self._login = login
+        self._collect = collect
+        self._init_script = init_script
+        self._token_re = re.compile(token_pattern)
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.idle_timeout = idle_timeout
+        self._launch = launch or _launch_chromium
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_lock = threading.Lock()
+        self._browser = None
+        self._closer = None             # 브라우저(+Playwright) 종료 코루틴 함수
+        self._browser_lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._sessions: Dict[Tuple[str, str], RouterSession] = {}
+        self._idle_since = time.monotonic()
+        self.stats = {"launches": 0, "logins": 0, "reused": 0}
+
+    # ── 외부(다른 스레드)에서 호출 ─────────────────────────────────────────
+
+    def run(self, base_url: str, password: str, timeout: float = 120.0):
+        """로그인된 세션으로 collect 실행 (블로킹). 워커 스레드·run_in_executor 에서 호출."""
+        future = asyncio.run_coroutine_threadsafe(self._run(base_url.rstrip("/"), password), self._ensure_loop())
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def shutdown(self) -> None:
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(10)
+        except Exception:
+            pass
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._browser_lock = asyncio.Lock()
+                self._slots = asyncio.Semaphore(self.max_sessions)
+                threading.Thread(target=self._serve, args=(loop,), name="router-browser", daemon=True).start()
+                self._loop = loop
+                atexit.register(self.shutdown)
+            return self._loop
+
+    def _serve(self, loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        loop.create_task(self._reaper())
+        loop.run_forever()
+
+    # ── 루프 스레드 ────────────────────────────────────────────────────────
+
+    async def _run(self, base_url: str, password: str):
+        key = (base_url, hashlib.sha256(password.encode()).hexdigest())
+        async with self._slots:
+            session = await self._session(key, base_url)
+            session.users += 1
+            try:
+                async with session.lock:
+                    for attempt in (1, 2):
+                        fresh = False
+                        if not self._valid(session):
+                            await self._relogin(session, password)
+                            fresh = True
+                        else:
+                            self.stats["reused"] += 1
+                        try:
+                            return await self._collect(session)
+                        except SessionExpired:
+                            session.reset_token()
+                            if fresh or attempt == 2:
+                                raise Exception("라우터 로그인 직후 세션이 만료되었습니다")
+            except Exception:
+                # 상태를 알 수 없는 세션은 버린다 (다음 요청이 새로 로그인)
+                if session.users == 1:
+                    await self._drop(session)
+                raise
+            finally:
+                session.users -= 1
+                session.last_used = time.monotonic()
+
+    def _valid(self, session: RouterSession) -> bool:
+        return bool(session.token) and time.monotonic() - session.last_used < self.session_ttl
+
+    async def _relogin(self, session: RouterSession, password: str) -> None:
+        session.reset_token()
+        await self._login(session, password)
+        await session.wait_token(15)
+        session.logged_in_at = time.monotonic()
+        self.stats["logins"] += 1
+
+    async def _session(self, key, base_url: str) -> RouterSession:
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+        browser = await self._ensure_browser()
+        if len(self._sessions) >= self.max_sessions:
+            # 슬롯을 가진 요청 수 ≤ max_sessions 이므로 쓰는 사람이 없는 세션이 하나는 있다
+            idle = [s for s in self._sessions.values() if s.users == 0]
+            if idle:
+                await self._drop(min(idle, key=lambda s: s.last_used))
+        context = await browser.new_context()
+        if self._init_script:
+            await context.add_init_script(self._init_script)
+        page = await context.new_page()
+        session = self._sessions[key] = RouterSession(key, base_url, context, page, self._token_re)
+        return session
+
+    async def _ensure_browser(self):
+        async with self._browser_lock:
+            if self._browser is None or not _is_connected(self._browser):
+                self._sessions.clear()   # 죽은 브라우저의 context 는 쓸 수 없음
+                self._browser, self._closer = await self._launch()
+                self.stats["launches"] += 1
+            return self._browser
+
+    async def _drop(self, session: RouterSession) -> None:
+        if self._sessions.get(session.key) is session:
+            del self._sessions[session.key]
+        await session.close()
+        if not self._sessions:
+            self._idle_since = time.monotonic()
+
+    async def _close_all(self) -> None:
+        for session in list(self._sessions.values()):
+            await self._drop(session)
+        if self._closer is not None:
+            closer, self._browser, self._closer = self._closer, None, None
+            try:
+                await closer()
+            except Exception:
+                pass
+
+    async def _reaper(self) -> None:
+        """오래 안 쓴 세션을 닫고, 세션이 없는 상태가 idle_timeout 을 넘으면 브라우저도 닫는다."""
+        while True:
+            await asyncio.sleep(min(30.0, self.session_ttl, self.idle_timeout))
+            now = time.monotonic()
+            for session in list(self._sessions.values()):
+                if session.users == 0 and now - session.last_used >= self.session_ttl:
+                    await self._drop(session)
+            if self._browser is not None and not self._sessions and now - self._idle_since >= self.idle_timeout:
+                async with self._browser_lock:
+                    if not self._sessions:
+                        await self._close_all()
+
+
+def _is_connected(browser) -> bool:
+    try:
+        return browser.is_connected()
+    except Exception:
+        return False
+
+
+async def _launch_chromium():
+    from playwright.async_api import async_playwright
+
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(headless=True)
+
+    async def close():
+        try:
+            await browser.close()
+        finally:
+            await playwright.stop()
+
+    return browser, close
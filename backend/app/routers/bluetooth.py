@@ -1,15 +1,18 @@
-import json
-import re
-import subprocess
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
+from ..bt_presence import bt_poller
 from ..database import get_db
-from ..models import Device, Network
-from ..oui import lookup as oui_lookup
+from ..device_import import upsert_devices
+from ..identity import DeviceIdentityIndex
+from ..schemas import DeviceBulkItem
+from ..jobs import job_runner
+from ..models import Device
+from ..oui import lookup_many as oui_lookup_many
 
 router = APIRouter(prefix="/api/scan/bluetooth", tags=["bluetooth"])
 
@@ -32,185 +35,94 @@ class BtImportRequest(BaseModel):
     devices: List[BtImportItem]
 
 
-def _extract_mac(instance_id: str) -> str | None:
-    """InstanceId에서 BT MAC 주소 추출. 두 가지 형식 지원:
-    1) BTHENUM\\DEV_AABBCCDDEEFF\\...
-    2) BTHENUM\\{GUID}_VID&...\\7&xxx&0&AABBCCDDEEFF_C00000000
-    """
-    # 패턴 1: DEV_ 접두사 (대소문자 무시)
-    m = re.search(r'DEV_([0-9A-Fa-f]{12})', instance_id, re.IGNORECASE)
-    if m:
-        raw = m.group(1).upper()
-        return ':'.join(raw[i:i+2] for i in range(0, 12, 2))
-    # 패턴 2: GUID 엔트리의 끝부분 &0&MAC_C
-    m = re.search(r'&0&([0-9A-Fa-f]{12})_', instance_id)
-    if m:
-        raw = m.group(1).upper()
-        return ':'.join(raw[i:i+2] for i in range(0, 12, 2))
-    return None
-
-
-def _scan_bluetooth() -> list:
-    """
-    PowerShell Get-PnpDevice로 블루투스 장치 목록 조회.
-    InstanceId에서 MAC 주소를 추출하고, MAC 기준으로 중복 제거.
-    """
-    cmd = [
-        'powershell', '-NoProfile', '-Command',
-        (
-            'Get-PnpDevice -Class Bluetooth -ErrorAction SilentlyContinue | '
-            'Where-Object { $_.InstanceId -match "BTHENUM" } | '
-            'Select-Object FriendlyName, Status, InstanceId, Class | '
-            'ConvertTo-Json -Compress'
-        )
-    ]
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-        if result.returncode != 0 or not result.stdout.strip():
-            return []
-
-        data = json.loads(result.stdout)
-        # PowerShell returns a single object (not array) when there's only 1 result
-        if isinstance(data, dict):
-            data = [data]
-
-        # MAC별 가장 좋은 엔트리를 선택 (프로파일 중복 제거)
-        seen_macs: dict[str, dict] = {}  # mac -> best entry
-        no_mac_entries = []
-
-        for item in data:
-            name = item.get('FriendlyName', '').strip()
-            instance_id = item.get('InstanceId', '')
-            status = item.get('Status', '')
-
-            if not name:
-                continue
-
-            mac = _extract_mac(instance_id)
-
-            # BT 장치 유형 추정 (이름 기반 간이 분류)
-            name_lower = name.lower()
-            if any(kw in name_lower for kw in ('headphone', 'headset', 'earphone', 'buds', 'speaker', 'audio', 'airpods', 'soundbar')):
-                bt_type = 'bt_audio'
-            elif any(kw in name_lower for kw in ('mouse', 'keyboard', 'gamepad', 'controller', 'pen', 'stylus')):
-                bt_type = 'bt_input'
-            else:
-                bt_type = 'bt_other'
-
-            entry = {
-                'name': name,
-                'mac_address': mac,
-                'status': status,
-                'bt_type': bt_type,
-            }
-
-            if mac:
-                prev = seen_macs.get(mac)
-                if prev is None:
-                    seen_macs[mac] = entry
-                else:
-                    # "Avrcp 전송" 등 프로파일 접미사 없는 이름 우선, OK 상태 우선
-                    is_better = (
-                        len(name) < len(prev['name']) or
-                        (status == 'OK' and prev['status'] != 'OK')
-                    )
-                    if is_better:
-                        seen_macs[mac] = entry
-            else:
-                no_mac_entries.append(entry)
-
-        return list(seen_macs.values()) + no_mac_entries
-    except Exception:
-        return []
+class BtPresenceEntry(BaseModel):
+    name: str
+    mac_address: Optional[str] = None
+    status: str
+    bt_type: str
+
+
+class BtPresenceOut(BaseModel):
+    provider: str
+    interval: float
+    updated_at: Optional[datetime] = None   # 마지막 조회 시각 (UTC). 아직 조회 전이면 None
+    devices: List[BtPresenceEntry]
+
+
+class BtPollerConfig(BaseModel):
+    interval: float  # 초. 0 이면 백그라운드 조회 중지
 
 
 @router.get("/", response_model=List[BtScanResult])
-def scan_bluetooth(db: Session = Depends(get_db)):
-    """페어링된 블루투스 장치 목록 스캔"""
-    raw = _scan_bluetooth()
-    # import_bluetooth의 중복 체크와 동일하게 전체 devices MAC 확인
-    all_devices = db.query(Device).filter(Device.mac_address.isnot(None)).all()
-    existing_macs = {d.mac_address.upper() for d in all_devices if d.mac_address}
+def scan_bluetooth(cached: bool = False, db: Session = Depends(get_db)):
+    """
+    페어링된 블루투스 장치 목록 스캔.
+    cached=true 면 백그라운드 poller 의 마지막 결과를 바로 반환 (아직 없으면 조회).
+    """
+    if not cached or bt_poller.updated_at is None:
+        bt_poller.poll(db)
+    raw = bt_poller.entries()
+    # import_bluetooth의 중복 체크와 동일하게 MAC 으로 기존 장비 확인
+    index = DeviceIdentityIndex.load(db, macs=[d.get('mac_address') for d in raw])
+
+    macs = [(d.get('mac_address') or '').upper() for d in raw]
+    vendors = oui_lookup_many(macs)
 
     results = []
-    for dev in raw:
-        mac = (dev.get('mac_address') or '').upper()
+    for dev, mac, vendor in zip(raw, macs, vendors):
         results.append(BtScanResult(
             name=dev['name'],
             mac_address=dev.get('mac_address'),
             status=dev['status'],
-            vendor=oui_lookup(mac) if mac else None,
-            already_registered=mac in existing_macs if mac else False,
+            vendor=vendor if mac else None,
+            already_registered=index.by_mac(mac) is not None if mac else False,
         ))
     return results
 
 
 @router.post("/import")
 def import_bluetooth(payload: BtImportRequest, db: Session = Depends(get_db)):
-    """선택된 블루투스 장치를 DB에 등록"""
-    # 가상 Bluetooth 네트워크 찾기/생성
-    bt_net = db.query(Network).filter(Network.subnet == "bluetooth").first()
-    if not bt_net:
-        bt_net = Network(name="Bluetooth", subnet="bluetooth")
-        db.add(bt_net)
-        db.flush()
-
-    imported = 0
+    """선택된 블루투스 장치를 DB에 등록 (가상 Bluetooth 네트워크, 기존 장비는 이름만 갱신)"""
+    items = []
     for dev in payload.devices:
         mac = (dev.mac_address or '').upper()
-        ip_addr = f"bt:{mac}" if mac else f"bt:{dev.name}"
-
-        # MAC 기반 중복 체크
-        if mac:
-            existing = db.query(Device).filter(
-                Device.mac_address.ilike(mac)
-            ).first()
-            if existing:
-                # 이름/상태 업데이트만
-                existing.hostname = dev.name
-                continue
-
-        db.add(Device(
+        items.append(DeviceBulkItem(
             hostname=dev.name,
-            ip_address=ip_addr,
+            ip_address=f"bt:{mac}" if mac else f"bt:{dev.name}",
             mac_address=mac or None,
             device_type=dev.device_type,
-            vendor=oui_lookup(mac) if mac else None,
-            status='active',
-            network_id=bt_net.id,
+            subnet="bluetooth",
+            network_name="Bluetooth",
+            status=bt_poller.status_of(mac) if bt_poller.updated_at else None,
         ))
-        imported += 1
-
+    # 기존 장비의 IP·네트워크·제조사는 건드리지 않고 이름만 갱신
+    result = upsert_devices(db, items, update_existing=False)
+    for row in result.rows:
+        if row.reason == "already registered":
+            db.get(Device, row.id).hostname = items[row.index].hostname
     db.commit()
-    return {"imported": imported}
+    return {"imported": result.created}
+
+
+job_runner.register("bluetooth_refresh", lambda db, job: {"updated": bt_poller.poll(db)})
+
+
+@router.get("/status", response_model=BtPresenceOut)
+def get_bt_status():
+    """백그라운드 poller 가 캐시한 BT 연결 상태 (provider 를 호출하지 않음)"""
+    return bt_poller.snapshot()
+
+
+@router.put("/poller", response_model=BtPresenceOut)
+def configure_bt_poller(payload: BtPollerConfig):
+    """백그라운드 조회 간격 변경"""
+    if payload.interval < 0:
+        raise HTTPException(status_code=400, detail="interval 은 0 이상이어야 합니다")
+    bt_poller.set_interval(payload.interval)
+    return bt_poller.snapshot()
 
 
 @router.post("/refresh-status")
 def refresh_bt_status(db: Session = Depends(get_db)):
-    """등록된 BT 장비의 연결 상태를 PowerShell에서 실시간 조회하여 DB 갱신."""
-    bt_devices = db.query(Device).filter(Device.ip_address.like('bt:%')).all()
-    if not bt_devices:
-        return {"updated": 0}
-
-    # 현재 BT 연결 상태 조회 (MAC → status 맵)
-    live = _scan_bluetooth()
-    live_status: dict[str, str] = {}  # MAC(upper) → "OK" / "Error" / ...
-    for entry in live:
-        mac = (entry.get('mac_address') or '').upper()
-        if mac:
-            # MAC당 하나의 엔트리만 (dedup된 결과이므로)
-            live_status[mac] = entry['status']
-
-    updated = 0
-    for dev in bt_devices:
-        mac = (dev.mac_address or '').upper()
-        if not mac:
-            continue
-        ps_status = live_status.get(mac)
-        new_status = 'active' if ps_status == 'OK' else 'inactive'
-        if dev.status != new_status:
-            dev.status = new_status
-            updated += 1
-
-    db.commit()
-    return {"updated": updated}
+    """provider 를 즉시 다시 조회해 상태가 바뀐 BT 장비만 DB 갱신."""
+    return {"updated": bt_poller.poll(db), "updated_at": bt_poller.updated_at}
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
-from typing import List
-
-from ..database import get_db
-from ..models import Device, Network, DeviceSolution, SecuritySolution
-from ..schemas import DeviceCreate, DeviceOut, DevicePatch
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from ..database import SessionLocal, get_db
+from ..models import Device, Network, DeviceSolution, DeviceVulnerability, SecuritySolution
+from ..schemas import DeviceBulkRequest, DeviceBulkResult, DeviceCreate, DeviceOut, DevicePatch
+from ..device_import import upsert_devices
+from ..identity import DeviceIdentityIndex, normalize_mac
 from ..oui import lookup as oui_lookup
 
 router = APIRouter(prefix="/api/devices", tags=["devices"])
 
+_MAX_BULK_ROWS = 10000
+_MAX_PAGE = 1000          # limit 상한
+_STREAM_BATCH = 500       # NDJSON 스트리밍 시 한 번에 가져오는 행 수
+_DEVICE_FIELDS = tuple(DeviceOut.model_fields)
+
 
 def _get_device(device_id: int, db: Session) -> Device:
     device = (
@@ -22,13 +32,113 @@ def _get_device(device_id: int, db: Session) -> Device:
     return device
 
 
+def _check_mac_available(db: Session, device: Device, mac: Optional[str]) -> None:
+    """mac_normalized 는 유니크 — 다른 장비가 이미 쓰는 MAC 이면 409"""
+    key = normalize_mac(mac)
+    if not key or key == device.mac_normalized:
+        return
+    other = db.query(Device.id).filter(Device.mac_normalized == key, Device.id != device.id).first()
+    if other:
+        raise HTTPException(status_code=409, detail=f"같은 MAC 주소의 장비가 이미 있습니다 (id={other.id})")
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """"id,hostname,ip_address" → 필드 목록 (id 는 커서용으로 항상 포함). 없으면 전체."""
+    if not fields:
+        return None
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [n for n in names if n not in _DEVICE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 필드: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return names
+
+
+def _device_listing(db: Session, fields: Optional[List[str]], after: Optional[int], filters: dict):
+    """(id 순 쿼리, 행 → dict 변환 함수). device_solutions 를 요청하지 않으면 관계를 읽지 않는다."""
+    if fields is None or "device_solutions" in fields:
+        include = set(fields) if fields else None
+        query = db.query(Device).options(
+            # selectinload 는 yield_per 와 함께 쓸 수 있다 (joinedload 컬렉션은 불가)
+            selectinload(Device.device_solutions).selectinload(DeviceSolution.solution)
+        )
+
+        def to_dict(dev) -> dict:
+            return DeviceOut.model_validate(dev).model_dump(mode="json", include=include)
+    else:
+        query = db.query(*(getattr(Device, name) for name in fields))
+
+        def to_dict(row) -> dict:
+            return dict(zip(fields, row))
+
+    if after is not None:
+        query = query.filter(Device.id > after)
+    for column in ("network_id", "status", "device_type"):
+        if filters[column] is not None:
+            query = query.filter(getattr(Device, column) == filters[column])
+    if filters["vendor"]:
+        # 사용자 입력의 %, _ 는 와일드카드가 아니라 글자 그대로 찾는다
+        vendor = filters["vendor"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(Device.vendor.ilike(f"%{vendor}%", escape="\\"))
+    if filters["severity"]:
+        severities = [v.strip().lower() for v in filters["severity"].split(",") if v.strip()]
+        query = query.filter(Device.device_vulnerabilities.any(
+            DeviceVulnerability.severity.in_(severities) & (DeviceVulnerability.status == "open")
+        ))
+    return query.order_by(Device.id), to_dict
+
+
+def _stream_devices(fields, after, limit, filters):
+    # 요청 세션은 응답 전송 전에 닫히므로 스트림 전용 세션을 쓴다
+    db = SessionLocal()
+    try:
+        query, to_dict = _device_listing(db, fields, after, filters)
+        if limit is not None:
+            query = query.limit(limit)
+        for row in query.yield_per(_STREAM_BATCH):
+            yield json.dumps(to_dict(row), ensure_ascii=False) + "\n"
+    finally:
+        db.close()
+
+
 @router.get("/", response_model=List[DeviceOut])
-def list_devices(db: Session = Depends(get_db)):
-    return (
-        db.query(Device)
-        .options(joinedload(Device.device_solutions).joinedload(DeviceSolution.solution))
-        .all()
-    )
+def list_devices(
+    after: Optional[int] = Query(None, description="커서 — 이 id 다음 장비부터"),
+    limit: Optional[int] = Query(None, ge=1, le=_MAX_PAGE),
+    network_id: Optional[int] = None,
+    status: Optional[str] = None,
+    device_type: Optional[str] = None,
+    vendor: Optional[str] = Query(None, description="부분 일치 (대소문자 무시)"),
+    severity: Optional[str] = Query(None, description="열린 취약점 심각도, 쉼표 구분 (예: critical,high)"),
+    fields: Optional[str] = Query(None, description="반환할 필드, 쉼표 구분 (예: id,hostname,ip_address)"),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    장비 목록 (id 순). limit 을 주면 한 페이지만 반환하고, 다음 페이지가 있으면
+    X-Next-Cursor 헤더에 after 로 넘길 값을 싣는다. format=ndjson 이면 한 줄에
+    장비 하나씩 읽는 대로 스트리밍한다.
+    """
+    field_list = _parse_fields(fields)
+    filters = {
+        "network_id": network_id, "status": status, "device_type": device_type,
+        "vendor": vendor, "severity": severity,
+    }
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream_devices(field_list, after, limit, filters),
+            media_type="application/x-ndjson",
+        )
+
+    query, to_dict = _device_listing(db, field_list, after, filters)
+    if limit is not None:
+        query = query.limit(limit)
+    rows = query.all()
+    headers = {}
+    if limit is not None and len(rows) == limit:
+        headers["X-Next-Cursor"] = str(rows[-1].id)
+    return JSONResponse([to_dict(row) for row in rows], headers=headers)
 
 
 @router.get("/{device_id}", response_model=DeviceOut)
@@ -44,11 +154,7 @@ def create_device(payload: DeviceCreate, db: Session = Depends(get_db)):
 
     # MAC 기반 중복 체크 — 같은 MAC이면 기존 장비의 IP/네트워크를 업데이트
     if payload.mac_address:
-        existing = (
-            db.query(Device)
-            .filter(Device.mac_address.ilike(payload.mac_address))
-            .first()
-        )
+        existing = DeviceIdentityIndex.load(db, macs=[payload.mac_address]).by_mac(payload.mac_address)
         if existing:
             existing.ip_address = payload.ip_address
             existing.hostname = payload.hostname or existing.hostname
@@ -58,7 +164,8 @@ def create_device(payload: DeviceCreate, db: Session = Depends(get_db)):
             return _get_device(existing.id, db)
 
     data = payload.model_dump()
-    data["vendor"] = oui_lookup(data.get("mac_address") or "")
+    # 제조사를 모르면 (MAC 없음·미등록 OUI) 일괄 등록과 같이 None
+    data["vendor"] = oui_lookup(data.get("mac_address") or "") or None
     device = Device(**data)
     db.add(device)
     db.commit()
@@ -66,10 +173,22 @@ def create_device(payload: DeviceCreate, db: Session = Depends(get_db)):
     return _get_device(device.id, db)
 
 
+@router.post("/bulk", response_model=DeviceBulkResult)
+def bulk_upsert_devices(payload: DeviceBulkRequest, db: Session = Depends(get_db)):
+    """여러 장비를 한 번에 등록/갱신 — 한 트랜잭션으로 처리하고 행별 결과를 반환"""
+    if len(payload.devices) > _MAX_BULK_ROWS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {_MAX_BULK_ROWS}개까지 등록할 수 있습니다")
+    result = upsert_devices(db, payload.devices, payload.update_existing)
+    db.commit()
+    return result
+
+
 @router.put("/{device_id}", response_model=DeviceOut)
 def update_device(device_id: int, payload: DeviceCreate, db: Session = Depends(get_db)):
     device = _get_device(device_id, db)
-    for key, value in payload.model_dump().items():
+    _check_mac_available(db, device, payload.mac_address)
+    # open_ports 는 스캔이 채우는 값이므로 요청에 없으면 유지
+    for key, value in payload.model_dump(exclude=set() if "open_ports" in payload.model_fields_set else {"open_ports"}).items():
         setattr(device, key, value)
     db.commit()
     db.refresh(device)
@@ -79,6 +198,7 @@ def update_device(device_id: int, payload: DeviceCreate, db: Session = Depends(g
 @router.patch("/{device_id}", response_model=DeviceOut)
 def patch_device(device_id: int, payload: DevicePatch, db: Session = Depends(get_db)):
     device = _get_device(device_id, db)
+    _check_mac_available(db, device, payload.mac_address)
     for key, value in payload.model_dump(exclude_unset=True).items():
         setattr(device, key, value)
     # MAC이 새로 설정됐거나 기존에 있는데 vendor가 없으면 자동 계산
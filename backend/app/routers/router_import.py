@@ -1,12 +1,25 @@
-import asyncio
+import ipaddress
 import json
+import logging
 import re
 import tempfile
 import pathlib
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
 from typing import List, Optional
 
+from .. import tplink
+from ..database import get_db
+from ..device_import import upsert_devices
+from ..jobs import job_runner
+from ..router_adapters import RouterAdapter, adapter_kinds, make_adapter, register_adapter, router_poller
+from ..router_session import RouterSession, RouterSessionPool, SessionExpired
+from ..schemas import DeviceBulkItem
+from .scan_jobs import ScanJobOut
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/api/router", tags=["router"])
 
 _SS_DIR = pathlib.Path(tempfile.gettempdir()) / 'secvis'
@@ -100,8 +113,28 @@ class RouterClient(BaseModel):
 
 
 class RouterImportRequest(BaseModel):
-    password: str
+    password: Optional[str] = None
     url: str = "http://192.168.0.1"
+    kind: str = "tplink"                                  # router_adapters.adapter_kinds() 중 하나
+    options: dict = Field(default_factory=dict)           # 종류별 추가 인자 (예: snmp 의 version)
+
+
+class RouterTarget(BaseModel):
+    kind: str = "tplink"
+    url: Optional[str] = None
+    password: Optional[str] = None                        # DB 에 저장하지 않음 (메모리에만 보관)
+    name: Optional[str] = None
+    options: dict = Field(default_factory=dict)
+    # 가져온 장비의 네트워크 — network_id 또는 subnet. 둘 다 없으면 클라이언트 IP 의 /24
+    network_id: Optional[int] = None
+    subnet: Optional[str] = None
+    device_type: Optional[str] = None
+
+
+class RouterPollRequest(BaseModel):
+    routers: List[RouterTarget]
+    concurrency: Optional[int] = None                     # 기본: router_poller.concurrency
+    update_existing: bool = True
 
 
 _IP_RE = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
@@ -114,10 +147,10 @@ def _extract_clients(obj, depth=0) -> list:
     if isinstance(obj, list):
         for item in obj:
             if isinstance(item, dict):
-                ip = (item.get('ip_addr') or item.get('ip_address') or
+                ip = (item.get('ip_addr') or item.get('ip_address') or item.get('ipaddr') or
                       item.get('ip') or item.get('ipAddr') or item.get('IP') or
                       item.get('ipAddress') or item.get('address'))
-                mac = (item.get('mac_addr') or item.get('mac_address') or
+                mac = (item.get('mac_addr') or item.get('mac_address') or item.get('macaddr') or
                        item.get('mac') or item.get('macAddr') or item.get('MAC') or
                        item.get('macAddress') or item.get('hwaddr') or item.get('hwAddr'))
                 name = (item.get('client_name') or item.get('hostname') or
@@ -154,21 +187,23 @@ def _try_extract(captured_api: list) -> list:
     return []
 
 
-def _read_dom_table(page) -> list:
-    """현재 페이지의 테이블에서 IP 주소를 포함한 행을 직접 추출"""
-    rows = page.evaluate(r"""() => {
-        const ipRe = /^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$/;
-        const result = [];
-        for (const tr of document.querySelectorAll('tr')) {
-            const cells = Array.from(tr.querySelectorAll('td, th'))
-                .map(td => (td.textContent || '').trim());
-            if (cells.length >= 2 && cells.some(c => ipRe.test(c))) {
-                result.push(cells);
-            }
+# 현재 페이지의 테이블에서 IP 주소를 포함한 행의 셀 텍스트
+_DOM_ROWS_JS = r"""() => {
+    const ipRe = /^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$/;
+    const result = [];
+    for (const tr of document.querySelectorAll('tr')) {
+        const cells = Array.from(tr.querySelectorAll('td, th'))
+            .map(td => (td.textContent || '').trim());
+        if (cells.length >= 2 && cells.some(c => ipRe.test(c))) {
+            result.push(cells);
         }
-        return result;
-    }""")
+    }
+    return result;
+}"""
+
 
+def _read_dom_table(rows: list) -> list:
+    """_DOM_ROWS_JS 가 돌려준 행에서 IP·MAC·이름 추출"""
     clients = []
     for cells in rows:
         ip = next((c for c in cells if _IP_RE.match(c)), None)
@@ -202,182 +237,304 @@ def _dedup(clients: list) -> list:
     return unique
 
 
-def _scrape_tplink(password: str, base_url: str) -> list:
-    from playwright.sync_api import sync_playwright, TimeoutError as PwError
+# 로그인 비밀번호 입력창(보이는 password-hidden input) 위치 — 나타날 때까지 wait_for_function 으로 대기
+_LOGIN_FIELD_JS = """() => {
+    const h = document.getElementById('login-password');
+    if (!h) return null;
+    let el = h.previousElementSibling;
+    while (el) {
+        if (el.tagName === 'INPUT' && el.classList.contains('password-hidden')) {
+            const r = el.getBoundingClientRect();
+            if (r.width > 10) return {x: r.x, y: r.y, w: r.width, h: r.height};
+        }
+        el = el.previousElementSibling;
+    }
+    return null;
+}"""
+
+_CLICK_TEXT_JS = """(keywords) => {
+    const tags = 'button, a, li, td, th, span, div[onclick], div[role], p';
+    for (const el of document.querySelectorAll(tags)) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width <= 0 || rect.height <= 0) continue;
+        const ownText = Array.from(el.childNodes)
+            .filter(n => n.nodeType === 3)
+            .map(n => n.textContent.trim())
+            .join('').toLowerCase();
+        if (!ownText) continue;
+        for (const kw of keywords) {
+            if (ownText.includes(kw)) {
+                try { el.click(); return 'own:' + ownText.slice(0, 40); } catch(e) {}
+            }
+        }
+    }
+    for (const el of document.querySelectorAll(tags)) {
+        const rect = el.getBoundingClientRect();
+        if (rect.width <= 0 || rect.height <= 0) continue;
+        const fullText = (el.textContent || '').trim().toLowerCase();
+        if (!fullText || fullText.length > 40) continue;
+        for (const kw of keywords) {
+            if (fullText.includes(kw)) {
+                try { el.click(); return 'full:' + fullText.slice(0, 40); } catch(e) {}
+            }
+        }
+    }
+    return null;
+}"""
 
-    base_url = base_url.rstrip('/')
-    stok_ref: list = ['']
-    captured_urls: list = []
+# 클릭 후 라우터 API 응답이 복호화되어 캡처될 때까지 (고정 대기 대신)
+_API_CAPTURED_JS = """() => (window.__capturedAPI || []).some(e => e.source === 'aesdecrypt')"""
+# 캡처된 응답이 DOM 테이블로 그려질 때까지 두 프레임
+_NEXT_PAINT_JS = """() => new Promise(r => requestAnimationFrame(() => requestAnimationFrame(r)))"""
+_CAPTURED_JS = "() => window.__capturedAPI || []"
 
-    def handle_route(route):
-        try:
-            response = route.fetch()
-        except Exception:
-            route.abort()
-            return
-        url = route.request.url
-        captured_urls.append(url)
-        if 'cgi-bin' in url:
-            m = re.search(r';stok=([a-zA-Z0-9]{8,})', url)
-            if m:
-                stok_ref[0] = m.group(1)
-        route.fulfill(response=response)
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        context.add_init_script(_INTERCEPT_SCRIPT)
-        page = context.new_page()
-        page.route('**/*', handle_route)
+_CLIENT_TABS = (
+    ('wired', ['유선 클라이언트', 'wired client', 'wired clients']),
+    ('wireless', ['무선 클라이언트', 'wireless client', 'wireless clients']),
+)
+
+
+def _session_expired(page, captured: list) -> bool:
+    """로그인 페이지로 돌아갔거나 라우터 API 가 세션 만료(errorcode timeout)를 돌려줌"""
+    if 'login' in page.url.lower():
+        return True
+    return any(
+        e.get('source') == 'xhr' and '"errorcode"' in (e.get('text') or '') and 'timeout' in e.get('text', '')
+        for e in captured
+    )
 
-        try:
-            page.goto(base_url, timeout=30000, wait_until='domcontentloaded')
-            try:
-                page.wait_for_url('**login**', timeout=15000)
-            except PwError:
-                pass
-            page.wait_for_load_state('domcontentloaded', timeout=10000)
-            page.wait_for_timeout(2000)
-            page.screenshot(path=str(_SS_DIR / '01_login.png'))
-
-            # 로그인
-            rect = page.evaluate("""() => {
-                const h = document.getElementById('login-password');
-                if (!h) return null;
-                let el = h.previousElementSibling;
-                while (el) {
-                    if (el.tagName === 'INPUT' && el.classList.contains('password-hidden')) {
-                        const r = el.getBoundingClientRect();
-                        if (r.width > 10) return {x: r.x, y: r.y, w: r.width, h: r.height};
-                    }
-                    el = el.previousElementSibling;
-                }
-                return null;
-            }""")
-            if not rect:
-                raise Exception(f"로그인 입력창 없음 ({_SS_DIR}/01_login.png)")
 
-            page.mouse.click(rect['x'] + rect['w'] / 2, rect['y'] + rect['h'] / 2)
-            page.wait_for_timeout(200)
-            page.keyboard.type(password, delay=30)
-            page.wait_for_timeout(300)
-            page.locator('#login-btn').click()
+async def _tplink_login(session: RouterSession, password: str) -> None:
+    from playwright.async_api import TimeoutError as PwTimeout
 
+    page = session.page
+    await page.goto(session.base_url, timeout=30000, wait_until='domcontentloaded')
+    try:
+        handle = await page.wait_for_function(_LOGIN_FIELD_JS, timeout=15000)
+    except PwTimeout:
+        await page.screenshot(path=str(_SS_DIR / '01_login.png'))
+        raise Exception(f"로그인 입력창 없음 ({_SS_DIR}/01_login.png)")
+    rect = await handle.json_value()
+    await page.mouse.click(rect['x'] + rect['w'] / 2, rect['y'] + rect['h'] / 2)
+    # 라우터 스크립트가 키 이벤트로 입력을 받으므로 fill 대신 type (글자 사이 지연 없음)
+    await page.keyboard.type(password)
+    await page.locator('#login-btn').click()
+
+
+async def _tplink_collect(session: RouterSession) -> list:
+    from playwright.async_api import TimeoutError as PwTimeout
+
+    page = session.page
+    if _session_expired(page, []):
+        raise SessionExpired()
+
+    all_clients = []
+    nav_result = []
+    counts = {}
+    for label, keywords in _CLIENT_TABS:
+        await page.evaluate("() => { window.__capturedAPI = []; }")
+        r = await page.evaluate(_CLICK_TEXT_JS, [k.lower() for k in keywords])
+        nav_result.append(f'{label}:{r}')
+        if r is not None:
             try:
-                page.wait_for_url(lambda url: 'login' not in url.lower(), timeout=15000)
-            except PwError:
+                await page.wait_for_function(_API_CAPTURED_JS, timeout=10000)
+            except PwTimeout:
                 pass
-            page.wait_for_load_state('domcontentloaded', timeout=10000)
-            page.wait_for_timeout(5000)
-            page.screenshot(path=str(_SS_DIR / '02_dashboard.png'))
-
-            stok = stok_ref[0]
-            if not stok:
-                m = re.search(r';stok=([a-zA-Z0-9]{8,})', page.url)
-                if m:
-                    stok = m.group(1)
-            if not stok:
-                raise Exception(f"stok 없음. URL={page.url}")
-
-            def click_text_btn(keywords, wait_ms=3000):
-                result = page.evaluate("""(keywords) => {
-                    const tags = 'button, a, li, td, th, span, div[onclick], div[role], p';
-                    for (const el of document.querySelectorAll(tags)) {
-                        const rect = el.getBoundingClientRect();
-                        if (rect.width <= 0 || rect.height <= 0) continue;
-                        const ownText = Array.from(el.childNodes)
-                            .filter(n => n.nodeType === 3)
-                            .map(n => n.textContent.trim())
-                            .join('').toLowerCase();
-                        if (!ownText) continue;
-                        for (const kw of keywords) {
-                            if (ownText.includes(kw)) {
-                                try { el.click(); return 'own:' + ownText.slice(0, 40); } catch(e) {}
-                            }
-                        }
-                    }
-                    for (const el of document.querySelectorAll(tags)) {
-                        const rect = el.getBoundingClientRect();
-                        if (rect.width <= 0 || rect.height <= 0) continue;
-                        const fullText = (el.textContent || '').trim().toLowerCase();
-                        if (!fullText || fullText.length > 40) continue;
-                        for (const kw of keywords) {
-                            if (fullText.includes(kw)) {
-                                try { el.click(); return 'full:' + fullText.slice(0, 40); } catch(e) {}
-                            }
-                        }
-                    }
-                    return null;
-                }""", [k.lower() for k in keywords])
-                page.wait_for_timeout(wait_ms)
-                return result
-
-            all_clients = []
-            nav_result = []
-
-            # 유선 클라이언트 버튼 클릭 → DOM 테이블 + AES 캡처 둘 다 시도
-            r = click_text_btn(['유선 클라이언트', 'wired client', 'wired clients'])
-            nav_result.append(f'wired:{r}')
-            page.screenshot(path=str(_SS_DIR / '03_wired.png'))
-
-            dom_wired = _read_dom_table(page)
-            all_clients.extend(dom_wired)
-
-            aes_wired = _try_extract(page.evaluate("() => window.__capturedAPI || []"))
-            all_clients.extend(aes_wired)
-
-            # 무선 클라이언트 버튼 클릭
-            page.evaluate("() => { window.__capturedAPI = []; }")
-            r = click_text_btn(['무선 클라이언트', 'wireless client', 'wireless clients'])
-            nav_result.append(f'wireless:{r}')
-            page.screenshot(path=str(_SS_DIR / '04_wireless.png'))
-
-            dom_wireless = _read_dom_table(page)
-            all_clients.extend(dom_wireless)
-
-            aes_wireless = _try_extract(page.evaluate("() => window.__capturedAPI || []"))
-            all_clients.extend(aes_wireless)
-
-            if all_clients:
-                return _dedup(all_clients)
-
-            # 실패: 디버그 정보 저장
-            captured_api = page.evaluate("() => window.__capturedAPI || []")
-            aes_entries = [e for e in captured_api if e.get('source') == 'aesdecrypt']
-
-            debug_path = _SS_DIR / 'captured.json'
-            with open(debug_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'stok': stok[:16],
-                    'nav_result': nav_result,
-                    'dom_wired_count': len(dom_wired),
-                    'dom_wireless_count': len(dom_wireless),
-                    'aesdecrypt_count': len(aes_entries),
-                    'aes_samples': [e.get('text', '')[:400] for e in aes_entries[:6]],
-                }, f, ensure_ascii=False, indent=2)
-
-            raise Exception(
-                f"DHCP 클라이언트 없음. stok={stok[:8]}... "
-                f"nav={nav_result} "
-                f"DOM유선={len(dom_wired)}개 DOM무선={len(dom_wireless)}개 "
-                f"AES={len(aes_entries)}개 "
-                f"전체={debug_path}"
-            )
-
-        finally:
-            browser.close()
+            await page.evaluate(_NEXT_PAINT_JS)
+        captured = await page.evaluate(_CAPTURED_JS)
+        if _session_expired(page, captured):
+            raise SessionExpired()
+
+        dom = _read_dom_table(await page.evaluate(_DOM_ROWS_JS))
+        aes = _try_extract(captured)
+        counts[label] = len(dom)
+        all_clients.extend(dom)
+        all_clients.extend(aes)
+
+    if all_clients:
+        return _dedup(all_clients)
+
+    # 실패: 디버그 정보 저장
+    await page.screenshot(path=str(_SS_DIR / '04_wireless.png'))
+    captured_api = await page.evaluate(_CAPTURED_JS)
+    aes_entries = [e for e in captured_api if e.get('source') == 'aesdecrypt']
+
+    debug_path = _SS_DIR / 'captured.json'
+    with open(debug_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'stok': (session.token or '')[:16],
+            'nav_result': nav_result,
+            'dom_wired_count': counts.get('wired', 0),
+            'dom_wireless_count': counts.get('wireless', 0),
+            'aesdecrypt_count': len(aes_entries),
+            'aes_samples': [e.get('text', '')[:400] for e in aes_entries[:6]],
+        }, f, ensure_ascii=False, indent=2)
+
+    raise Exception(
+        f"DHCP 클라이언트 없음. stok={(session.token or '')[:8]}... "
+        f"nav={nav_result} "
+        f"DOM유선={counts.get('wired', 0)}개 DOM무선={counts.get('wireless', 0)}개 "
+        f"AES={len(aes_entries)}개 "
+        f"전체={debug_path}"
+    )
+
+
+# 브라우저 하나를 띄워 두고 로그인한 세션(stok)을 재사용. 동시 가져오기는 세션 2개까지.
+router_sessions = RouterSessionPool(_tplink_login, _tplink_collect, init_script=_INTERCEPT_SCRIPT)
+
+
+def _scrape_tplink(password: str, base_url: str) -> list:
+    return router_sessions.run(base_url, password)
+
+
+def _fetch_clients(password: str, base_url: str) -> list:
+    """라우터 HTTP API 를 직접 호출하고, 실패하거나 목록이 비면 브라우저로 다시 시도"""
+    try:
+        payloads = tplink.client_payloads(base_url, password)
+        clients = _dedup([c for payload in payloads for c in _extract_clients(payload)])
+        if clients:
+            return clients
+        reason = "클라이언트 목록 없음"
+    except tplink.TplinkAuthError:
+        raise
+    except (tplink.TplinkError, ImportError) as e:
+        reason = str(e) or type(e).__name__
+    logger.info("직접 API 실패 (%s) — 브라우저로 재시도", reason)
+    return _scrape_tplink(password, base_url)
+
+
+def _run_router_import_job(db, job) -> list:
+    """router_import 작업 — 비밀번호는 DB 가 아닌 job_runner 메모리에서 받는다."""
+    password = job_runner.secrets(job.id).get("password")
+    if not password:
+        # 재시작 등으로 메모리의 비밀번호가 사라진 경우
+        raise Exception("라우터 비밀번호가 없습니다. 작업을 다시 등록하세요")
+    return _fetch_clients(password, job.params_data.get("url", "http://192.168.0.1"))
+
+
+class TplinkAdapter(RouterAdapter):
+    kind = "tplink"
+    default_url = "http://192.168.0.1"
+    requires_password = True
+
+    def fetch_clients(self) -> list:
+        return _fetch_clients(self.password, self.url)
+
+
+register_adapter("tplink", TplinkAdapter)
+
+
+job_runner.register("router_import", _run_router_import_job)
+
+
+def _bulk_items(target: dict, clients: list) -> List[DeviceBulkItem]:
+    items = []
+    for c in clients:
+        subnet = target.get("subnet")
+        if target.get("network_id") is None and not subnet:
+            subnet = str(ipaddress.ip_network(f"{c['ip_address']}/24", strict=False))
+        items.append(DeviceBulkItem(
+            hostname=c.get("hostname") or c["ip_address"],
+            ip_address=c["ip_address"],
+            mac_address=c.get("mac_address"),
+            device_type=target.get("device_type"),
+            network_id=target.get("network_id"),
+            subnet=subnet,
+            network_name=target.get("name") if subnet else None,
+        ))
+    return items
+
+
+def _run_router_poll_job(db: Session, job) -> dict:
+    """
+    router_poll 작업 — 라우터들을 동시에 조회한 뒤 모든 클라이언트를 upsert_devices 한 번으로 반영.
+    next_index = 조회를 마친 라우터 수, live_count = 지금까지 받은 클라이언트 수.
+    """
+    params = job.params_data
+    targets = params.get("routers") or []
+    passwords = job_runner.secrets(job.id).get("passwords") or [None] * len(targets)
+    try:
+        adapters = [
+            make_adapter(t.get("kind", "tplink"), t.get("url"), pw, **(t.get("options") or {}))
+            for t, pw in zip(targets, passwords)
+        ]
+    except ValueError as e:
+        # 재시작 등으로 메모리의 비밀번호가 사라진 경우도 여기로 온다
+        raise Exception(f"{e}. 작업을 다시 등록하세요")
+    job.total = len(adapters)
+    job.next_index = 0
+    job.live_count = 0
+    db.commit()
+
+    def progress(done: int, result: dict) -> None:
+        job.next_index = done
+        job.live_count += len(result["clients"])
+        db.commit()
+        job_runner.raise_if_cancelled(job)
+
+    results = router_poller.poll_sync(adapters, progress, params.get("concurrency"))
+    items = [item for t, r in zip(targets, results) for item in _bulk_items(t, r["clients"])]
+    bulk = upsert_devices(db, items, update_existing=params.get("update_existing", True)) if items else None
+    db.commit()
+
+    return {
+        "routers": [
+            {"name": t.get("name"), "kind": r["kind"], "url": r["url"], "clients": len(r["clients"]),
+             "error": r["error"], "elapsed_ms": r["elapsed_ms"]}
+            for t, r in zip(targets, results)
+        ],
+        "clients": len(items),
+        "failed": sum(1 for r in results if r["error"]),
+        "created": bulk.created if bulk else 0,
+        "updated": bulk.updated if bulk else 0,
+        "skipped": bulk.skipped if bulk else 0,
+    }
+
+
+job_runner.register("router_poll", _run_router_poll_job)
+
+
+@router.get("/kinds")
+def list_router_kinds():
+    return adapter_kinds()
 
 
 @router.post("/clients", response_model=List[RouterClient])
 async def fetch_router_clients(payload: RouterImportRequest):
     try:
-        loop = asyncio.get_event_loop()
-        clients = await loop.run_in_executor(
-            None, _scrape_tplink, payload.password, payload.url
-        )
-        return clients
+        adapter = make_adapter(payload.kind, payload.url, payload.password, **payload.options)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # 기본 executor 대신 router_poller 의 전용 스레드 풀에서 실행
+        return await router_poller.fetch(adapter)
     except HTTPException:
         raise
+    except tplink.TplinkAuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
         detail = str(e) if str(e) else f"{type(e).__name__} (백엔드 터미널 로그 확인)"
         raise HTTPException(status_code=500, detail=detail)
+
+
+@router.post("/poll", response_model=ScanJobOut, status_code=202)
+def poll_routers(payload: RouterPollRequest, db: Session = Depends(get_db)):
+    """여러 라우터의 클라이언트를 백그라운드로 동시에 가져와 장비 목록에 반영. 진행 상황은 /api/scan/jobs/{id}."""
+    if not payload.routers:
+        raise HTTPException(status_code=400, detail="routers 가 비어 있습니다")
+    for n, t in enumerate(payload.routers):
+        try:
+            make_adapter(t.kind, t.url, t.password, **t.options)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"routers[{n}]: {e}")
+    params = {
+        "routers": [t.model_dump(exclude={"password"}, exclude_none=True) for t in payload.routers],
+        "update_existing": payload.update_existing,
+    }
+    if payload.concurrency:
+        params["concurrency"] = payload.concurrency
+    return job_runner.enqueue(
+        db, "router_poll",
+        params=params,
+        secrets={"passwords": [t.password for t in payload.routers]},
+    )
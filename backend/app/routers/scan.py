@@ -1,23 +1,40 @@
-﻿import ipaddress
-import socket
-import subprocess
-import re
+﻿import asyncio
 import concurrent.futures
+import ipaddress
+import itertools
+import json
+import time
+from datetime import datetime
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
-from ..database import get_db
+from .. import observations
+from ..database import SessionLocal, get_db
+from ..identity import DeviceIdentityIndex
+from ..interfaces import interface_cache
+from ..neighbors import neighbor_table
 from ..models import Device, Network
-from ..oui import lookup as oui_lookup
+from ..oui import lookup_many as oui_lookup_many
+from ..portprobe import DEFAULT_PORTS, PortProbeResult, TcpProber, fingerprint, format_ports, parse_ports
+from ..resolver import resolver
+from ..sweep import get_sweeper
 
 router = APIRouter(prefix="/api/scan", tags=["scan"])
 
 
 class ScanRequest(BaseModel):
     cidr: str
+    # ICMP 에는 응답하지 않았지만 ARP 테이블에 완료 엔트리가 있는 호스트도 live 로 취급.
+    # ARP 엔트리는 호스트가 꺼진 뒤에도 한동안 남으므로 요청할 때만 켠다
+    include_arp: bool = False
+    # ICMP 와 함께 TCP connect probe — 열린 포트 기록, ping 차단 호스트 탐지, OS/유형 힌트
+    tcp_probe: bool = False
+    ports: Optional[List[int]] = None   # 기본: portprobe.DEFAULT_PORTS
+    probe_deadline: float = 2.0         # 호스트당 최대 probe 시간 (초)
 
 
 class ScanResult(BaseModel):
@@ -27,6 +44,37 @@ class ScanResult(BaseModel):
     vendor: Optional[str] = None
     already_registered: bool = False
     role: Optional[str] = None   # 예: "Wi-Fi 기본 게이트웨이"
+    open_ports: List[int] = []
+    os: Optional[str] = None            # 배너·포트 기반 추정
+    device_type: Optional[str] = None   # 배너·포트 기반 추정
+
+    @field_validator("open_ports", mode="before")
+    @classmethod
+    def _parse_open_ports(cls, v):
+        # ScanJobResult 는 "22,80" 문자열로 저장
+        return parse_ports(v) if isinstance(v, str) or v is None else v
+
+
+class DeltaScanRequest(ScanRequest):
+    # 직전 live 가 아니었던 나머지 대역을 저속 백그라운드 sweep 작업으로 큐에 넣을지
+    sweep_rest: bool = True
+    rest_rate: float = 200.0   # 나머지 대역 sweep 의 초당 최대 probe 수
+
+
+class HostChange(BaseModel):
+    ip_address: str
+    field: str   # mac_address, hostname
+    old: Optional[str] = None
+    new: Optional[str] = None
+
+
+class DeltaScanResponse(BaseModel):
+    results: List[ScanResult]
+    added: List[str]
+    removed: List[str]
+    changed: List[HostChange]
+    probed: int
+    rest_job_id: Optional[int] = None   # 나머지 대역 sweep 작업 (GET /api/scan/jobs/{id})
 
 
 class InterfaceInfo(BaseModel):
@@ -39,93 +87,10 @@ class InterfaceInfo(BaseModel):
 
 def _get_interfaces() -> list:
     """
-    ipconfig /all을 파싱해 로컬 IPv4 인터페이스 목록 반환.
-    어댑터 이름, 서브넷 CIDR, 기본 게이트웨이, MAC 주소를 함께 추출한다.
+    로컬 IPv4 인터페이스 목록 (어댑터 이름, 서브넷 CIDR, 기본 게이트웨이, MAC).
+    짧은 TTL 로 캐시되며 만료 시 백그라운드에서 갱신된다 — app.interfaces 참고.
     """
-    try:
-        result = subprocess.run(['ipconfig', '/all'], capture_output=True, timeout=10)
-        output = ''
-        for enc in ('utf-8', 'cp949', 'euc-kr'):
-            try:
-                output = result.stdout.decode(enc)
-                break
-            except Exception:
-                continue
-
-        interfaces = []
-
-        # 어댑터별로 섹션을 나눠 파싱
-        current_adapter = ''
-        current_ip = None
-        current_mask = None
-        current_gw = None
-        current_mac = None
-
-        def _flush():
-            nonlocal current_ip, current_mask, current_gw, current_mac
-            if current_ip and current_mask:
-                try:
-                    net = ipaddress.IPv4Network(f'{current_ip}/{current_mask}', strict=False)
-                    if not net.is_loopback and not net.is_link_local:
-                        interfaces.append({
-                            'ip': current_ip,
-                            'cidr': str(net),
-                            'adapter': current_adapter,
-                            'gateway': current_gw,
-                            'mac': current_mac,
-                        })
-                except Exception:
-                    pass
-            current_ip = current_mask = current_gw = current_mac = None
-
-        for line in output.splitlines():
-            # 어댑터 섹션 헤더: 들여쓰기 없이 ':'로 끝나는 줄
-            if line and not line[0].isspace() and line.strip().endswith(':'):
-                _flush()
-                header = line.strip().rstrip(':')
-                # "이더넷 어댑터 이더넷" → "이더넷"
-                # "Wireless LAN adapter Wi-Fi" → "Wi-Fi"  (대소문자 무관)
-                header_lower = header.lower()
-                for kw in ('어댑터 ', 'adapter '):
-                    if kw in header_lower:
-                        idx = header_lower.index(kw)
-                        current_adapter = header[idx + len(kw):]
-                        break
-                else:
-                    current_adapter = header
-                continue
-
-            # MAC 주소 (Physical Address / 물리적 주소)
-            mac_m = re.search(
-                r'(?:Physical Address|물리적 주소)[^:]*:\s*'
-                r'([0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}'
-                r'[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2})',
-                line
-            )
-            if mac_m and not current_mac:
-                current_mac = mac_m.group(1).upper().replace('-', ':')
-                continue
-
-            ip_m = re.search(r'IPv4[^:]*:\s*([\d.]+)', line)
-            if ip_m:
-                current_ip = ip_m.group(1)
-                continue
-
-            # 서브넷 마스크: 255.로 시작하는 값
-            mask_m = re.search(r':\s*(255\.[\d.]+)\s*$', line.strip())
-            if mask_m and current_ip and not current_mask:
-                current_mask = mask_m.group(1)
-                continue
-
-            # 기본 게이트웨이 (영문·한국어 공통)
-            gw_m = re.search(r'(?:Default Gateway|기본 게이트웨이)[^:]*:\s*([\d.]+)', line)
-            if gw_m:
-                current_gw = gw_m.group(1)
-
-        _flush()
-        return interfaces
-    except Exception:
-        return []
+    return interface_cache.get()
 
 
 @router.get("/interfaces", response_model=List[InterfaceInfo])
@@ -134,90 +99,138 @@ def get_interfaces():
     return _get_interfaces()
 
 
-def _ping(ip: str) -> bool:
-    try:
-        r = subprocess.run(
-            ['ping', '-n', '1', '-w', '800', ip],
-            capture_output=True, timeout=5
-        )
-        return r.returncode == 0
-    except Exception:
-        return False
+@router.post("/neighbors/refresh")
+def refresh_neighbors():
+    """ARP 테이블을 다시 읽고 직전 조회 이후 바뀐 엔트리만 반환"""
+    changed, removed = neighbor_table.refresh(force=True)
+    return {"changed": changed, "removed": sorted(removed)}
 
 
-def _hostname(ip: str) -> str:
-    try:
-        name = socket.gethostbyaddr(ip)[0]
-        return name.split('.')[0]
-    except Exception:
-        return ip
+@router.get("/resolver-stats")
+def get_resolver_stats():
+    """역방향 DNS 캐시 hit/miss 통계"""
+    return resolver.stats()
 
 
-def _arp_table() -> dict:
-    mac_map = {}
-    try:
-        r = subprocess.run(['arp', '-a'], capture_output=True, text=True, timeout=5)
-        for line in r.stdout.splitlines():
-            m = re.match(r'\s+([\d.]+)\s+([\w-]{17})\s+\w+', line)
-            if m:
-                ip = m.group(1)
-                mac = m.group(2).upper().replace('-', ':')
-                mac_map[ip] = mac
-    except Exception:
-        pass
-    return mac_map
+# 동기 스캔은 결과 전체를 메모리에 모아 응답하므로 /22 까지만 허용.
+# 스트리밍 스캔·스캔 작업은 청크 단위로 지연 순회하므로 /16 까지 허용한다.
+_MAX_SYNC_HOSTS = 1024
+_MAX_CHUNKED_HOSTS = 65536
 
 
-@router.post("/", response_model=List[ScanResult])
-def scan_network(payload: ScanRequest, db: Session = Depends(get_db)):
+def _parse_scan_cidr(cidr: str, max_hosts: int = _MAX_SYNC_HOSTS):
     try:
-        net = ipaddress.ip_network(payload.cidr, strict=False)
+        net = ipaddress.ip_network(cidr, strict=False)
     except ValueError:
         raise HTTPException(status_code=400, detail="잘못된 CIDR 형식입니다 (예: 192.168.1.0/24)")
+    if net.version != 4:
+        raise HTTPException(status_code=400, detail="IPv4 대역만 스캔할 수 있습니다")
+    if net.num_addresses > max_hosts:
+        prefix = 32 - (max_hosts - 1).bit_length()
+        raise HTTPException(
+            status_code=400,
+            detail=f"서브넷이 너무 큽니다 (최대 /{prefix}, {max_hosts}개)"
+            + (" — 큰 대역은 /api/scan/jobs 를 사용하세요" if max_hosts < _MAX_CHUNKED_HOSTS else ""),
+        )
+    return net
+
 
-    hosts = list(net.hosts())
-    if len(hosts) > 1024:
-        raise HTTPException(status_code=400, detail="서브넷이 너무 큽니다 (최대 /22, 1024개)")
+_MAX_PROBE_PORTS = 64
 
-    # {게이트웨이 IP: "어댑터명 기본 게이트웨이"} 맵 구성
-    gateway_roles: dict = {}
+
+def _make_prober(tcp_probe: bool, ports: Optional[List[int]], deadline: float) -> Optional[TcpProber]:
+    if not tcp_probe:
+        return None
+    ports = ports or DEFAULT_PORTS
+    if len(set(ports)) > _MAX_PROBE_PORTS or any(not 1 <= p <= 65535 for p in ports):
+        raise HTTPException(status_code=400, detail=f"ports 는 1~65535 범위, 최대 {_MAX_PROBE_PORTS}개입니다")
+    if not 0 < deadline <= 10:
+        raise HTTPException(status_code=400, detail="probe_deadline 은 0~10초 범위여야 합니다")
+    return TcpProber(ports, deadline=deadline)
+
+
+def _sweep(hosts: List[str], prober: Optional[TcpProber] = None, sweeper=None):
+    """
+    ICMP sweep — prober 가 있으면 같은 호스트에 TCP probe 를 동시에 돌려
+    TCP 에만 응답한 호스트도 live 에 넣는다. (live 목록, {ip: PortProbeResult}) 반환.
+    """
+    sweeper = sweeper or get_sweeper()
+    if prober is None:
+        return sweeper.sweep(hosts), {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        tcp = pool.submit(prober.probe_many_sync, hosts)
+        live = sweeper.sweep(hosts)
+        probes = tcp.result()
+    icmp_live = set(live)
+    live += [ip for ip in probes if ip not in icmp_live]
+    return live, probes
+
+
+def _gateway_roles() -> dict:
+    """{게이트웨이 IP: "어댑터명 기본 게이트웨이"} 맵 구성"""
+    roles: dict = {}
     for iface in _get_interfaces():
         if iface.get('gateway'):
             adapter = iface.get('adapter', '')
-            gateway_roles[iface['gateway']] = f"{adapter} 기본 게이트웨이" if adapter else "기본 게이트웨이"
-
-    # 병렬 ping sweep
-    live: List[str] = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=64) as pool:
-        future_to_ip = {pool.submit(_ping, str(ip)): str(ip) for ip in hosts}
-        for future in concurrent.futures.as_completed(future_to_ip):
-            ip = future_to_ip[future]
-            try:
-                if future.result():
-                    live.append(ip)
-            except Exception:
-                pass
+            roles[iface['gateway']] = f"{adapter} 기본 게이트웨이" if adapter else "기본 게이트웨이"
+    return roles
 
-    arp = _arp_table()
-    existing_devices = db.query(Device).all()
 
-    results = []
-    seen_hostnames: set = set()
-    db_dirty = False
+def _arp_only_hosts(arp: dict, net, live) -> List[str]:
+    """ICMP 응답은 없었지만 ARP 로 확인된 net 안의 호스트 (ping 차단 장비)"""
+    live_set = set(live)
+    found = []
+    for ip in arp:
+        if ip in live_set:
+            continue
+        try:
+            addr = ipaddress.ip_address(ip)
+        except ValueError:
+            continue
+        if addr in net and addr != net.network_address and addr != net.broadcast_address:
+            found.append(ip)
+    return found
 
-    for ip in sorted(live, key=ipaddress.ip_address):
-        hostname = _hostname(ip)
+
+class _ScanMatcher:
+    """
+    live 호스트를 기존 장비와 매칭해 ScanResult 를 만든다.
+    IP 가 바뀐 기존 장비는 IP/네트워크를 갱신한다. 커밋은 호출자가 한다.
+    """
+
+    def __init__(self, db: Session, cidr: str, gateway_roles: dict):
+        self.db = db
+        self.cidr = cidr
+        self.gateway_roles = gateway_roles
+        self.index = DeviceIdentityIndex(db.query(Device).all())
+        self.seen_hostnames: set = set()
+        self.vendors: dict = {}   # MAC → 제조사
+
+    def add_vendors(self, macs) -> None:
+        """이번 배치의 MAC 제조사를 한 번에 조회해 둔다 (match 전에 호출)"""
+        macs = [m for m in set(macs) if m and m not in self.vendors]
+        self.vendors.update(zip(macs, oui_lookup_many(macs)))
+
+    def _vendor(self, mac: Optional[str]) -> str:
+        if not mac:
+            return ""
+        if mac not in self.vendors:
+            self.add_vendors([mac])
+        return self.vendors[mac]
+
+    def match(
+        self,
+        ip: str,
+        hostname: str,
+        mac: Optional[str],
+        probe: Optional[PortProbeResult] = None,
+    ) -> Optional[ScanResult]:
+        """hostname 중복(다중 어댑터 동일 PC)이면 None"""
+        db = self.db
         hostname_key = hostname.lower()
-        mac = arp.get(ip)
 
         # MAC → hostname → IP 순서로 기존 장비 매칭
-        matched = None
-        if mac:
-            matched = next((d for d in existing_devices if d.mac_address and d.mac_address.upper() == mac.upper()), None)
-        if not matched and hostname_key != ip.lower():
-            matched = next((d for d in existing_devices if d.hostname and d.hostname.lower() == hostname_key), None)
-        if not matched:
-            matched = next((d for d in existing_devices if d.ip_address == ip), None)
+        matched = self.index.match(mac=mac, hostname=hostname, ip=ip)
 
         already = matched is not None
 
@@ -229,29 +242,309 @@ def scan_network(payload: ScanRequest, db: Session = Depends(get_db)):
             if mac and not matched.mac_address:
                 matched.mac_address = mac
             # 스캔 CIDR에 해당하는 네트워크로 이동
-            scan_net = db.query(Network).filter(Network.subnet == payload.cidr).first()
+            scan_net = db.query(Network).filter(Network.subnet == self.cidr).first()
             if not scan_net:
-                scan_net = Network(name=payload.cidr, subnet=payload.cidr)
+                scan_net = Network(name=self.cidr, subnet=self.cidr)
                 db.add(scan_net)
                 db.flush()
             matched.network_id = scan_net.id
-            db_dirty = True
-
-        if hostname_key != ip.lower() and hostname_key in seen_hostnames:
-            continue
-        seen_hostnames.add(hostname_key)
-
-        results.append(ScanResult(
+            self.index.reindex(matched)
+
+        os_hint, type_hint = fingerprint(probe) if probe else (None, None)
+        if matched and probe:
+            # 열린 포트는 매번 갱신, OS/유형은 비어 있을 때만 힌트로 채움
+            matched.open_ports = format_ports(probe.open_ports)
+            if os_hint and not matched.os:
+                matched.os = os_hint
+            if type_hint and not matched.device_type:
+                matched.device_type = type_hint
+
+        if hostname_key != ip.lower() and hostname_key in self.seen_hostnames:
+            return None
+        self.seen_hostnames.add(hostname_key)
+
+        return ScanResult(
             ip_address=ip,
             hostname=hostname,
             mac_address=mac,
-            vendor=oui_lookup(mac or ""),
+            vendor=self._vendor(mac),
             already_registered=already,
-            role=gateway_roles.get(ip),
-        ))
+            role=self.gateway_roles.get(ip),
+            open_ports=probe.open_ports if probe else [],
+            os=os_hint,
+            device_type=type_hint,
+        )
 
-    if db_dirty:
-        db.commit()
 
+@router.post("/", response_model=List[ScanResult])
+def scan_network(payload: ScanRequest, db: Session = Depends(get_db)):
+    net = _parse_scan_cidr(payload.cidr)
+    prober = _make_prober(payload.tcp_probe, payload.ports, payload.probe_deadline)
+    hosts = [str(ip) for ip in net.hosts()]
+    gateway_roles = _gateway_roles()
+
+    # ping sweep — ICMP 소켓 일괄 전송 (불가 시 ping 프로세스 폴백), 선택적으로 TCP probe 병행
+    live, probes = _sweep(hosts, prober)
+
+    neighbor_table.refresh(force=True)
+    arp = neighbor_table.snapshot()
+    if payload.include_arp:
+        live += _arp_only_hosts(arp, net, live)
+    matcher = _ScanMatcher(db, payload.cidr, gateway_roles)
+    matcher.add_vendors(arp.get(ip) for ip in live)
+
+    hostnames = resolver.resolve_many(live)
+
+    results = []
+    for ip in sorted(live, key=ipaddress.ip_address):
+        result = matcher.match(ip, hostnames[ip], arp.get(ip), probes.get(ip))
+        if result:
+            results.append(result)
+
+    # 델타 스캔 기준이 되도록 관측 기록 갱신
+    observations.record(
+        db, observations.load(db, net), hosts,
+        {ip: (hostnames[ip], arp.get(ip)) for ip in live},
+        resolved=live,
+    )
+    db.commit()
     return results
 
+
+@router.post("/delta", response_model=DeltaScanResponse)
+def scan_network_delta(payload: DeltaScanRequest, db: Session = Depends(get_db)):
+    """
+    델타 스캔 — 직전 스캔에서 live 였던 호스트만 probe 하고 직전 관측과의 차이를 반환.
+    MAC 이 그대로인 호스트는 저장된 hostname 을 재사용해 DNS 조회를 생략한다.
+    나머지 대역은 저속 백그라운드 sweep 작업으로 넘긴다 (sweep_rest).
+    관측 기록이 없는 대역은 기준을 만들기 위해 전체를 probe 한다.
+    """
+    net = _parse_scan_cidr(payload.cidr)
+    prober = _make_prober(payload.tcp_probe, payload.ports, payload.probe_deadline)
+    started_at = datetime.utcnow()
+    observed = observations.load(db, net)
+    baseline = bool(observed)
+    if baseline:
+        targets = sorted((ip for ip, obs in observed.items() if obs.alive), key=ipaddress.ip_address)
+    else:
+        targets = [str(ip) for ip in net.hosts()]
+
+    live, probes = _sweep(targets, prober) if targets else ([], {})
+    neighbor_table.refresh(force=True)
+    arp = neighbor_table.snapshot()
+    if payload.include_arp:
+        live += _arp_only_hosts(arp, net, live)
+
+    hostnames = {}
+    to_resolve = []
+    for ip in live:
+        name = observations.reusable_hostname(observed.get(ip), arp.get(ip), resolver.ttl, resolver.negative_ttl)
+        if name:
+            hostnames[ip] = name
+        else:
+            to_resolve.append(ip)
+    hostnames.update(resolver.resolve_many(to_resolve))
+
+    matcher = _ScanMatcher(db, payload.cidr, _gateway_roles())
+    matcher.add_vendors(arp.get(ip) for ip in live)
+    results = []
+    for ip in sorted(live, key=ipaddress.ip_address):
+        result = matcher.match(ip, hostnames[ip], arp.get(ip), probes.get(ip))
+        if result:
+            results.append(result)
+
+    diff = observations.record(
+        db, observed, targets,
+        {ip: (hostnames[ip], arp.get(ip)) for ip in live},
+        resolved=to_resolve,
+    )
+    db.commit()
+
+    rest_job_id = None
+    if baseline and payload.sweep_rest:
+        from .scan_jobs import _enqueue_rest_sweep  # scan_jobs 가 이 모듈을 임포트하므로 지연 임포트
+        rest_job_id = _enqueue_rest_sweep(db, net, payload.rest_rate, started_at, payload.include_arp).id
+
+    return DeltaScanResponse(results=results, probed=len(targets), rest_job_id=rest_job_id, **diff)
+
+
+# ── 스트리밍 스캔 (Server-Sent Events) ───────────────────────────────────────
+# ping → (DNS ∥ ARP) → DB 매칭을 asyncio 스테이지로 연결하고, 호스트가 확인되는
+# 즉시 result 이벤트를, 주기적으로 progress 이벤트(probed/live/resolved)를 보낸다.
+
+_STREAM_CHUNK = 256          # sweep 한 번에 보내는 호스트 수 (probed 카운터 갱신 단위)
+_ENRICH_CONCURRENCY = 32     # 동시 DNS/ARP 조회 수
+_PROGRESS_INTERVAL = 0.5     # 초
+_DONE = object()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class _StreamRecorder:
+    """
+    스트리밍 스캔의 DB 작업(기존 장비 매칭·관측 기록)을 전용 스레드 하나에서 실행한다.
+    세션은 그 스레드에서만 만들고 쓰고 닫으므로 이벤트 루프를 막지 않고, 스레드 간에 공유되지도 않는다.
+    """
+
+    def __init__(self, net, cidr: str):
+        self.net = net
+        self.cidr = cidr
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-db")
+        self._db: Optional[Session] = None
+        self._matcher: Optional[_ScanMatcher] = None
+
+    def _session(self) -> Session:
+        if self._db is None:
+            self._db = SessionLocal()
+        return self._db
+
+    def _match(self, gateway_roles: dict, item: tuple) -> Optional[ScanResult]:
+        if self._matcher is None:
+            self._matcher = _ScanMatcher(self._session(), self.cidr, gateway_roles)
+        return self._matcher.match(*item)
+
+    def _record(self, found: dict) -> None:
+        db = self._session()
+        observations.record(
+            db, observations.load(db, self.net), (str(ip) for ip in self.net.hosts()), found,
+            resolved=found,
+        )
+        db.commit()
+
+    def _close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def match(self, gateway_roles: dict, item: tuple) -> Optional[ScanResult]:
+        return await self._run(self._match, gateway_roles, item)
+
+    async def record(self, found: dict) -> None:
+        await self._run(self._record, found)
+
+    def close(self) -> None:
+        # 대기 중인 작업 뒤에 세션을 닫는다 — 취소된 스트림에서도 await 없이 호출 가능
+        self._executor.submit(self._close)
+        self._executor.shutdown(wait=False)
+
+
+async def _scan_stream(net, cidr: str, include_arp: bool = False, prober: Optional[TcpProber] = None):
+    loop = asyncio.get_running_loop()
+    counters = {"total": max(net.num_addresses - 2, 1), "probed": 0, "live": 0, "resolved": 0}
+    live_q: asyncio.Queue = asyncio.Queue()
+    out_q: asyncio.Queue = asyncio.Queue()
+    seen_live: set = set()
+    sem = asyncio.Semaphore(_ENRICH_CONCURRENCY)
+    probes: dict = {}   # ping stage 에서 TCP 로만 확인된 호스트의 probe 결과
+
+    async def ping_stage():
+        sweeper = get_sweeper()
+        hosts = (str(ip) for ip in net.hosts())
+        while True:
+            chunk = list(itertools.islice(hosts, _STREAM_CHUNK))
+            if not chunk:
+                break
+            chunk_live = await asyncio.to_thread(
+                sweeper.sweep, chunk,
+                lambda ip: loop.call_soon_threadsafe(live_q.put_nowait, ip),
+            )
+            if prober:
+                # ICMP 무응답 호스트만 TCP 로 liveness 확인 (ICMP live 는 enrich 에서 probe)
+                chunk_live = set(chunk_live)
+                found = await prober.probe_many(ip for ip in chunk if ip not in chunk_live)
+                probes.update(found)
+                for ip in found:
+                    live_q.put_nowait(ip)
+            counters["probed"] += len(chunk)
+        if include_arp:
+            await asyncio.to_thread(neighbor_table.refresh, True)
+            for ip in _arp_only_hosts(neighbor_table.snapshot(), net, seen_live):
+                live_q.put_nowait(ip)
+        live_q.put_nowait(_DONE)
+
+    async def port_probe(ip: str):
+        if ip in probes:
+            return probes.pop(ip)
+        return await prober.probe(ip) if prober else None
+
+    async def enrich(ip: str):
+        async with sem:
+            hostname, mac, probe = await asyncio.gather(
+                resolver.aresolve(ip), asyncio.to_thread(neighbor_table.get, ip), port_probe(ip),
+            )
+        counters["resolved"] += 1
+        await out_q.put((ip, hostname, mac, probe))
+
+    async def enrich_stage():
+        tasks = set()
+        while (ip := await live_q.get()) is not _DONE:
+            if ip in seen_live:
+                continue
+            seen_live.add(ip)
+            counters["live"] += 1
+            task = asyncio.create_task(enrich(ip))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        await out_q.put(_DONE)
+
+    # 인터페이스 조회는 ping 과 동시에 진행하고, 첫 결과 매칭 시점에 합류
+    roles_task = asyncio.create_task(asyncio.to_thread(_gateway_roles))
+    pipeline = asyncio.gather(ping_stage(), enrich_stage())
+    recorder = _StreamRecorder(net, cidr)
+    try:
+        found: dict = {}   # ip → (hostname, MAC) — 완료 시 관측 기록용
+        last_progress = 0.0
+        while True:
+            try:
+                item = await asyncio.wait_for(out_q.get(), timeout=_PROGRESS_INTERVAL)
+            except asyncio.TimeoutError:
+                item = None
+            if item is _DONE:
+                break
+            if item is not None:
+                found[item[0]] = item[1:3]
+                result = await recorder.match(await roles_task, item)
+                if result:
+                    yield _sse("result", result.model_dump())
+            if time.monotonic() - last_progress >= _PROGRESS_INTERVAL:
+                last_progress = time.monotonic()
+                yield _sse("progress", counters)
+        await pipeline
+        await recorder.record(found)
+        yield _sse("progress", counters)
+        yield _sse("done", counters)
+    finally:
+        pipeline.cancel()
+        roles_task.cancel()
+        recorder.close()
+
+
+@router.get("/stream")
+async def scan_network_stream(
+    cidr: str,
+    include_arp: bool = False,
+    tcp_probe: bool = False,
+    ports: Optional[str] = None,
+    probe_deadline: float = 2.0,
+):
+    """
+    scan_network 의 스트리밍 버전 (text/event-stream). ports 는 "22,80,443" 형식.
+    이벤트: result (ScanResult), progress ({total, probed, live, resolved}), done
+    """
+    net = _parse_scan_cidr(cidr, _MAX_CHUNKED_HOSTS)
+    try:
+        port_list = [int(p) for p in ports.split(",") if p.strip()] if ports else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ports 는 쉼표로 구분한 숫자여야 합니다 (예: 22,80,443)")
+    prober = _make_prober(tcp_probe, port_list, probe_deadline)
+    return StreamingResponse(
+        _scan_stream(net, cidr, include_arp, prober),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,394 @@
+import ipaddress
+from datetime import datetime, timedelta
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field
+
+from .. import observations
+from ..database import SessionLocal, get_db
+from ..jobs import job_runner
+from ..models import ScanJob, ScanJobResult, ScanSchedule
+from ..neighbors import neighbor_table
+from ..portprobe import DEFAULT_PORTS, TcpProber, format_ports
+from ..resolver import resolver
+from ..sweep import get_sweeper
+from .scan import (
+    ScanResult, _MAX_CHUNKED_HOSTS, _ScanMatcher, _arp_only_hosts, _gateway_roles, _make_prober,
+    _parse_scan_cidr, _sweep,
+)
+
+router = APIRouter(prefix="/api/scan/jobs", tags=["scan"])
+schedule_router = APIRouter(prefix="/api/scan/schedules", tags=["scan"])
+
+_JOB_KINDS = ("sweep", "bluetooth_refresh", "router_import", "vuln_autoscan")
+
+
+class ScanJobCreate(BaseModel):
+    kind: str = "sweep"
+    # sweep
+    cidr: Optional[str] = None
+    rate: Optional[float] = None   # 초당 최대 probe 수
+    chunk_size: int = 256          # 동시에 in-flight 인 최대 probe 수
+    include_arp: bool = False      # ARP 에만 있는 호스트도 live 로 — scan.ScanRequest 참고
+    tcp_probe: bool = False        # TCP connect probe 병행 — scan.ScanRequest 참고
+    ports: Optional[List[int]] = None
+    probe_deadline: float = 2.0
+    # router_import
+    url: str = "http://192.168.0.1"
+    password: Optional[str] = None  # DB 에 저장하지 않음 (메모리에만 보관)
+
+
+class ScanJobOut(BaseModel):
+    id: int
+    kind: str
+    cidr: Optional[str]
+    status: str
+    total: int
+    next_index: int
+    live_count: int
+    rate: Optional[float]
+    chunk_size: int
+    params: dict = Field(default_factory=dict, validation_alias="params_data")
+    result: Optional[Any] = Field(None, validation_alias="result_data")
+    cancel_requested: bool
+    schedule_id: Optional[int]
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class ScanJobResultOut(ScanResult):
+    model_config = {"from_attributes": True}
+
+
+class ScanScheduleCreate(BaseModel):
+    cidr: str
+    interval_minutes: int
+    rate: Optional[float] = None
+    chunk_size: int = 256
+    enabled: bool = True
+
+
+class ScanScheduleUpdate(BaseModel):
+    interval_minutes: Optional[int] = None
+    rate: Optional[float] = None
+    chunk_size: Optional[int] = None
+    enabled: Optional[bool] = None
+
+
+class ScanScheduleOut(BaseModel):
+    id: int
+    cidr: str
+    interval_minutes: int
+    rate: Optional[float]
+    chunk_size: int
+    enabled: bool
+    last_run_at: Optional[datetime]
+    next_run_at: Optional[datetime]
+
+    model_config = {"from_attributes": True}
+
+
+def _host_count(net) -> int:
+    return net.num_addresses - 2 if net.num_addresses > 2 else net.num_addresses
+
+
+def _host_at(net, index: int) -> str:
+    """net.hosts() 의 index 번째 호스트. 목록을 만들지 않고 정수 연산으로 계산한다."""
+    offset = 1 if net.num_addresses > 2 else 0
+    return str(net.network_address + offset + index)
+
+
+def _check_sweep_options(rate: Optional[float], chunk_size: Optional[int], interval_minutes: Optional[int] = None) -> None:
+    if rate is not None and rate <= 0:
+        raise HTTPException(status_code=400, detail="rate 는 0보다 커야 합니다")
+    if chunk_size is not None and not 1 <= chunk_size <= 4096:
+        raise HTTPException(status_code=400, detail="chunk_size 는 1~4096 범위여야 합니다")
+    if interval_minutes is not None and interval_minutes < 1:
+        raise HTTPException(status_code=400, detail="interval_minutes 는 1 이상이어야 합니다")
+
+
+def _run_sweep_job(db: Session, job: ScanJob) -> dict:
+    """
+    job 을 next_index 부터 chunk_size 단위로 sweep 한다.
+    청크마다 결과·장비 갱신·진행 위치를 한 트랜잭션으로 커밋(체크포인트)하므로
+    확인된 호스트는 청크 단위로 바로 DB 에 기록되고, 중단·취소돼도 마지막 청크
+    이후부터 재개할 수 있다. 메모리 사용량은 대역 크기와 무관하게 일정하다.
+
+    params.tcp_probe 이면 청크마다 ICMP 와 함께 TCP probe 를 돌린다.
+    params.include_arp 이면 ICMP 무응답이지만 ARP 테이블에 있는 호스트도 live 로 센다.
+    params.skip_probed_since (ISO 시각) 가 있으면 그 이후 이미 probe 된 live 호스트
+    (델타 스캔이 먼저 확인한 호스트) 는 건너뛴다.
+    """
+    net = ipaddress.ip_network(job.cidr, strict=False)
+    since = job.params_data.get("skip_probed_since")
+    since = datetime.fromisoformat(since) if since else None
+    sweeper = get_sweeper(rate=job.rate)
+    prober = (
+        TcpProber(job.params_data.get("ports") or DEFAULT_PORTS, deadline=job.params_data.get("probe_deadline", 2.0))
+        if job.params_data.get("tcp_probe") else None
+    )
+    matcher = _ScanMatcher(db, job.cidr, _gateway_roles())
+    # 재개 시 이전 청크에서 기록한 hostname 을 중복 제거 집합에 복원
+    matcher.seen_hostnames.update(
+        h.lower() for (h,) in db.query(ScanJobResult.hostname).filter(ScanJobResult.job_id == job.id)
+    )
+
+    while job.next_index < job.total:
+        end = min(job.next_index + job.chunk_size, job.total)
+        chunk = [_host_at(net, i) for i in range(job.next_index, end)]
+        observed = observations.load_range(db, chunk[0], chunk[-1])
+        if since:
+            chunk = [
+                ip for ip in chunk
+                if not ((obs := observed.get(ip)) and obs.alive and obs.last_probed_at >= since)
+            ]
+        live, probes = _sweep(chunk, prober, sweeper) if chunk else ([], {})
+        neighbor_table.refresh(force=True)
+        arp = neighbor_table.snapshot()
+        if job.params_data.get("include_arp"):
+            # ICMP 를 차단하지만 ARP 에는 응답한 이 청크 범위의 호스트
+            chunk_hosts = set(chunk)
+            live += [ip for ip in _arp_only_hosts(arp, net, live) if ip in chunk_hosts]
+        live.sort(key=ipaddress.ip_address)
+        hostnames = resolver.resolve_many(live) if live else {}
+        matcher.add_vendors(arp.get(ip) for ip in live)
+        for ip in live:
+            result = matcher.match(ip, hostnames[ip], arp.get(ip), probes.get(ip))
+            if result:
+                row = result.model_dump()
+                row["open_ports"] = format_ports(row["open_ports"])
+                db.add(ScanJobResult(job_id=job.id, **row))
+        observations.record(
+            db, observed, chunk,
+            {ip: (hostnames[ip], arp.get(ip)) for ip in live},
+            resolved=live,
+        )
+        job.live_count += len(live)
+        job.next_index = end
+        db.commit()
+        job_runner.raise_if_cancelled(job)
+
+    return {"live": job.live_count}
+
+
+job_runner.register("sweep", _run_sweep_job)
+
+
+def _enqueue_sweep(
+    db: Session,
+    net,
+    rate: Optional[float],
+    chunk_size: int,
+    schedule_id: Optional[int] = None,
+    params: Optional[dict] = None,
+) -> ScanJob:
+    return job_runner.enqueue(
+        db, "sweep", params,
+        cidr=str(net),
+        total=_host_count(net),
+        rate=rate,
+        chunk_size=chunk_size,
+        schedule_id=schedule_id,
+    )
+
+
+def _enqueue_rest_sweep(db: Session, net, rate: float, since: datetime, include_arp: bool = False) -> ScanJob:
+    """
+    델타 스캔 후 나머지 대역을 저속으로 sweep 하는 작업 — since 이후 probe 된 live
+    호스트는 건너뛴다. 같은 대역의 나머지 sweep 이 대기·실행 중이면 그 작업을 반환.
+    """
+    for job in (
+        db.query(ScanJob)
+        .filter(ScanJob.kind == "sweep", ScanJob.cidr == str(net), ScanJob.status.in_(("pending", "running")))
+        .all()
+    ):
+        if job.params_data.get("skip_probed_since"):
+            return job
+    params = {"skip_probed_since": since.isoformat()}
+    if include_arp:
+        params["include_arp"] = True
+    return _enqueue_sweep(db, net, rate, 256, params=params)
+
+
+def _enqueue_due_schedules() -> None:
+    """next_run_at 이 지난 스케줄마다 sweep 작업을 큐에 넣는다 (job_runner 주기 작업)."""
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        due = (
+            db.query(ScanSchedule)
+            .filter(ScanSchedule.enabled.is_(True), ScanSchedule.next_run_at <= now)
+            .all()
+        )
+        for sched in due:
+            # 조건부 UPDATE 로 이번 회차를 선점 — 여러 프로세스가 같은 회차를 중복 등록하지 않도록
+            claimed = (
+                db.query(ScanSchedule)
+                .filter(ScanSchedule.id == sched.id, ScanSchedule.next_run_at == sched.next_run_at)
+                .update({
+                    ScanSchedule.last_run_at: now,
+                    ScanSchedule.next_run_at: now + timedelta(minutes=sched.interval_minutes),
+                }, synchronize_session=False)
+            )
+            db.commit()
+            if not claimed:
+                continue
+            # 이전 회차가 아직 끝나지 않았으면 이번 회차는 건너뜀
+            busy = (
+                db.query(ScanJob.id)
+                .filter(ScanJob.schedule_id == sched.id, ScanJob.status.in_(("pending", "running")))
+                .first()
+            )
+            if not busy:
+                net = ipaddress.ip_network(sched.cidr, strict=False)
+                _enqueue_sweep(db, net, sched.rate, sched.chunk_size, schedule_id=sched.id)
+    finally:
+        db.close()
+
+
+job_runner.add_periodic(15, _enqueue_due_schedules)
+
+
+def _get_job(job_id: int, db: Session) -> ScanJob:
+    job = db.query(ScanJob).filter(ScanJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Scan job not found")
+    return job
+
+
+@router.post("/", response_model=ScanJobOut, status_code=201)
+def create_scan_job(payload: ScanJobCreate, db: Session = Depends(get_db)):
+    """작업을 큐에 넣고 바로 반환 — 진행 상황은 GET /api/scan/jobs/{id} 로 조회"""
+    if payload.kind not in _JOB_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind 는 {', '.join(_JOB_KINDS)} 중 하나여야 합니다")
+
+    if payload.kind == "sweep":
+        if not payload.cidr:
+            raise HTTPException(status_code=400, detail="sweep 작업에는 cidr 이 필요합니다")
+        net = _parse_scan_cidr(payload.cidr, _MAX_CHUNKED_HOSTS)
+        _check_sweep_options(payload.rate, payload.chunk_size)
+        params = {}
+        if payload.include_arp:
+            params["include_arp"] = True
+        if _make_prober(payload.tcp_probe, payload.ports, payload.probe_deadline):
+            params.update(tcp_probe=True, ports=payload.ports, probe_deadline=payload.probe_deadline)
+        return _enqueue_sweep(db, net, payload.rate, payload.chunk_size, params=params or None)
+
+    if payload.kind == "router_import":
+        if not payload.password:
+            raise HTTPException(status_code=400, detail="router_import 작업에는 password 가 필요합니다")
+        return job_runner.enqueue(
+            db, "router_import",
+            params={"url": payload.url},
+            secrets={"password": payload.password},
+        )
+
+    return job_runner.enqueue(db, payload.kind)
+
+
+@router.get("/", response_model=List[ScanJobOut])
+def list_scan_jobs(
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+):
+    q = db.query(ScanJob)
+    if status:
+        q = q.filter(ScanJob.status == status)
+    if kind:
+        q = q.filter(ScanJob.kind == kind)
+    return q.order_by(ScanJob.id.desc()).limit(min(limit, 1000)).all()
+
+
+@router.get("/{job_id}", response_model=ScanJobOut)
+def get_scan_job(job_id: int, db: Session = Depends(get_db)):
+    return _get_job(job_id, db)
+
+
+@router.get("/{job_id}/results", response_model=List[ScanJobResultOut])
+def get_scan_job_results(job_id: int, offset: int = 0, limit: int = 500, db: Session = Depends(get_db)):
+    _get_job(job_id, db)
+    return (
+        db.query(ScanJobResult)
+        .filter(ScanJobResult.job_id == job_id)
+        .order_by(ScanJobResult.id)
+        .offset(offset)
+        .limit(min(limit, 5000))
+        .all()
+    )
+
+
+@router.post("/{job_id}/cancel", response_model=ScanJobOut)
+def cancel_scan_job(job_id: int, db: Session = Depends(get_db)):
+    """대기 중이면 즉시 취소, 실행 중이면 다음 체크포인트에서 멈춘다."""
+    job = _get_job(job_id, db)
+    if job.status not in ("pending", "running"):
+        raise HTTPException(status_code=409, detail="대기 중이거나 실행 중인 작업만 취소할 수 있습니다")
+    job_runner.cancel(db, job)
+    return job
+
+
+@router.post("/{job_id}/resume", response_model=ScanJobOut)
+def resume_scan_job(job_id: int, db: Session = Depends(get_db)):
+    job = _get_job(job_id, db)
+    if job.kind != "sweep":
+        raise HTTPException(status_code=409, detail="sweep 작업만 재개할 수 있습니다")
+    if job.status == "done":
+        raise HTTPException(status_code=409, detail="이미 완료된 작업입니다")
+    if job.status in ("pending", "running"):
+        raise HTTPException(status_code=409, detail="이미 대기 중이거나 실행 중인 작업입니다")
+    job_runner.requeue(db, job)
+    return job
+
+
+# --- Schedules ---
+
+def _get_schedule(schedule_id: int, db: Session) -> ScanSchedule:
+    sched = db.query(ScanSchedule).filter(ScanSchedule.id == schedule_id).first()
+    if not sched:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    return sched
+
+
+@schedule_router.get("/", response_model=List[ScanScheduleOut])
+def list_schedules(db: Session = Depends(get_db)):
+    return db.query(ScanSchedule).order_by(ScanSchedule.id).all()
+
+
+@schedule_router.post("/", response_model=ScanScheduleOut, status_code=201)
+def create_schedule(payload: ScanScheduleCreate, db: Session = Depends(get_db)):
+    net = _parse_scan_cidr(payload.cidr, _MAX_CHUNKED_HOSTS)
+    _check_sweep_options(payload.rate, payload.chunk_size, payload.interval_minutes)
+    sched = ScanSchedule(**{**payload.model_dump(), "cidr": str(net)}, next_run_at=datetime.utcnow())
+    db.add(sched)
+    db.commit()
+    db.refresh(sched)
+    return sched
+
+
+@schedule_router.put("/{schedule_id}", response_model=ScanScheduleOut)
+def update_schedule(schedule_id: int, payload: ScanScheduleUpdate, db: Session = Depends(get_db)):
+    sched = _get_schedule(schedule_id, db)
+    updates = payload.model_dump(exclude_unset=True)
+    _check_sweep_options(updates.get("rate"), updates.get("chunk_size"), updates.get("interval_minutes"))
+    for key, value in updates.items():
+        setattr(sched, key, value)
+    db.commit()
+    db.refresh(sched)
+    return sched
+
+
+@schedule_router.delete("/{schedule_id}", status_code=204)
+def delete_schedule(schedule_id: int, db: Session = Depends(get_db)):
+    sched = _get_schedule(schedule_id, db)
+    db.query(ScanJob).filter(ScanJob.schedule_id == schedule_id).update(
+        {ScanJob.schedule_id: None}, synchronize_session=False
+    )
+    db.delete(sched)
+    db.commit()
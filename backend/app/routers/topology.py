@@ -1,108 +1,307 @@
-from fastapi import APIRouter, Depends, Request
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Iterable, Optional
+
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
 
-from ..database import get_db
+from ..database import SessionLocal, get_db
+from ..identity import DeviceIdentityIndex
+from ..interfaces import interface_cache
 from ..models import Network, Device, DeviceSolution, SecuritySolution, DeviceVulnerability
-from ..schemas import TopologyOut, TopologyNode, TopologyEdge, TopologyMeta
-from .scan import _get_interfaces
+from ..revision import revision
+from ..schemas import TopologyOut, TopologyNode, TopologyEdge, TopologyMeta, TopologyChanges
+from .scan import _get_interfaces, _sse
 from .networks import _classify_networks
 
 router = APIRouter(prefix="/api/topology", tags=["topology"])
 
+# 직렬화된 스냅샷 캐시 — (DB 리비전, 인터페이스 목록 버전) 이 같으면 재사용
+_snapshot_lock = threading.Lock()
+_snapshot: dict = {"key": None, "etag": None, "body": b""}
+
+_KEEPALIVE = 15.0   # SSE 연결 유지용 주석 전송 간격 (초)
+_POLL = 1.0         # 다른 프로세스의 커밋을 확인하는 간격 (초) — 이 프로세스의 커밋은 즉시 알림
 
-def _find_this_pc_device_id(db: Session) -> int | None:
+
+def _find_this_pc_device_id(index: DeviceIdentityIndex, ifaces: list) -> int | None:
     """
-    로컬 인터페이스 IP/MAC 을 기반으로 DB 에서 이 PC 에 해당하는 device 를 찾는다.
+    로컬 인터페이스 IP/MAC 을 기반으로 이 PC 에 해당하는 device 를 찾는다.
     """
-    ifaces = _get_interfaces()
-    local_ips = {iface["ip"] for iface in ifaces}
-    local_macs = {iface["mac"].upper() for iface in ifaces if iface.get("mac")}
-
     # IP 로 먼저 시도
-    for dev in db.query(Device).filter(Device.ip_address.in_(local_ips)).all():
-        return dev.id
+    for iface in ifaces:
+        dev = index.by_ip(iface["ip"])
+        if dev:
+            return dev.id
 
     # MAC 으로 시도
-    for dev in db.query(Device).filter(Device.mac_address.in_(local_macs)).all():
-        return dev.id
+    for iface in ifaces:
+        dev = index.by_mac(iface.get("mac"))
+        if dev:
+            return dev.id
 
     return None
 
 
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def _load_devices(db: Session, ids: Optional[Iterable[int]] = None) -> list:
+    query = db.query(Device).options(
+        joinedload(Device.device_solutions).joinedload(DeviceSolution.solution),
+        joinedload(Device.device_vulnerabilities),
+    )
+    if ids is not None:
+        query = query.filter(Device.id.in_(list(ids)))
+    return query.order_by(Device.id).all()
+
+
+def _network_node(net: dict) -> TopologyNode:
+    return TopologyNode(
+        id=f"net-{net['id']}",
+        label=f"{net['name']}\n{net['subnet']}",
+        type="network",
+        data={
+            "id": net["id"],
+            "name": net["name"],
+            "subnet": net["subnet"],
+            "gateway": net["gateway"],
+            "vlan_id": net["vlan_id"],
+            "description": net["description"],
+            "network_type": net["network_type"],
+            "status": net["status"],
+            "adapter": net["adapter"],
+        }
+    )
+
+
+def _device_node(dev: Device) -> TopologyNode:
+    solutions_data = [
+        {"name": ds.solution.name, "type": ds.solution.type, "status": ds.status}
+        for ds in dev.device_solutions if ds.solution
+    ]
+    vulns_data = [
+        {"id": dv.id, "cve_id": dv.cve_id, "title": dv.title, "severity": dv.severity, "status": dv.status}
+        for dv in dev.device_vulnerabilities
+    ]
+    return TopologyNode(
+        id=f"dev-{dev.id}",
+        label=dev.hostname,
+        type="device",
+        parent=f"net-{dev.network_id}",
+        data={
+            "id": dev.id,
+            "hostname": dev.hostname,
+            "ip_address": dev.ip_address,
+            "mac_address": dev.mac_address,
+            "os": dev.os,
+            "device_type": dev.device_type,
+            "open_ports": dev.open_ports,
+            "status": dev.status,
+            "network_id": dev.network_id,
+            "solutions": solutions_data,
+            "vulnerabilities": vulns_data,
+        }
+    )
+
+
+def _edge_id(device_id: int, network_id: int) -> str:
+    return f"e-dev{device_id}-net{network_id}"
+
+
+def _device_edge(dev: Device) -> TopologyEdge:
+    # Edge: device → network
+    return TopologyEdge(
+        id=_edge_id(dev.id, dev.network_id),
+        source=f"dev-{dev.id}",
+        target=f"net-{dev.network_id}",
+    )
+
+
 @router.get("/", response_model=TopologyOut)
-def get_topology(db: Session = Depends(get_db), request: Request = None):
-    this_pc_id = _find_this_pc_device_id(db)
-    networks = db.query(Network).all()
+def get_topology(request: Request, db: Session = Depends(get_db)):
+    """
+    토폴로지 그래프. 네트워크·장비·솔루션·취약점이 바뀌지 않았으면 직렬화해 둔
+    스냅샷을 그대로 반환하고, If-None-Match 가 현재 ETag 와 같으면 304.
+    """
     interfaces = _get_interfaces()
-    
-    devices = (
-        db.query(Device)
-        .options(
-            joinedload(Device.device_solutions).joinedload(DeviceSolution.solution),
-            joinedload(Device.device_vulnerabilities),
-        )
-        .all()
-    )
-    
+    # 리비전은 조회 전에 DB 에서 읽는다 — 조회 도중 커밋되면 다음 요청에서 다시 만든다
+    rev, epoch = revision.current(db)
+    key = (epoch, rev, interface_cache.version)
+
+    with _snapshot_lock:
+        if _snapshot["key"] != key:
+            body = _build_topology(db, interfaces, rev, epoch).model_dump_json().encode()
+            # 인터페이스 목록은 프로세스마다 따로 읽으므로 버전 번호 대신 내용으로 ETag 를 만든다
+            ifaces = hashlib.sha1(json.dumps(interfaces, sort_keys=True, default=str).encode()).hexdigest()[:12]
+            _snapshot.update(key=key, etag=f'"{epoch}-{rev}-{ifaces}"', body=body)
+        etag, body = _snapshot["etag"], _snapshot["body"]
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _build_topology(db: Session, interfaces: list, rev: int, epoch: str) -> TopologyOut:
+    networks = db.query(Network).all()
+    devices = _load_devices(db)
+    this_pc_id = _find_this_pc_device_id(DeviceIdentityIndex(devices), interfaces)
+
     # 네트워크 분류 (devices 정보 전달하여 Bluetooth 상태 정확히 판별)
     classified_networks = _classify_networks(networks, interfaces, devices)
 
+    # Network nodes (parent/group nodes) → Device nodes
+    nodes = [_network_node(net) for net in classified_networks]
+    nodes += [_device_node(dev) for dev in devices]
+    edges = [_device_edge(dev) for dev in devices]
+
+    meta = TopologyMeta(this_pc_device_id=this_pc_id, revision=rev, epoch=epoch)
+    return TopologyOut(nodes=nodes, edges=edges, meta=meta)
+
+
+def _build_changes(db: Session, since: int, epoch: Optional[str]) -> TopologyChanges:
+    """since 이후 바뀐 엔티티만 다시 읽어 노드/엣지 upsert·삭제 목록을 만든다."""
+    interfaces = _get_interfaces()
+    current, db_epoch = revision.current(db)
+    change = revision.since(db, since, current) if epoch in (None, db_epoch) else None
+    this_pc_index = DeviceIdentityIndex.load(
+        db,
+        macs=[i.get("mac") for i in interfaces],
+        ips=[i["ip"] for i in interfaces],
+    )
+    meta = TopologyMeta(
+        this_pc_device_id=_find_this_pc_device_id(this_pc_index, interfaces),
+        revision=current,
+        epoch=db_epoch,
+    )
+    if change is None or change.full:
+        return TopologyChanges(reset=True, since=since, meta=meta)
+
+    device_ids = set(change.devices)
+    if change.solutions:
+        device_ids.update(
+            did for (did,) in db.query(DeviceSolution.device_id)
+            .filter(DeviceSolution.solution_id.in_(change.solutions))
+        )
+    network_ids = {nid for nid in change.networks if nid is not None}
+    if change.interfaces:
+        network_ids.update(nid for (nid,) in db.query(Network.id))
+
     nodes: list[TopologyNode] = []
     edges: list[TopologyEdge] = []
+    removed_nodes: list[str] = []
+    removed_edges: list[str] = []
+
+    if network_ids:
+        networks = db.query(Network).filter(Network.id.in_(network_ids)).all()
+        # _classify_networks 는 장비의 network_id 만 본다 (Bluetooth 상태 판별)
+        members = db.query(Device.network_id).filter(Device.network_id.in_(network_ids)).all()
+        nodes += [_network_node(net) for net in _classify_networks(networks, interfaces, members)]
+        found = {net.id for net in networks}
+        removed_nodes += [f"net-{nid}" for nid in sorted(network_ids - found)]
+
+    if device_ids:
+        devices = _load_devices(db, device_ids)
+        for dev in devices:
+            nodes.append(_device_node(dev))
+            edges.append(_device_edge(dev))
+            # 다른 네트워크로 옮겨졌으면 이전 엣지 제거 (이전 network_id 는 change.networks 에 있음)
+            removed_edges += [_edge_id(dev.id, nid) for nid in sorted(network_ids) if nid != dev.network_id]
+        found = {dev.id for dev in devices}
+        for did in sorted(device_ids - found):
+            removed_nodes.append(f"dev-{did}")
+            removed_edges += [_edge_id(did, nid) for nid in sorted(network_ids)]
+
+    return TopologyChanges(
+        since=since,
+        nodes=nodes,
+        edges=edges,
+        removed_nodes=removed_nodes,
+        removed_edges=removed_edges,
+        meta=meta,
+    )
+
 
-    # Network nodes (parent/group nodes)
-    for net in classified_networks:
-        nodes.append(TopologyNode(
-            id=f"net-{net['id']}",
-            label=f"{net['name']}\n{net['subnet']}",
-            type="network",
-            data={
-                "id": net["id"],
-                "name": net["name"],
-                "subnet": net["subnet"],
-                "gateway": net["gateway"],
-                "vlan_id": net["vlan_id"],
-                "description": net["description"],
-                "network_type": net["network_type"],
-                "status": net["status"],
-                "adapter": net["adapter"],
-            }
-        ))
-
-    # Device nodes
-    for dev in devices:
-        solutions_data = [
-            {"name": ds.solution.name, "type": ds.solution.type, "status": ds.status}
-            for ds in dev.device_solutions if ds.solution
-        ]
-        vulns_data = [
-            {"id": dv.id, "cve_id": dv.cve_id, "title": dv.title, "severity": dv.severity, "status": dv.status}
-            for dv in dev.device_vulnerabilities
-        ]
-        nodes.append(TopologyNode(
-            id=f"dev-{dev.id}",
-            label=dev.hostname,
-            type="device",
-            parent=f"net-{dev.network_id}",
-            data={
-                "id": dev.id,
-                "hostname": dev.hostname,
-                "ip_address": dev.ip_address,
-                "mac_address": dev.mac_address,
-                "os": dev.os,
-                "device_type": dev.device_type,
-                "status": dev.status,
-                "network_id": dev.network_id,
-                "solutions": solutions_data,
-                "vulnerabilities": vulns_data,
-            }
-        ))
-
-        # Edge: device → network
-        edges.append(TopologyEdge(
-            id=f"e-dev{dev.id}-net{dev.network_id}",
-            source=f"dev-{dev.id}",
-            target=f"net-{dev.network_id}",
-        ))
-
-    return TopologyOut(nodes=nodes, edges=edges, meta=TopologyMeta(this_pc_device_id=this_pc_id))
+@router.get("/changes", response_model=TopologyChanges)
+def get_topology_changes(since: int, epoch: Optional[str] = None, db: Session = Depends(get_db)):
+    """
+    since 리비전(topology meta.revision) 이후 바뀐 노드/엣지만 반환.
+    epoch 가 현재 서버와 다르거나 변경 로그가 밀려났으면 reset=true — 전체 topology 를 다시 받을 것.
+    """
+    return _build_changes(db, since, epoch)
+
+
+def _current_in_session() -> tuple:
+    db = SessionLocal()
+    try:
+        return revision.current(db)
+    finally:
+        db.close()
+
+
+def _changes_in_session(since: int, epoch: Optional[str]) -> TopologyChanges:
+    db = SessionLocal()
+    try:
+        return _build_changes(db, since, epoch)
+    finally:
+        db.close()
+
+
+async def _change_stream(request: Request, since: int, epoch: Optional[str]):
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def notify(_rev: int) -> None:
+        loop.call_soon_threadsafe(wake.set)
+
+    revision.add_listener(notify)
+    last_sent = time.monotonic()
+    try:
+        while not await request.is_disconnected():
+            wake.clear()
+            current, db_epoch = await run_in_threadpool(_current_in_session)
+            if since != current or epoch not in (None, db_epoch):
+                changes = await run_in_threadpool(_changes_in_session, since, epoch)
+                since, epoch = changes.meta.revision, changes.meta.epoch
+                yield f"id: {epoch}-{since}\n" + _sse("changes", changes.model_dump())
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= _KEEPALIVE:
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            try:
+                await asyncio.wait_for(wake.wait(), _POLL)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        revision.remove_listener(notify)
+
+
+@router.get("/stream")
+async def topology_stream(request: Request, since: Optional[int] = None, epoch: Optional[str] = None):
+    """
+    토폴로지 변경 push (text/event-stream). 커밋될 때마다 changes 이벤트로
+    TopologyChanges 를 보낸다. 재연결 시 브라우저가 보내는 Last-Event-ID("epoch-리비전")
+    가 있으면 그 지점부터 이어서 보낸다.
+    """
+    last_id = request.headers.get("last-event-id", "")
+    if "-" in last_id:
+        last_epoch, _, last_rev = last_id.rpartition("-")
+        if last_rev.isdigit():
+            since, epoch = int(last_rev), last_epoch
+    if since is None:
+        since, epoch = await run_in_threadpool(_current_in_session)
+    return StreamingResponse(
+        _change_stream(request, since, epoch),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
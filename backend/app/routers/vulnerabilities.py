@@ -1,12 +1,24 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from .. import vuln_scan
 from ..database import get_db
+from ..jobs import job_runner
 from ..models import Device, DeviceVulnerability
 from ..schemas import DeviceVulnerabilityCreate, DeviceVulnerabilityOut, DeviceVulnerabilityUpdate
-from ..vuln_rules import VULN_RULES
+from .scan_jobs import ScanJobOut
 
 router = APIRouter(prefix="/api/devices", tags=["vulnerabilities"])
+fleet_router = APIRouter(prefix="/api/vulnerabilities", tags=["vulnerabilities"])
+
+
+class FleetAutoscanRequest(BaseModel):
+    network_id: Optional[int] = None
+    os: Optional[str] = None           # 부분 일치 (대소문자 무시)
+    device_type: Optional[str] = None
 
 
 def _get_device_or_404(device_id: int, db: Session) -> Device:
@@ -45,42 +57,8 @@ def create_vulnerability(device_id: int, body: DeviceVulnerabilityCreate, db: Se
 @router.post("/{device_id}/vulnerabilities/autoscan")
 def autoscan_vulnerabilities(device_id: int, db: Session = Depends(get_db)):
     device = _get_device_or_404(device_id, db)
-    os_lower = (device.os or "").lower()
-    dtype = device.device_type or ""
-
-    matched = []
-    for rule in VULN_RULES:
-        if not any(p in os_lower for p in rule["match"]):
-            continue
-        if rule["device_types"] and dtype not in rule["device_types"]:
-            continue
-        matched.extend(rule["vulns"])
-
-    existing_cves = {
-        v.cve_id
-        for v in db.query(DeviceVulnerability).filter(DeviceVulnerability.device_id == device_id).all()
-        if v.cve_id
-    }
-
-    added = 0
-    skipped = 0
-    for vuln in matched:
-        if vuln["cve_id"] in existing_cves:
-            skipped += 1
-            continue
-        db.add(DeviceVulnerability(
-            device_id=device_id,
-            cve_id=vuln["cve_id"],
-            title=vuln["title"],
-            severity=vuln["severity"],
-            description=vuln["description"],
-            status="open",
-        ))
-        existing_cves.add(vuln["cve_id"])
-        added += 1
-
-    db.commit()
-    return {"added": added, "skipped": skipped, "matched_os": device.os or ""}
+    stats = vuln_scan.autoscan(db, [(device.id, device.os, device.device_type)])
+    return {"added": stats["added"], "skipped": stats["skipped"], "matched_os": device.os or ""}
 
 
 @router.patch("/{device_id}/vulnerabilities/{vid}", response_model=DeviceVulnerabilityOut)
@@ -97,3 +75,33 @@ def delete_vulnerability(device_id: int, vid: int, db: Session = Depends(get_db)
     vuln = _get_vuln_or_404(device_id, vid, db)
     db.delete(vuln)
     db.commit()
+
+
+# --- 전체 장비 자동 스캔 ---
+
+def _run_vuln_autoscan_job(db: Session, job) -> dict:
+    """vuln_autoscan 작업 — next_index = 처리한 장비 수, live_count = 추가한 취약점 수"""
+    params = job.params_data
+    rows = vuln_scan.target_query(db, params.get("network_id"), params.get("os"), params.get("device_type")).all()
+    job.total = len(rows)
+    job.next_index = 0
+    job.live_count = 0
+    db.commit()
+
+    def progress(done: int, added: int) -> None:
+        job.next_index = done
+        job.live_count = added
+        db.commit()
+        job_runner.raise_if_cancelled(job)
+
+    return vuln_scan.autoscan(db, rows, progress)
+
+
+job_runner.register("vuln_autoscan", _run_vuln_autoscan_job)
+
+
+@fleet_router.post("/autoscan", response_model=ScanJobOut, status_code=202)
+def autoscan_fleet(payload: FleetAutoscanRequest, db: Session = Depends(get_db)):
+    """필터에 맞는 장비 전체를 백그라운드로 자동 스캔. 진행 상황은 /api/scan/jobs/{id} 로 조회."""
+    params = payload.model_dump(exclude_none=True)
+    return job_runner.enqueue(db, "vuln_autoscan", params=params)
@@ -108,10 +108,44 @@ class DeviceCreate(BaseModel):
     mac_address: Optional[str] = None
     os: Optional[str] = None
     device_type: Optional[str] = None
+    open_ports: Optional[str] = None
     status: Optional[str] = "active"
     network_id: int
 
 
+class DeviceBulkItem(BaseModel):
+    hostname: str
+    ip_address: str
+    mac_address: Optional[str] = None
+    os: Optional[str] = None
+    device_type: Optional[str] = None
+    open_ports: Optional[str] = None
+    status: Optional[str] = "active"
+    # network_id 또는 subnet 중 하나. subnet 에 해당하는 네트워크가 없으면 만든다.
+    network_id: Optional[int] = None
+    subnet: Optional[str] = None
+    network_name: Optional[str] = None  # 새로 만드는 네트워크 이름 (기본: subnet)
+
+
+class DeviceBulkRequest(BaseModel):
+    devices: List[DeviceBulkItem]
+    update_existing: bool = True  # False 면 기존 장비는 건드리지 않고 skipped
+
+
+class DeviceBulkRowResult(BaseModel):
+    index: int
+    action: str                   # created, updated, skipped
+    id: Optional[int] = None
+    reason: Optional[str] = None  # skipped 사유
+
+
+class DeviceBulkResult(BaseModel):
+    created: int
+    updated: int
+    skipped: int
+    rows: List[DeviceBulkRowResult]
+
+
 class DeviceOut(BaseModel):
     id: int
     hostname: str
@@ -120,6 +154,7 @@ class DeviceOut(BaseModel):
     vendor: Optional[str]
     os: Optional[str]
     device_type: Optional[str]
+    open_ports: Optional[str] = None
     status: str
     network_id: int
     device_solutions: List[DeviceSolutionOut] = []
@@ -139,6 +174,8 @@ class TopologyNode(BaseModel):
 
 class TopologyMeta(BaseModel):
     this_pc_device_id: Optional[int] = None  # 백엔드 서버가 돌아가는 PC의 device id
+    revision: Optional[int] = None           # 이 스냅샷의 리비전 — /api/topology/changes 의 since
+    epoch: Optional[str] = None              # DB 식별자 (DB 를 새로 만들면 바뀜)
 
 
 class TopologyEdge(BaseModel):
@@ -151,3 +188,14 @@ class TopologyOut(BaseModel):
     nodes: List[TopologyNode]
     edges: List[TopologyEdge]
     meta: Optional[TopologyMeta] = None
+
+
+class TopologyChanges(BaseModel):
+    """since 이후 바뀐 노드/엣지. reset 이면 델타를 만들 수 없으니 전체 topology 를 다시 받을 것."""
+    reset: bool = False
+    since: int
+    nodes: List[TopologyNode] = []        # 추가·변경된 노드 (같은 id 는 교체)
+    edges: List[TopologyEdge] = []
+    removed_nodes: List[str] = []
+    removed_edges: List[str] = []
+    meta: TopologyMeta
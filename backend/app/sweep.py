@@ -0,0 +1,229 @@
+"""
+ICMP ping sweep 백엔드.
+
+- IcmpSweeper: 소켓 하나로 echo request 를 일괄 전송하고, 단일 수신 루프에서
+  id/seq 로 응답을 매칭한다. 권한이 있으면 raw 소켓, 없으면 비특권
+  datagram ICMP 소켓(Linux ping_group_range / macOS)을 사용한다.
+- PingSweeper: 호스트마다 ping 프로세스를 띄우는 기존 방식. ICMP 소켓을 열 수
+  없는 환경(관리자 권한 없는 Windows 등)의 폴백.
+"""
+import concurrent.futures
+import errno
+import os
+import platform
+import select
+import socket
+import struct
+import subprocess
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+_ICMP_ECHO_REPLY = 0
+_ICMP_ECHO_REQUEST = 8
+_PAYLOAD = b"secvis-sweep"
+
+
+def _ping(ip: str) -> bool:
+    if platform.system() == "Windows":
+        cmd = ['ping', '-n', '1', '-w', '800', ip]
+    else:
+        cmd = ['ping', '-c', '1', '-W', '1', ip]
+    try:
+        r = subprocess.run(cmd, capture_output=True, timeout=5)
+        return r.returncode == 0
+    except Exception:
+        return False
+
+
+def _checksum(data: bytes) -> int:
+    if len(data) % 2:
+        data += b"\x00"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(ident: int, seq: int, payload: bytes = _PAYLOAD) -> bytes:
+    header = struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, 0, ident, seq)
+    csum = _checksum(header + payload)
+    return struct.pack("!BBHHH", _ICMP_ECHO_REQUEST, 0, csum, ident, seq) + payload
+
+
+def build_echo_reply(ident: int, seq: int, payload: bytes = _PAYLOAD) -> bytes:
+    header = struct.pack("!BBHHH", _ICMP_ECHO_REPLY, 0, 0, ident, seq)
+    csum = _checksum(header + payload)
+    return struct.pack("!BBHHH", _ICMP_ECHO_REPLY, 0, csum, ident, seq) + payload
+
+
+def parse_echo_reply(packet: bytes, raw: bool) -> Optional[Tuple[int, int]]:
+    """echo reply 이면 (id, seq) 반환. raw 소켓은 IP 헤더가 앞에 붙어 온다."""
+    if raw:
+        if not packet:
+            return None
+        packet = packet[(packet[0] & 0x0F) * 4:]
+    if len(packet) < 8:
+        return None
+    icmp_type, _code, _csum, ident, seq = struct.unpack("!BBHHH", packet[:8])
+    if icmp_type != _ICMP_ECHO_REPLY:
+        return None
+    return ident, seq
+
+
+def _open_icmp_socket() -> Tuple[socket.socket, bool]:
+    """(소켓, raw 여부). raw 실패 시 비특권 datagram ICMP 로 재시도."""
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+    except OSError:
+        pass
+    return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+
+
+class PingSweeper:
+    """호스트별 ping 서브프로세스를 스레드 풀로 실행 (폴백 백엔드)."""
+
+    name = "ping"
+
+    def __init__(self, max_workers: int = 64, rate: Optional[float] = None):
+        self.max_workers = max_workers
+        self.rate = rate  # 초당 최대 probe 수 (None = 제한 없음)
+
+    @staticmethod
+    def available() -> bool:
+        return True
+
+    def sweep(self, hosts: Iterable[str], on_live: Optional[Callable[[str], None]] = None) -> List[str]:
+        live: List[str] = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            interval = 1.0 / self.rate if self.rate else 0.0
+            next_send = time.monotonic()
+            future_to_ip = {}
+            for ip in hosts:
+                if interval:
+                    time.sleep(max(next_send - time.monotonic(), 0))
+                    next_send = max(next_send + interval, time.monotonic())
+                future_to_ip[pool.submit(_ping, ip)] = ip
+            for future in concurrent.futures.as_completed(future_to_ip):
+                try:
+                    if future.result():
+                        ip = future_to_ip[future]
+                        live.append(ip)
+                        if on_live:
+                            on_live(ip)
+                except Exception:
+                    pass
+        return live
+
+
+class IcmpSweeper:
+    """
+    단일 ICMP 소켓 기반 sweep.
+
+    전송과 수신을 한 루프에서 번갈아 처리한다. seq 는 호스트 순번(16bit),
+    id 는 프로세스별 식별자다. 비특권 datagram 소켓은 커널이 id 를 소켓 포트로
+    바꿔 쓰므로 id 대신 (송신 IP, seq) 로만 매칭한다.
+    """
+
+    name = "icmp"
+
+    def __init__(
+        self,
+        timeout: float = 0.8,
+        rate: Optional[float] = None,
+        sock_factory: Optional[Callable[[], Tuple[socket.socket, bool]]] = None,
+    ):
+        self.timeout = timeout
+        self.rate = rate  # 초당 최대 probe 수 (None = 제한 없음)
+        self._sock_factory = sock_factory or _open_icmp_socket
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            sock, _ = _open_icmp_socket()
+        except OSError:
+            return False
+        sock.close()
+        return True
+
+    def sweep(self, hosts: Iterable[str], on_live: Optional[Callable[[str], None]] = None) -> List[str]:
+        """
+        live 호스트 목록 반환. on_live 가 주어지면 응답이 도착하는 즉시
+        (sweep 스레드에서) 호출된다.
+        """
+        sock, raw = self._sock_factory()
+        ident = os.getpid() & 0xFFFF
+        pending: dict[int, str] = {}   # seq → ip
+        live: List[str] = []
+        try:
+            sock.setblocking(False)
+
+            def _drain(wait: float) -> None:
+                ready, _, _ = select.select([sock], [], [], max(wait, 0))
+                while ready:
+                    try:
+                        packet, addr = sock.recvfrom(2048)
+                    except (BlockingIOError, InterruptedError):
+                        return
+                    except OSError:
+                        # 소켓에 쌓인 ICMP 오류(EHOSTUNREACH 등) — 읽으면서 비워지므로 다음 패킷으로
+                        packet = None
+                    parsed = parse_echo_reply(packet, raw) if packet else None
+                    if parsed:
+                        r_ident, seq = parsed
+                        ip = pending.get(seq)
+                        if ip == addr[0] and (not raw or r_ident == ident):
+                            del pending[seq]
+                            live.append(ip)
+                            if on_live:
+                                on_live(ip)
+                    ready, _, _ = select.select([sock], [], [], 0)
+
+            interval = 1.0 / self.rate if self.rate else 0.0
+            next_send = time.monotonic()
+            for seq, ip in enumerate(hosts):
+                seq &= 0xFFFF
+                if interval:
+                    _drain(next_send - time.monotonic())
+                    next_send = max(next_send + interval, time.monotonic())
+                packet = build_echo_request(ident, seq)
+                for _attempt in range(3):
+                    try:
+                        sock.sendto(packet, (ip, 0))
+                        pending[seq] = ip
+                        break
+                    except BlockingIOError:
+                        _drain(0.005)
+                    except OSError as e:
+                        if e.errno == errno.ENOBUFS:
+                            _drain(0.005)
+                            continue
+                        break  # 경로 없음 등 — 해당 호스트만 건너뜀
+                if not interval and seq % 64 == 0:
+                    _drain(0)
+
+            deadline = time.monotonic() + self.timeout
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                _drain(remaining)
+        finally:
+            sock.close()
+        return live
+
+
+_BACKENDS = {"icmp": IcmpSweeper, "ping": PingSweeper}
+_default_backend: Optional[str] = None
+
+
+def get_sweeper(name: Optional[str] = None, **kwargs):
+    """
+    sweep 백엔드 인스턴스 반환.
+    name 미지정 시 ICMP 소켓을 열 수 있으면 icmp, 아니면 ping 폴백.
+    """
+    global _default_backend
+    if name is None:
+        if _default_backend is None:
+            _default_backend = "icmp" if IcmpSweeper.available() else "ping"
+        name = _default_backend
+    return _BACKENDS[name](**kwargs)
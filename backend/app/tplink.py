@@ -0,0 +1,235 @@
+"""
+TP-Link 라우터 (LuCI 기반 웹 관리, Archer 계열) HTTP API 클라이언트 — 브라우저 없이 로그인해
+cgi-bin API 응답을 직접 복호화한다.
+
+프로토콜 (웹 관리 페이지의 JS 와 동일):
+  1. login?form=keys  → 비밀번호 암호화용 RSA 공개키 [n, e]
+     login?form=auth  → 서명용 RSA 공개키 [n, e] 와 seq
+  2. 클라이언트가 16자리 숫자 AES 키·IV 를 만들고, 요청 본문을 AES-CBC(PKCS7)+base64 로 암호화
+  3. sign = RSA(PKCS#1 v1.5, 키 길이-11 바이트씩 나눠) "k=키&i=IV&h=md5(사용자+비밀번호)&s=seq+본문길이"
+     (로그인 이후 요청은 k, i 생략) — POST sign=…&data=…
+  4. 응답 {"data": base64} 를 같은 AES 키로 복호화. 로그인 응답의 stok 을 이후 URL 에 붙인다
+     (/cgi-bin/luci/;stok=…/admin/…). stok 이 만료되면 errorcode "timeout" 등을 돌려준다.
+
+stok 은 (URL, 비밀번호) 별로 보관해 만료 전까지 재사용한다.
+"""
+import base64
+import hashlib
+import http.cookiejar
+import json
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+# 클라이언트 목록을 돌려주는 API (펌웨어마다 있는 것이 다르므로 모두 시도)
+CLIENT_FORMS = (
+    ("admin/status", "client_status"),
+    ("admin/dhcps", "client"),
+    ("admin/smart_network", "game_accelerator"),
+)
+_EXPIRED_CODES = {"timeout", "-40401", "unauthorized", "permission denied"}
+
+
+class TplinkError(Exception):
+    pass
+
+
+class TplinkAuthError(TplinkError):
+    """비밀번호가 틀렸거나 로그인이 거부됨 — 브라우저 폴백으로도 해결되지 않는다"""
+
+
+class TplinkSessionExpired(TplinkError):
+    pass
+
+
+class TplinkNotFound(TplinkError):
+    """HTTP 404 — 이 펌웨어에 없는 API"""
+
+
+def _rsa_encrypt(data: bytes, n: int, e: int) -> str:
+    """PKCS#1 v1.5 로 (키 길이 - 11) 바이트씩 나눠 암호화한 16진 문자열"""
+    from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+    key = rsa.RSAPublicNumbers(e, n).public_key()
+    size = (n.bit_length() + 7) // 8
+    chunk = size - 11
+    return "".join(
+        key.encrypt(data[i:i + chunk], padding.PKCS1v15()).hex()
+        for i in range(0, len(data), chunk)
+    )
+
+
+class _Aes:
+    def __init__(self):
+        # 웹 페이지와 같은 형식: 16자리 숫자 문자열
+        self.key = "".join(secrets.choice("0123456789") for _ in range(16))
+        self.iv = "".join(secrets.choice("0123456789") for _ in range(16))
+
+    def _cipher(self):
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        return Cipher(algorithms.AES(self.key.encode()), modes.CBC(self.iv.encode()))
+
+    def encrypt(self, text: str) -> str:
+        from cryptography.hazmat.primitives import padding
+        padder = padding.PKCS7(128).padder()
+        raw = padder.update(text.encode()) + padder.finalize()
+        enc = self._cipher().encryptor()
+        return base64.b64encode(enc.update(raw) + enc.finalize()).decode()
+
+    def decrypt(self, text: str) -> str:
+        from cryptography.hazmat.primitives import padding
+        dec = self._cipher().decryptor()
+        raw = dec.update(base64.b64decode(text)) + dec.finalize()
+        unpadder = padding.PKCS7(128).unpadder()
+        return (unpadder.update(raw) + unpadder.finalize()).decode()
+
+
+class TplinkClient:
+    def __init__(self, base_url: str, password: str, username: str = "admin", timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.password = password
+        self.username = username
+        self.timeout = timeout
+        self.stok: Optional[str] = None
+        self.last_used = 0.0
+        self._aes: Optional[_Aes] = None
+        self._sign_key: Optional[Tuple[int, int]] = None
+        self._seq = 0
+        self._hash = hashlib.md5((username + password).encode()).hexdigest()
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        self._lock = threading.Lock()
+        self._unsupported: set = set()    # 이 라우터가 거부한 (path, form) — 다음부터 건너뜀
+
+    # ── HTTP ───────────────────────────────────────────────────────────────
+
+    def _url(self, path: str, form: str) -> str:
+        return f"{self.base_url}/cgi-bin/luci/;stok={self.stok or ''}/{path}?form={form}"
+
+    def _post(self, url: str, body: str) -> dict:
+        req = urllib.request.Request(
+            url, data=body.encode(), method="POST",
+            headers={"Content-Type": "application/x-www-form-urlencoded", "Referer": self.base_url + "/"},
+        )
+        try:
+            with self._opener.open(req, timeout=self.timeout) as resp:
+                raw = resp.read()
+        except urllib.error.HTTPError as e:
+            if e.code in (401, 403):
+                raise TplinkSessionExpired(f"HTTP {e.code}")
+            if e.code == 404:
+                raise TplinkNotFound(f"HTTP 404: {url}")
+            raise TplinkError(f"HTTP {e.code}: {url}")
+        except (urllib.error.URLError, OSError) as e:
+            raise TplinkError(f"라우터 연결 실패: {e}")
+        try:
+            return json.loads(raw)
+        except ValueError:
+            raise TplinkError(f"JSON 이 아닌 응답: {url}")
+
+    def _signed(self, path: str, form: str, data: str, login: bool = False) -> dict:
+        """AES 로 본문 암호화 + RSA 서명해 POST, 응답 복호화"""
+        enc = self._aes.encrypt(data)
+        n, e = self._sign_key
+        sign = f"h={self._hash}&s={self._seq + len(enc)}"
+        if login:
+            sign = f"k={self._aes.key}&i={self._aes.iv}&" + sign
+        body = f"sign={_rsa_encrypt(sign.encode(), n, e)}&data={urllib.parse.quote(enc, safe='')}"
+        resp = self._post(self._url(path, form), body)
+        if isinstance(resp.get("data"), str):
+            try:
+                resp = json.loads(self._aes.decrypt(resp["data"]))
+            except ValueError:
+                raise TplinkError("응답 복호화 실패")
+        code = str(resp.get("errorcode", "")).lower()
+        if not resp.get("success", True) and code in _EXPIRED_CODES:
+            raise TplinkSessionExpired(code)
+        return resp
+
+    # ── API ────────────────────────────────────────────────────────────────
+
+    def _public_key(self, form: str, field: str) -> dict:
+        resp = self._post(self._url("login", form), "operation=read")
+        data = resp.get("data") or {}
+        if not resp.get("success") or not data.get(field):
+            raise TplinkError(f"로그인 키 조회 실패 (form={form}) — 지원하지 않는 펌웨어")
+        return data
+
+    def login(self) -> str:
+        self.stok = None
+        pwd_n, pwd_e = self._public_key("keys", "password")["password"]
+        auth = self._public_key("auth", "key")
+        sign_n, sign_e = auth["key"]
+        self._sign_key = (int(sign_n, 16), int(sign_e, 16))
+        self._seq = int(auth.get("seq", 0))
+        self._aes = _Aes()
+
+        password = _rsa_encrypt(self.password.encode(), int(pwd_n, 16), int(pwd_e, 16))
+        resp = self._signed("login", "login", f"password={password}&operation=login&confirm=true", login=True)
+        stok = (resp.get("data") or {}).get("stok") if resp.get("success") else None
+        if not stok:
+            code = resp.get("errorcode") or (resp.get("data") or {}).get("errorcode") or "login failed"
+            raise TplinkAuthError(f"라우터 로그인 실패: {code}")
+        self.stok = stok
+        self.last_used = time.monotonic()
+        return stok
+
+    def read(self, path: str, form: str) -> dict:
+        """operation=read. 로그인 전이거나 stok 이 만료됐으면 한 번 로그인 후 재시도."""
+        with self._lock:
+            for attempt in (1, 2):
+                if not self.stok:
+                    self.login()
+                try:
+                    resp = self._signed(path, form, "operation=read")
+                    self.last_used = time.monotonic()
+                    return resp
+                except TplinkSessionExpired:
+                    self.stok = None
+                    if attempt == 2:
+                        raise
+
+    def client_payloads(self) -> List[dict]:
+        """
+        클라이언트 목록 API 응답들. 라우터가 거부한 form(HTTP 404, success=false)은 기억해 두고
+        다음부터 건너뛴다. 연결 실패·로그인 오류는 그대로 올려 호출자가 클라이언트를 버리게 한다.
+        """
+        payloads = []
+        for path, form in CLIENT_FORMS:
+            if (path, form) in self._unsupported:
+                continue
+            try:
+                resp = self.read(path, form)
+            except TplinkNotFound:
+                self._unsupported.add((path, form))
+                continue
+            if not resp.get("success", True):
+                self._unsupported.add((path, form))
+            elif resp.get("data"):
+                payloads.append(resp["data"])
+        return payloads
+
+
+_clients: Dict[Tuple[str, str], TplinkClient] = {}
+_clients_lock = threading.Lock()
+
+
+def client_payloads(base_url: str, password: str, timeout: float = 10.0) -> List[dict]:
+    """
+    클라이언트 목록 API 응답들. 로그인 상태(stok, 쿠키)는 (URL, 비밀번호) 별로 요청 간에 재사용하고,
+    로그인에 실패한 조합은 보관하지 않는다.
+    """
+    key = (base_url.rstrip("/"), hashlib.sha256(password.encode()).hexdigest())
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = TplinkClient(base_url, password, timeout=timeout)
+    try:
+        return client.client_payloads()
+    except TplinkError:
+        with _clients_lock:
+            _clients.pop(key, None)
+        raise
@@ -0,0 +1,215 @@
+"""
+취약점 규칙 컴파일러.
+
+규칙(vuln_rules.VULN_RULES 형식)을 한 번 컴파일해 두고 OS 문자열마다 재사용한다.
+  - 모든 match 패턴을 trie 로 묶어 lookahead 정규식 하나로 만든다. 정규식 엔진이 위치마다
+    trie 를 따라가며 가장 긴 패턴을 찾으므로 패턴 수가 늘어도 문자열을 한 번만 훑는다.
+    한 위치에서 맞는 패턴들은 모두 가장 긴 것의 접두사이므로, 패턴마다 "접두사인 다른
+    패턴" 목록을 미리 구해 두면 겹치는 패턴("cisco ios" / "cisco ios xe")도 빠짐없이 찾는다.
+  - device_types 는 장비 종류 → 허용 규칙 집합 인덱스로 바꾼다.
+  - "versions": ">=17.3,<17.9" 처럼 버전 범위를 줄 수 있다. 버전은 OS 문자열에서 맞은
+    패턴 바로 뒤의 첫 숫자열(17.6.1 등)이며, 버전을 찾지 못하면 그 규칙은 맞지 않는 것으로 본다.
+
+규칙 파일: 환경 변수 VULN_RULES_FILE 에 JSON(규칙 목록) 경로를 주면 내장 규칙 대신
+그 파일을 쓰고, 파일 수정 시각이 바뀌면 다음 조회 때 다시 컴파일한다. 새 파일이 잘못되었으면
+기존 규칙을 유지한다.
+"""
+import json
+import logging
+import operator
+import os
+import re
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .vuln_rules import VULN_RULES, normalize_os
+
+logger = logging.getLogger(__name__)
+
+_VERSION = re.compile(r"\d+(?:\.\d+)*")
+_CLAUSE = re.compile(r"\s*(>=|<=|==|!=|>|<)\s*(\d+(?:\.\d+)*)\s*")
+_OPS = {">=": operator.ge, "<=": operator.le, "==": operator.eq, "!=": operator.ne, ">": operator.gt, "<": operator.lt}
+
+
+def parse_version(text: str) -> tuple:
+    return tuple(int(part) for part in text.split("."))
+
+
+def _padded(a: tuple, b: tuple) -> Tuple[tuple, tuple]:
+    width = max(len(a), len(b))
+    return a + (0,) * (width - len(a)), b + (0,) * (width - len(b))
+
+
+def parse_spec(spec: str) -> list:
+    """">=17.3,<17.9" → [(operator.ge, (17, 3)), (operator.lt, (17, 9))]"""
+    clauses = []
+    for clause in spec.split(","):
+        m = _CLAUSE.fullmatch(clause)
+        if not m:
+            raise ValueError(f"잘못된 버전 조건: {spec!r}")
+        clauses.append((_OPS[m.group(1)], parse_version(m.group(2))))
+    return clauses
+
+
+def version_satisfies(version: tuple, clauses: list) -> bool:
+    return all(op(*_padded(version, bound)) for op, bound in clauses)
+
+
+def version_after(os_norm: str, end: int) -> Optional[tuple]:
+    """패턴이 끝난 위치 뒤의 첫 버전 숫자열"""
+    m = _VERSION.search(os_norm, end)
+    return parse_version(m.group(0)) if m else None
+
+
+def _trie_pattern(patterns) -> str:
+    """문자열 목록 → 같은 접두사를 공유하는 정규식 (가장 긴 일치 우선)"""
+    trie: dict = {}
+    for pattern in patterns:
+        node = trie
+        for ch in pattern:
+            node = node.setdefault(ch, {})
+        node[None] = True
+
+    def build(node: dict) -> str:
+        alts = [re.escape(ch) + build(child) for ch, child in sorted((k, v) for k, v in node.items() if k is not None)]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        return f"(?:{body})?" if None in node else body
+
+    return build(trie)
+
+
+def _validate(rules: list) -> list:
+    """규칙 형식 확인 + 패턴 정규화. 잘못된 규칙이 있으면 ValueError."""
+    if not isinstance(rules, list):
+        raise ValueError("규칙 파일은 규칙 목록(JSON 배열)이어야 합니다")
+    checked = []
+    for i, rule in enumerate(rules):
+        patterns = rule.get("match") if isinstance(rule, dict) else None
+        if not isinstance(patterns, list) or not patterns or not all(isinstance(p, str) and p.strip() for p in patterns):
+            raise ValueError(f"규칙 {i}: match 는 비어 있지 않은 문자열 목록이어야 합니다")
+        vulns = rule.get("vulns") or []
+        if not all(isinstance(v, dict) and v.get("cve_id") and v.get("title") for v in vulns):
+            raise ValueError(f"규칙 {i}: vulns 항목에는 cve_id, title 이 필요합니다")
+        checked.append({
+            "match": [normalize_os(p) for p in patterns],
+            "device_types": rule.get("device_types") or None,
+            "versions": parse_spec(rule["versions"]) if rule.get("versions") else None,
+            "vulns": [{
+                "cve_id": v["cve_id"],
+                "title": v["title"],
+                "severity": v.get("severity", "medium"),
+                "description": v.get("description", ""),
+            } for v in vulns],
+        })
+    return checked
+
+
+class CompiledRules:
+    def __init__(self, rules: list, source: str = "builtin"):
+        self.rules = _validate(rules)
+        self.source = source
+        self.loaded_at = time.time()
+
+        self._by_pattern: Dict[str, List[int]] = {}
+        self._any: List[int] = []
+        self._by_type: Dict[str, List[int]] = {}
+        for idx, rule in enumerate(self.rules):
+            for pattern in rule["match"]:
+                self._by_pattern.setdefault(pattern, []).append(idx)
+            if rule["device_types"]:
+                for dtype in rule["device_types"]:
+                    self._by_type.setdefault(dtype, []).append(idx)
+            else:
+                self._any.append(idx)
+        self._allowed: Dict[str, FrozenSet[int]] = {}
+
+        # 패턴 → 같은 위치에서 함께 맞는 (접두사인) 패턴들의 (길이, 규칙 번호)
+        self._covers: Dict[str, Tuple[Tuple[int, int], ...]] = {
+            p: tuple(
+                (k, idx) for k in range(1, len(p) + 1) if p[:k] in self._by_pattern for idx in self._by_pattern[p[:k]]
+            )
+            for p in self._by_pattern
+        }
+        self._regex = re.compile("(?=(" + _trie_pattern(self._by_pattern) + "))") if self._by_pattern else None
+        self.match = lru_cache(maxsize=8192)(self._match)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _allowed_for(self, device_type: str) -> FrozenSet[int]:
+        allowed = self._allowed.get(device_type)
+        if allowed is None:
+            allowed = self._allowed[device_type] = frozenset(self._any) | frozenset(self._by_type.get(device_type, ()))
+        return allowed
+
+    def _match(self, os_norm: str, device_type: str = "") -> tuple:
+        """정규화된 OS 문자열·장비 종류에 해당하는 취약점 (규칙 순서, CVE 중복 제거)"""
+        if self._regex is None or not os_norm:
+            return ()
+        allowed = self._allowed_for(device_type)
+        ends: Dict[int, List[int]] = {}     # 규칙 번호 → 패턴이 끝난 위치들
+        for m in self._regex.finditer(os_norm):
+            start = m.start()
+            for length, idx in self._covers[m.group(1)]:
+                if idx in allowed:
+                    ends.setdefault(idx, []).append(start + length)
+
+        matched, seen = [], set()
+        for idx in sorted(ends):
+            rule = self.rules[idx]
+            if rule["versions"]:
+                versions = (version_after(os_norm, end) for end in ends[idx])
+                if not any(v is not None and version_satisfies(v, rule["versions"]) for v in versions):
+                    continue
+            for vuln in rule["vulns"]:
+                if vuln["cve_id"] not in seen:
+                    seen.add(vuln["cve_id"])
+                    matched.append(vuln)
+        return tuple(matched)
+
+
+class VulnRuleEngine:
+    def __init__(self, path: Optional[str] = None, check_interval: float = 2.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._compiled = CompiledRules(VULN_RULES)
+        if path:
+            try:
+                self._reload()
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning("규칙 파일 로드 실패, 내장 규칙 사용: %s", e)
+
+    def _reload(self) -> None:
+        # 실패해도 같은 파일을 반복해서 읽지 않도록 수정 시각은 먼저 기록
+        self._mtime = os.stat(self.path).st_mtime
+        with open(self.path, encoding="utf-8") as f:
+            rules = json.load(f)
+        self._compiled = CompiledRules(rules, source=self.path)
+
+    def current(self) -> CompiledRules:
+        """컴파일된 규칙. 규칙 파일이 바뀌었으면 (최대 check_interval 초마다 확인) 다시 컴파일."""
+        if not self.path:
+            return self._compiled
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                try:
+                    if os.stat(self.path).st_mtime != self._mtime:
+                        self._reload()
+                except (OSError, ValueError, TypeError) as e:
+                    logger.warning("규칙 파일 다시 읽기 실패, 기존 규칙 유지: %s", e)
+            return self._compiled
+
+    def match(self, os_name: Optional[str], device_type: Optional[str] = None) -> tuple:
+        return self.current().match(normalize_os(os_name), device_type or "")
+
+
+rule_engine = VulnRuleEngine(os.environ.get("VULN_RULES_FILE"))
@@ -112,3 +112,8 @@ VULN_RULES = [
         ],
     },
 ]
+
+
+def normalize_os(os: str) -> str:
+    """OS 문자열 정규화 — 같은 OS 의 표기 차이(대소문자·공백)를 하나로 묶는다"""
+    return " ".join((os or "").lower().split())
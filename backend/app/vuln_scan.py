@@ -0,0 +1,96 @@
+"""
+취약점 자동 스캔 (집합 단위).
+
+장비를 정규화 OS 문자열·장비 종류로 묶어 규칙 매칭은 조합마다 한 번만 하고,
+배치마다 기존 (장비, CVE) 쌍을 쿼리 한 번으로 읽은 뒤 새 취약점을 일괄 INSERT 한다.
+장비 한 대 자동 스캔과 전체 장비 자동 스캔(백그라운드 작업)이 같은 경로를 쓴다.
+"""
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .models import Device, DeviceVulnerability
+from .vuln_engine import rule_engine
+from .vuln_rules import normalize_os
+
+BATCH_SIZE = 500
+
+
+def target_query(db: Session, network_id: Optional[int] = None, os: Optional[str] = None,
+                 device_type: Optional[str] = None):
+    """자동 스캔 대상 장비의 (id, os, device_type) — id 순"""
+    q = db.query(Device.id, Device.os, Device.device_type).filter(Device.os.isnot(None), Device.os != "")
+    if network_id is not None:
+        q = q.filter(Device.network_id == network_id)
+    if os:
+        q = q.filter(Device.os.ilike(f"%{os}%"))
+    if device_type:
+        q = q.filter(Device.device_type == device_type)
+    return q.order_by(Device.id)
+
+
+def autoscan(
+    db: Session,
+    rows: Iterable[Tuple[int, Optional[str], Optional[str]]],
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> dict:
+    """
+    rows: (장비 id, os, device_type). 배치마다 INSERT 후 커밋하고 progress(처리 장비 수, 추가 수) 호출.
+    반환: {"devices", "os_groups", "added", "skipped"}
+    """
+    rules = rule_engine.current()   # 한 번의 스캔 동안 같은 규칙 사용
+    matches: Dict[Tuple[str, str], tuple] = {}
+    stats = {"devices": 0, "os_groups": 0, "added": 0, "skipped": 0}
+
+    def flush(batch: list) -> None:
+        targets = []
+        for device_id, os, device_type in batch:
+            key = (normalize_os(os), device_type or "")
+            if key not in matches:
+                matches[key] = rules.match(*key)
+            if matches[key]:
+                targets.append((device_id, matches[key]))
+
+        existing = set()
+        if targets:
+            existing = set(
+                db.query(DeviceVulnerability.device_id, DeviceVulnerability.cve_id)
+                .filter(
+                    DeviceVulnerability.device_id.in_([device_id for device_id, _ in targets]),
+                    DeviceVulnerability.cve_id.isnot(None),
+                )
+                .all()
+            )
+        new_rows = []
+        for device_id, vulns in targets:
+            for vuln in vulns:
+                if (device_id, vuln["cve_id"]) in existing:
+                    stats["skipped"] += 1
+                    continue
+                new_rows.append({
+                    "device_id": device_id,
+                    "cve_id": vuln["cve_id"],
+                    "title": vuln["title"],
+                    "severity": vuln["severity"],
+                    "description": vuln["description"],
+                    "status": "open",
+                })
+        if new_rows:
+            db.execute(insert(DeviceVulnerability), new_rows)
+        stats["added"] += len(new_rows)
+        stats["devices"] += len(batch)
+        db.commit()
+        if progress:
+            progress(stats["devices"], stats["added"])
+
+    batch: list = []
+    for row in rows:
+        batch.append(tuple(row))
+        if len(batch) >= BATCH_SIZE:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    stats["os_groups"] = len(matches)
+    return stats
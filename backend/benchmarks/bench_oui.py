@@ -0,0 +1,92 @@
+"""
+OUI 제조사 조회 벤치마크 — MAC 100만 개를 한 개씩(oui.lookup) / 일괄(oui.lookup_many)로 조회.
+
+--index 를 주면 그 인덱스 파일(python -m app.oui_index 로 만든 것)을, 주지 않으면 합성 IEEE
+레지스트리(MA-L 3.8만 + MA-M 6천 + MA-S 6천)로 임시 인덱스를 만들어 쓴다. --builtin 은
+인덱스 없이 내장 목록으로 측정한다. 두 방식의 결과가 다르면 종료 코드 1.
+
+    python benchmarks/bench_oui.py [--macs 1000000] [--distinct 200000] [--index data/oui.bin | --builtin]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+
+def synthetic_index(path: str, rng: random.Random) -> list:
+    """합성 레지스트리로 인덱스 파일 생성. 등록된 24비트 접두사 목록 반환 (MAC 생성용)."""
+    from app.oui_index import write_index
+    prefixes = {}
+    for i in range(38000):
+        prefixes[(24, rng.randrange(1 << 24) & ~0x020000)] = f"Vendor {i % 30000} Co., Ltd."
+    for i in range(6000):
+        prefixes[(28, rng.randrange(1 << 28) & ~0x0200000)] = f"MA-M Vendor {i}"
+    for i in range(6000):
+        prefixes[(36, rng.randrange(1 << 36) & ~0x020000000)] = f"MA-S Vendor {i}"
+    write_index(prefixes, path)
+    return [p for bits, p in prefixes if bits == 24]
+
+
+def make_macs(count: int, distinct: int, registered: list, rng: random.Random) -> list:
+    pool = []
+    for _ in range(distinct):
+        roll = rng.random()
+        if roll < 0.6 and registered:
+            value = (rng.choice(registered) << 24) | rng.randrange(1 << 24)
+        else:
+            value = rng.randrange(1 << 48)      # 일부는 랜덤(로컬 관리) MAC·미등록
+        raw = f"{value:012X}"
+        sep = rng.choice((":", "-", ""))
+        pool.append(sep.join(raw[i:i + 2] for i in range(0, 12, 2)) if sep else raw.lower())
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--macs", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=200_000, help="서로 다른 MAC 수")
+    parser.add_argument("--index", help="사용할 인덱스 파일")
+    parser.add_argument("--builtin", action="store_true", help="인덱스 없이 내장 목록")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registered: list = []
+        if args.builtin:
+            os.environ["OUI_INDEX_FILE"] = os.path.join(tmp, "missing.bin")
+        elif args.index:
+            os.environ["OUI_INDEX_FILE"] = args.index
+        else:
+            os.environ["OUI_INDEX_FILE"] = os.path.join(tmp, "oui.bin")
+            registered = synthetic_index(os.environ["OUI_INDEX_FILE"], rng)
+
+        from app import oui     # OUI_INDEX_FILE 설정 후 임포트
+        if args.builtin:
+            registered = [int(k.replace(":", ""), 16) for k in oui._OUI]
+        macs = make_macs(args.macs, args.distinct, registered, rng)
+        oui.lookup(macs[0])     # 인덱스 파일 열기는 측정에서 제외
+
+        t0 = time.perf_counter()
+        single = [oui.lookup(m) for m in macs]
+        single_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = oui.lookup_many(macs)
+        batch_s = time.perf_counter() - t0
+
+        source = "내장 목록" if oui._get_index() is None else os.environ["OUI_INDEX_FILE"]
+        print(f"MAC {len(macs)}개 (서로 다른 {len(set(macs))}개), 제조사 확인 {sum(1 for v in batch if v)}개 — {source}")
+        print(f"{'lookup (1개씩)':<18} {single_s:7.2f} s  {single_s / len(macs) * 1e6:6.2f} µs/건")
+        print(f"{'lookup_many':<18} {batch_s:7.2f} s  {batch_s / len(macs) * 1e6:6.2f} µs/건  ({single_s / batch_s:.1f}배)")
+        mismatches = sum(a != b for a, b in zip(single, batch))
+        print(f"결과 불일치 {mismatches}건")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
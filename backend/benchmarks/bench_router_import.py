@@ -0,0 +1,91 @@
+"""
+라우터 클라이언트 가져오기 — 직접 HTTP API (app.tplink) vs 헤드리스 브라우저 경로 지연 비교.
+로컬 mock 라우터(benchmarks/mock_tplink.py)를 띄워 측정하며, 결과 목록·stok 만료 후 재로그인·
+잘못된 비밀번호 처리를 함께 확인한다 (하나라도 틀리면 종료 코드 1).
+
+브라우저 경로는 playwright 와 Chromium 이 설치되어 있을 때만 측정한다.
+
+    python benchmarks/bench_router_import.py [--runs 20] [--clients 30] [--latency 0.02]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mock_tplink import MockRouter, serve
+
+from app import tplink
+from app.routers.router_import import _dedup, _extract_clients, _scrape_tplink, router_sessions
+
+
+def direct(url: str, password: str) -> list:
+    return _dedup([c for p in tplink.client_payloads(url, password) for c in _extract_clients(p)])
+
+
+def measure(label: str, fn, runs: int, reset=None) -> list:
+    times, result = [], []
+    for _ in range(runs):
+        if reset:
+            reset()
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    print(f"{label:<26} p50={statistics.median(times) * 1000:8.1f} ms  max={max(times) * 1000:8.1f} ms  ({runs}회)")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.02, help="mock 라우터 요청당 지연 (초)")
+    args = parser.parse_args()
+
+    router = MockRouter(password="secret", clients=args.clients, latency=args.latency)
+    server = serve(router)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    expected = sorted(row["ipaddr"] for rows in router.clients.values() for row in rows)
+    failures = []
+
+    def check(label: str, clients: list) -> None:
+        if sorted(c["ip_address"] for c in clients) != expected:
+            failures.append(label)
+
+    check("direct cold", measure("직접 API (매번 로그인)", lambda: direct(url, "secret"), args.runs, tplink._clients.clear))
+    check("direct warm", measure("직접 API (stok 재사용)", lambda: direct(url, "secret"), args.runs))
+
+    # stok 만료 → 자동 재로그인
+    logins = router.logins
+    router.sessions.clear()
+    check("direct expired", direct(url, "secret"))
+    if router.logins != logins + 1:
+        failures.append("re-login after expiry")
+
+    try:
+        direct(url, "wrong")
+        failures.append("wrong password accepted")
+    except tplink.TplinkAuthError:
+        pass
+
+    try:
+        import playwright  # noqa: F401
+        check("browser cold", measure("브라우저 (첫 실행)", lambda: _scrape_tplink("secret", url), 1))
+        check("browser warm", measure("브라우저 (세션 재사용)", lambda: _scrape_tplink("secret", url), args.runs))
+    except ImportError:
+        print("브라우저 경로: playwright 미설치 — 건너뜀")
+    except Exception as e:
+        print(f"브라우저 경로: 실행 불가 — 건너뜀 ({str(e).splitlines()[0]})")
+    finally:
+        router_sessions.shutdown()
+
+    server.shutdown()
+    print("확인 실패: " + ", ".join(failures) if failures else "결과 확인 통과")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
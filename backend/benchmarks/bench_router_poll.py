@@ -0,0 +1,121 @@
+"""
+여러 라우터 클라이언트 가져오기 — 한 대씩 조회·반영(기존 /api/router/clients + /api/devices/bulk 흐름)과
+RouterPoller 동시 조회 + upsert_devices 한 번을 비교한다.
+
+mock TP-Link 라우터(benchmarks/mock_tplink.py) N대를 띄우고, 라우터마다 서로 다른 클라이언트와
+서브넷을 준다. 두 방식 모두 매번 새로 로그인하며(stok 캐시 비움) 빈 SQLite DB 에서 시작한다.
+반영된 장비 수가 다르면 종료 코드 1.
+
+    python benchmarks/bench_router_poll.py [--routers 24] [--clients 40] [--latency 0.05] [--concurrency 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy.orm import sessionmaker
+
+from mock_tplink import MockRouter, serve
+
+from app import tplink
+from app.database import Base, create_db_engine
+from app.device_import import upsert_devices
+from app.models import Device
+from app.router_adapters import RouterPoller, make_adapter
+from app.routers.router_import import _bulk_items, router_sessions
+
+
+def branch_clients(branch: int, count: int) -> dict:
+    rows = [{
+        "hostname": f"b{branch}-client-{i}",
+        "ipaddr": f"10.{branch}.0.{10 + i}",
+        "macaddr": f"02-00-00-{branch:02X}-00-{i:02X}",
+    } for i in range(count)]
+    return {"access_devices_wired": rows[::2], "access_devices_wireless": rows[1::2]}
+
+
+def fresh_db(path: str):
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine, autoflush=False)
+
+
+def sequential(targets: list, Session) -> float:
+    tplink._clients.clear()
+    t0 = time.perf_counter()
+    for target in targets:
+        clients = make_adapter("tplink", target["url"], "secret").fetch_clients()
+        db = Session()
+        try:
+            upsert_devices(db, _bulk_items(target, clients))
+            db.commit()
+        finally:
+            db.close()
+    return time.perf_counter() - t0
+
+
+def concurrent(targets: list, Session, poller: RouterPoller) -> float:
+    tplink._clients.clear()
+    t0 = time.perf_counter()
+    results = poller.poll_sync([make_adapter("tplink", t["url"], "secret") for t in targets])
+    failed = [r["error"] for r in results if r["error"]]
+    if failed:
+        raise SystemExit(f"조회 실패: {failed[0]}")
+    db = Session()
+    try:
+        upsert_devices(db, [item for t, r in zip(targets, results) for item in _bulk_items(t, r["clients"])])
+        db.commit()
+    finally:
+        db.close()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--routers", type=int, default=24)
+    parser.add_argument("--clients", type=int, default=40, help="라우터당 클라이언트 수")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock 라우터 요청당 지연 (초)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    servers, targets = [], []
+    for b in range(args.routers):
+        router = MockRouter(password="secret", clients=0, latency=args.latency)
+        router.clients = branch_clients(b, args.clients)
+        server = serve(router)
+        servers.append(server)
+        targets.append({"url": f"http://127.0.0.1:{server.server_address[1]}", "subnet": f"10.{b}.0.0/24"})
+    expected = args.routers * args.clients
+    poller = RouterPoller(concurrency=args.concurrency)
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, run in (
+            ("한 대씩 조회·반영", lambda S: sequential(targets, S)),
+            (f"동시 조회(x{args.concurrency}) + 일괄 반영", lambda S: concurrent(targets, S, poller)),
+        ):
+            engine, Session = fresh_db(os.path.join(tmp, "bench.db"))
+            elapsed = run(Session)
+            db = Session()
+            count = db.query(Device).count()
+            db.close()
+            engine.dispose()
+            print(f"{label:<26} {elapsed:7.2f} s  라우터당 {elapsed / args.routers * 1000:7.1f} ms  장비 {count}개")
+            if count != expected:
+                failures.append(label)
+
+    router_sessions.shutdown()
+    for server in servers:
+        server.shutdown()
+    print(f"확인 실패: {', '.join(failures)} (기대 {expected}개)" if failures else "결과 확인 통과")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Sweep 백엔드 벤치마크 — ping 프로세스 방식 vs 단일 ICMP 소켓 방식의 hosts/sec 비교.
+
+로컬 가짜 응답기(FakeResponder)는 ICMP 소켓을 흉내 내어, 전송된 echo request 중
+live 집합에 속한 IP 에 대해 즉시 echo reply 를 돌려준다. ping 백엔드는 실제
+프로세스를 띄워야 하므로 루프백(127.0.0.0/8, 커널이 모두 응답)을 대상으로 한다.
+
+    python benchmarks/bench_sweep.py [--hosts 254] [--live-ratio 0.3]
+"""
+import argparse
+import ipaddress
+import os
+import shutil
+import socket
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.sweep import IcmpSweeper, PingSweeper, build_echo_reply
+
+
+class FakeResponder:
+    """ICMP 소켓 인터페이스(sendto/recvfrom/fileno)를 흉내 내는 로컬 응답기."""
+
+    def __init__(self, live: set, raw: bool = True):
+        self.live = live
+        self.raw = raw
+        self._rx, self._tx = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def factory(self):
+        return self, self.raw
+
+    def setblocking(self, flag):
+        self._rx.setblocking(flag)
+
+    def fileno(self):
+        return self._rx.fileno()
+
+    def sendto(self, packet, addr):
+        ip = addr[0]
+        if ip not in self.live:
+            return len(packet)
+        ident, seq = struct.unpack("!HH", packet[4:8])
+        reply = build_echo_reply(ident, seq, packet[8:])
+        if self.raw:
+            # 최소 IPv4 헤더(IHL=5) — parse_echo_reply 는 IHL 만 본다
+            reply = bytes([0x45]) + bytes(19) + reply
+        self._tx.send(socket.inet_aton(ip) + reply)
+        return len(packet)
+
+    def recvfrom(self, size):
+        data = self._rx.recv(size + 4)
+        return data[4:], (socket.inet_ntoa(data[:4]), 0)
+
+    def close(self):
+        self._rx.close()
+        self._tx.close()
+
+
+def _bench(label, sweeper, hosts, expected):
+    start = time.perf_counter()
+    live = sweeper.sweep(hosts)
+    elapsed = time.perf_counter() - start
+    rate = len(hosts) / elapsed if elapsed else float("inf")
+    print(f"{label:<28} hosts={len(hosts):>6} live={len(live):>6}/{expected:<6} "
+          f"{elapsed:8.3f}s  {rate:10.1f} hosts/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=254)
+    parser.add_argument("--live-ratio", type=float, default=0.3)
+    parser.add_argument("--skip-ping", action="store_true", help="ping 프로세스 백엔드 생략")
+    args = parser.parse_args()
+
+    net = ipaddress.ip_network("10.0.0.0/8")
+    hosts = [str(ip) for _, ip in zip(range(args.hosts), net.hosts())]
+    step = max(1, round(1 / args.live_ratio)) if args.live_ratio > 0 else 0
+    live = set(hosts[::step]) if step else set()
+
+    fake = FakeResponder(live)
+    _bench("icmp (fake responder)", IcmpSweeper(timeout=0.2, sock_factory=fake.factory), hosts, len(live))
+
+    loopback = [str(ip) for _, ip in zip(range(args.hosts), ipaddress.ip_network("127.0.0.0/8").hosts())]
+    if IcmpSweeper.available():
+        _bench("icmp (loopback)", IcmpSweeper(timeout=0.5), loopback, len(loopback))
+    else:
+        print("icmp (loopback)              ICMP 소켓 사용 불가 — 생략")
+    if args.skip_ping:
+        return
+    if shutil.which("ping"):
+        _bench("ping subprocess (loopback)", PingSweeper(), loopback, len(loopback))
+    else:
+        print("ping subprocess (loopback)   ping 명령 없음 — 생략")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+취약점 규칙 매칭 마이크로벤치마크 — OS 문자열 10만 개를 내장 규칙 + 합성 규칙
+(벤더/제품/버전 범위, CPE 피드에서 가져온 규칙을 흉내)으로 매칭한다.
+
+  naive     규칙마다 any(p in os for p in match) — 예전 방식. 느리므로 표본만 돌려 환산
+  compiled  app.vuln_engine.CompiledRules (캐시 없이 매번 매칭)
+  cached    같은 OS 문자열 결과를 재사용 (실제 자동 스캔 경로)
+
+표본에서 naive 와 compiled 결과가 다르면 종료 코드 1.
+
+    python benchmarks/bench_vuln_rules.py [--rules 3000] [--strings 100000] [--naive-sample 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.vuln_engine import CompiledRules, version_after, version_satisfies
+from app.vuln_rules import VULN_RULES, normalize_os
+
+_DEVICE_TYPES = ["", "router", "switch", "workstation", "server", "firewall"]
+
+
+def synthetic_rules(count: int, rng: random.Random) -> list:
+    rules = []
+    for i in range(count):
+        vendor, product = f"vendor{i % 400}", f"product{i}"
+        low = rng.randint(1, 20)
+        rules.append({
+            "match": [f"{vendor} {product}", f"{product}-os"],
+            "device_types": rng.choice([None, None, ["router", "switch"], ["server"]]),
+            "versions": f">={low}.0,<{low + rng.randint(1, 5)}.{rng.randint(0, 9)}",
+            "vulns": [{"cve_id": f"CVE-2099-{i:05d}", "title": f"{product} 취약점", "severity": "high"}],
+        })
+    return rules
+
+
+def os_strings(count: int, rules: int, rng: random.Random) -> list:
+    builtin = ["Windows 10 Pro", "Windows Server 2019", "Ubuntu 22.04 LTS", "Cisco IOS XE 17.6.1",
+               "FortiOS 7.2.4", "macOS 14.2", "PAN-OS 10.2", "Linux 5.15", "Android 14", "unknown"]
+    out = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.3:
+            out.append(rng.choice(builtin))
+        else:
+            i = rng.randrange(rules * 2)   # 절반은 규칙에 없는 제품
+            version = f"{rng.randint(0, 25)}.{rng.randint(0, 9)}.{rng.randint(0, 20)}"
+            out.append(f"Vendor{i % 400} Product{i} {version}" if roll < 0.8 else f"product{i}-OS v{version} build")
+    return out
+
+
+def naive_match(rules: list, os_norm: str, device_type: str) -> tuple:
+    """예전 방식(규칙마다 부분 문자열 검사) + 버전 조건 — 정답 비교용"""
+    matched, seen = [], set()
+    for rule in rules:
+        ends = []
+        for p in rule["match"]:
+            start = os_norm.find(p)
+            while start != -1:
+                ends.append(start + len(p))
+                start = os_norm.find(p, start + 1)
+        if not ends:
+            continue
+        if rule["device_types"] and device_type not in rule["device_types"]:
+            continue
+        versions = (version_after(os_norm, end) for end in ends)
+        if rule["versions"] and not any(v is not None and version_satisfies(v, rule["versions"]) for v in versions):
+            continue
+        for vuln in rule["vulns"]:
+            if vuln["cve_id"] not in seen:
+                seen.add(vuln["cve_id"])
+                matched.append(vuln)
+    return tuple(matched)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", type=int, default=3000, help="합성 규칙 수 (내장 규칙에 추가)")
+    parser.add_argument("--strings", type=int, default=100_000)
+    parser.add_argument("--naive-sample", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    t0 = time.perf_counter()
+    compiled = CompiledRules(VULN_RULES + synthetic_rules(args.rules, rng))
+    compile_ms = (time.perf_counter() - t0) * 1000
+    inputs = [(normalize_os(s), rng.choice(_DEVICE_TYPES)) for s in os_strings(args.strings, args.rules, rng)]
+    print(f"규칙 {len(compiled)}개 컴파일 {compile_ms:.1f} ms, OS 문자열 {len(inputs)}개 "
+          f"(서로 다른 조합 {len(set(inputs))}개)")
+
+    sample = inputs[:args.naive_sample]
+    t0 = time.perf_counter()
+    expected = [naive_match(compiled.rules, os_norm, dtype) for os_norm, dtype in sample]
+    naive_per = (time.perf_counter() - t0) / max(len(sample), 1)
+
+    t0 = time.perf_counter()
+    hits = sum(bool(compiled._match(os_norm, dtype)) for os_norm, dtype in inputs)
+    compiled_s = time.perf_counter() - t0
+
+    compiled.match.cache_clear()
+    t0 = time.perf_counter()
+    for os_norm, dtype in inputs:
+        compiled.match(os_norm, dtype)
+    cached_s = time.perf_counter() - t0
+
+    print(f"{'naive (환산)':<14} {naive_per * len(inputs):8.2f} s  {naive_per * 1e6:8.1f} µs/건  (표본 {len(sample)}건)")
+    print(f"{'compiled':<14} {compiled_s:8.2f} s  {compiled_s / len(inputs) * 1e6:8.1f} µs/건  매칭 {hits}건")
+    print(f"{'cached':<14} {cached_s:8.2f} s  {cached_s / len(inputs) * 1e6:8.1f} µs/건")
+
+    mismatches = sum(compiled._match(os_norm, dtype) != want for (os_norm, dtype), want in zip(sample, expected))
+    print(f"naive 와 결과 비교: 표본 {len(sample)}건 중 불일치 {mismatches}건")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+핫 쿼리 인덱스 사용 확인 — 실제 코드 경로(identity.load, BT poller, 장비 목록 필터,
+장비별 취약점·솔루션 조회)가 실행하는 SQL 을 가로채 SQLite EXPLAIN QUERY PLAN 으로
+기대한 인덱스를 쓰는지 확인한다. 하나라도 전체 스캔이면 종료 코드 1.
+
+    python benchmarks/explain_indexes.py [--devices 5000] [-v]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.bt_presence import BluetoothPoller, FakeProvider
+from app.database import Base, create_db_engine
+from app.identity import DeviceIdentityIndex
+from app.models import Device, DeviceSolution, DeviceVulnerability, Network, SecuritySolution
+from app.routers.devices import _device_listing
+from app.routers.solutions import list_device_solutions
+from app.routers.vulnerabilities import list_vulnerabilities
+
+
+def seed(db, devices: int) -> None:
+    nets = [Network(name=f"net{i}", subnet=f"10.{i}.0.0/16") for i in range(20)]
+    bt = Network(name="Bluetooth", subnet="bluetooth")
+    sol = SecuritySolution(name="AV", type="antivirus")
+    db.add_all(nets + [bt, sol])
+    db.flush()
+    for i in range(devices):
+        mac = f"00:1A:{i >> 16 & 255:02X}:{i >> 8 & 255:02X}:{i & 255:02X}:01"
+        if i % 50 == 0:
+            dev = Device(hostname=f"bt{i}", ip_address=f"bt:{mac}", mac_address=mac, network_id=bt.id)
+        else:
+            dev = Device(hostname=f"host{i}", ip_address=f"10.{i % 20}.{i // 256 % 256}.{i % 256}",
+                         mac_address=mac, network_id=nets[i % 20].id)
+        dev.device_solutions.append(DeviceSolution(solution_id=sol.id))
+        dev.device_vulnerabilities.append(DeviceVulnerability(title="CVE", severity="high"))
+        db.add(dev)
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_db_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    seed(db, args.devices)
+    db.connection().exec_driver_sql("ANALYZE")
+
+    captured: list = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _capture(_conn, _cursor, statement, parameters, _context, _many):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    sample = db.query(Device).filter(Device.address_kind == "ip").offset(7).first()
+    bt_sample = db.query(Device).filter(Device.address_kind == "bt").first()
+    poller = BluetoothPoller(FakeProvider(), interval=0)
+    poller._reconciled = True
+
+    checks = [
+        ("identity.load (MAC)", "ix_devices_mac_normalized",
+         lambda: DeviceIdentityIndex.load(db, macs=[sample.mac_address.lower()])),
+        ("identity.load (hostname)", "ix_devices_hostname_lower",
+         lambda: DeviceIdentityIndex.load(db, hostnames=[sample.hostname.upper()])),
+        ("identity.load (IP)", "ix_devices_ip_address",
+         lambda: DeviceIdentityIndex.load(db, ips=[sample.ip_address])),
+        ("BT poller — 변경 MAC 반영", "ix_devices_mac_normalized",
+         lambda: poller._apply(db, {}, {bt_sample.mac_normalized})),
+        ("BT poller — 전체 맞춤", "ix_devices_address_kind",
+         lambda: poller._apply(db, {}, None)),
+        ("장비 목록 network_id 필터", "ix_devices_network_id",
+         lambda: _device_listing(db, ["id", "hostname"], None, {
+             "network_id": sample.network_id, "status": None, "device_type": None,
+             "vendor": None, "severity": None,
+         })[0].all()),
+        ("장비별 취약점", "ix_device_vulnerabilities_device_id",
+         lambda: list_vulnerabilities(sample.id, db)),
+        ("장비별 솔루션", "ix_device_solutions_device_id",
+         lambda: list_device_solutions(sample.id, db)),
+    ]
+
+    failed = 0
+    for label, index_name, run in checks:
+        captured.clear()
+        run()
+        conn = db.connection()  # run() 이 커밋했을 수 있음
+        plans = [
+            " / ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {stmt}", params))
+            for stmt, params in captured
+        ]
+        ok = any(index_name in plan for plan in plans)
+        failed += not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {label:<28} {index_name}")
+        if args.verbose or not ok:
+            for plan in plans:
+                print(f"       {plan}")
+    db.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+TP-Link 라우터 흉내 서버 — app.tplink (직접 API) 와 브라우저 경로를 로컬에서 확인·측정하기 위한 것.
+
+  - /cgi-bin/luci/;stok=/login?form=keys|auth|login   RSA 키 교환 + AES 암호화 로그인 (app.tplink 문서 참고)
+  - /cgi-bin/luci/;stok=<stok>/admin/status?form=client_status   암호화된 클라이언트 목록
+  - /, /webpages/index.html   브라우저 경로용 최소 웹 UI (로그인 입력창, 유선/무선 클라이언트 탭,
+    CryptoJS.AES.decrypt 를 거쳐 응답을 복호화 — router_import 의 가로채기 스크립트가 잡는 지점)
+
+stok 은 session_ttl 초 동안 쓰이지 않으면 만료되어 errorcode "timeout" 을 돌려준다.
+
+    python benchmarks/mock_tplink.py [--port 8080] [--password admin] [--clients 20]
+"""
+import argparse
+import base64
+import hashlib
+import json
+import secrets
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives import padding as sym_padding
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+_LOGIN_PAGE = """<!doctype html><html><body>
+<div class="login">
+  <input class="password-hidden" type="password" style="width:200px">
+  <input id="login-password" type="hidden">
+  <button id="login-btn">Log In</button>
+</div>
+<script>
+document.getElementById('login-btn').onclick = function () {
+  var pw = document.querySelector('.password-hidden').value;
+  fetch('/cgi-bin/luci/;stok=/login?form=plain', {method: 'POST', body: 'password=' + encodeURIComponent(pw)})
+    .then(function (r) { return r.json(); })
+    .then(function (j) { if (j.success) location.href = '/webpages/index.html#stok=' + j.data.stok; });
+};
+</script></body></html>"""
+
+_INDEX_PAGE = """<!doctype html><html><body>
+<ul><li><span id="wired">Wired Clients</span></li><li><span id="wireless">Wireless Clients</span></li></ul>
+<table id="clients"></table>
+<script>
+// 실제 펌웨어처럼 응답을 CryptoJS.AES.decrypt 로 푼다 (여기서는 base64 만)
+window.CryptoJS = {enc: {Utf8: 'utf8'}, AES: {decrypt: function (c) {
+  var t = atob(c); return {toString: function () { return t; }};
+}}};
+var stok = location.hash.replace('#stok=', '');
+function api(path) {
+  return fetch('/cgi-bin/luci/;stok=' + stok + '/' + path, {method: 'POST', body: 'operation=read'})
+    .then(function (r) { return r.json(); })
+    .then(function (j) { return JSON.parse(CryptoJS.AES.decrypt(j.data).toString(CryptoJS.enc.Utf8)); });
+}
+api('admin/status?form=all&ui=1');
+function show(kind) {
+  api('admin/status?form=client_status&ui=1').then(function (res) {
+    var rows = res.data['access_devices_' + kind] || [];
+    document.getElementById('clients').innerHTML = rows.map(function (c) {
+      return '<tr><td>' + c.hostname + '</td><td>' + c.ipaddr + '</td><td>' + c.macaddr + '</td></tr>';
+    }).join('');
+  });
+}
+document.getElementById('wired').onclick = function () { show('wired'); };
+document.getElementById('wireless').onclick = function () { show('wireless'); };
+</script></body></html>"""
+
+
+def make_clients(count: int) -> dict:
+    rows = [{
+        "hostname": f"client-{i}",
+        "ipaddr": f"192.168.0.{100 + i}",
+        "macaddr": f"00-1A-2B-00-00-{i:02X}",
+    } for i in range(count)]
+    return {"access_devices_wired": rows[::2], "access_devices_wireless": rows[1::2]}
+
+
+class MockRouter:
+    def __init__(self, password: str = "admin", clients: int = 20, session_ttl: float = 600.0, latency: float = 0.0):
+        self.password = password
+        self.clients = make_clients(clients)
+        self.session_ttl = session_ttl
+        self.latency = latency            # 요청마다 추가 지연 (실제 라우터 CPU 흉내)
+        self.pwd_key = rsa.generate_private_key(public_exponent=65537, key_size=1024)
+        self.sign_key = rsa.generate_private_key(public_exponent=65537, key_size=1024)
+        self.seq = secrets.randbelow(10 ** 9)
+        self.sessions: dict = {}          # stok → {"aes": (key, iv) | None, "used": 시각}
+        self.lock = threading.Lock()
+        self.logins = 0
+
+    @staticmethod
+    def _public(key) -> list:
+        nums = key.public_key().public_numbers()
+        return [format(nums.n, "x"), format(nums.e, "x")]
+
+    @staticmethod
+    def _rsa_decrypt(key, hex_text: str) -> bytes:
+        size = key.key_size // 8 * 2
+        return b"".join(
+            key.decrypt(bytes.fromhex(hex_text[i:i + size]), padding.PKCS1v15())
+            for i in range(0, len(hex_text), size)
+        )
+
+    @staticmethod
+    def _aes(key: str, iv: str):
+        return Cipher(algorithms.AES(key.encode()), modes.CBC(iv.encode()))
+
+    def _encrypt(self, aes, obj: dict) -> dict:
+        padder = sym_padding.PKCS7(128).padder()
+        raw = padder.update(json.dumps(obj).encode()) + padder.finalize()
+        enc = self._aes(*aes).encryptor()
+        return {"data": base64.b64encode(enc.update(raw) + enc.finalize()).decode()}
+
+    def _decrypt(self, aes, text: str) -> str:
+        dec = self._aes(*aes).decryptor()
+        raw = dec.update(base64.b64decode(text)) + dec.finalize()
+        unpadder = sym_padding.PKCS7(128).unpadder()
+        return (unpadder.update(raw) + unpadder.finalize()).decode()
+
+    def _new_session(self, aes) -> str:
+        stok = secrets.token_hex(16)
+        with self.lock:
+            self.sessions[stok] = {"aes": aes, "used": time.monotonic()}
+            self.logins += 1
+        return stok
+
+    def _session(self, stok: str):
+        with self.lock:
+            session = self.sessions.get(stok)
+            if session is None or time.monotonic() - session["used"] > self.session_ttl:
+                self.sessions.pop(stok, None)
+                return None
+            session["used"] = time.monotonic()
+            return session
+
+    def handle(self, path: str, body: str) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+        parsed = urllib.parse.urlsplit(path)
+        form = urllib.parse.parse_qs(parsed.query).get("form", [""])[0]
+        ui = "ui=1" in parsed.query
+        params = urllib.parse.parse_qs(body)
+        stok, _, api = parsed.path.partition(";stok=")[2].partition("/")
+
+        if api == "login":
+            if form == "keys":
+                return {"success": True, "data": {"password": self._public(self.pwd_key)}}
+            if form == "auth":
+                return {"success": True, "data": {"key": self._public(self.sign_key), "seq": self.seq}}
+            if form == "plain":    # 웹 UI 로그인 (키 교환 생략)
+                if params.get("password", [""])[0] != self.password:
+                    return {"success": False, "errorcode": "login failed"}
+                return {"success": True, "data": {"stok": self._new_session(None)}}
+            if form == "login":
+                sign = dict(urllib.parse.parse_qsl(self._rsa_decrypt(self.sign_key, params["sign"][0]).decode()))
+                aes = (sign["k"], sign["i"])
+                data = params["data"][0]
+                if int(sign["s"]) != self.seq + len(data):
+                    return {"success": False, "errorcode": "invalid sign"}
+                fields = dict(urllib.parse.parse_qsl(self._decrypt(aes, data)))
+                password = self._rsa_decrypt(self.pwd_key, fields["password"]).decode()
+                if password != self.password or sign["h"] != hashlib.md5(("admin" + password).encode()).hexdigest():
+                    return self._encrypt(aes, {"success": False, "errorcode": "login failed"})
+                return self._encrypt(aes, {"success": True, "data": {"stok": self._new_session(aes)}})
+
+        session = self._session(stok)
+        if session is None:
+            return {"success": False, "errorcode": "timeout"}
+        if api == "admin/status" and form == "client_status":
+            result = {"success": True, "data": self.clients}
+        elif api == "admin/status" and form == "all":
+            result = {"success": True, "data": {"uptime": 1}}
+        else:
+            result = {"success": False, "errorcode": "not supported"}
+        if ui or session["aes"] is None:
+            return {"data": base64.b64encode(json.dumps(result).encode()).decode()}
+        return self._encrypt(session["aes"], result)
+
+
+def serve(router: MockRouter, port: int = 0) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 서버 시작. server.server_address[1] 이 실제 포트."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            page = _INDEX_PAGE if self.path.startswith("/webpages/") else _LOGIN_PAGE
+            self._send(200, page.encode(), "text/html; charset=utf-8")
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+            try:
+                result = router.handle(self.path, body)
+            except Exception as e:
+                result = {"success": False, "errorcode": f"bad request: {e}"}
+            self._send(200, json.dumps(result).encode(), "application/json")
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--clients", type=int, default=20)
+    args = parser.parse_args()
+    server = serve(MockRouter(args.password, args.clients), args.port)
+    print(f"mock TP-Link router: http://127.0.0.1:{server.server_address[1]} (비밀번호 {args.password})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
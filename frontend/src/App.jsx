@@ -1,11 +1,40 @@
-import { useState, useEffect, useCallback } from 'react'
+import { useState, useEffect, useCallback, useRef } from 'react'
 import { api } from './api/client.js'
 import NetworkGraph from './components/NetworkGraph.jsx'
 import DevicePanel from './components/DevicePanel.jsx'
 import Toolbar from './components/Toolbar.jsx'
 
+// /api/topology/changes 델타를 topology 에 적용. 바뀐 게 없으면 같은 객체를 반환 (재렌더 생략)
+function applyTopologyChanges(topo, changes) {
+  if (changes.meta.revision === topo.meta?.revision) return topo
+  const removedNodes = new Set(changes.removed_nodes)
+  const removedEdges = new Set(changes.removed_edges)
+  const upsert = (items, updates, removed) => {
+    const byId = new Map(updates.map(x => [x.id, x]))
+    const out = []
+    for (const item of items) {
+      if (removed.has(item.id)) continue
+      out.push(byId.get(item.id) ?? item)
+      byId.delete(item.id)
+    }
+    return out.concat([...byId.values()])
+  }
+  return {
+    nodes: upsert(topo.nodes, changes.nodes, removedNodes),
+    edges: upsert(topo.edges, changes.edges, removedEdges),
+    meta: changes.meta,
+  }
+}
+
+// 같은 epoch 에서 리비전이 더 높은(같으면 a) 쪽. epoch 가 다르면 b (서버 DB 가 바뀜 — 새로 받은 쪽)
+function newerTopology(a, b) {
+  if (!a || a.meta?.epoch !== b.meta?.epoch) return b
+  return (b.meta?.revision ?? -1) > (a.meta?.revision ?? -1) ? b : a
+}
+
 export default function App() {
   const [topology, setTopology] = useState(null)
+  const topologyRef = useRef(null)
   const [networks, setNetworks] = useState([])
   const [selectedNode, setSelectedNode] = useState(null)
   const [error, setError] = useState('')
@@ -27,9 +56,18 @@ export default function App() {
 
   const loadData = useCallback(async () => {
     try {
-      // BT 장비 status 를 현재 연결 상태로 갱신한 뒤 topology 조회
-      await api.refreshBtStatus().catch(() => {})
-      const [topo, nets] = await Promise.all([api.getTopology(), api.listNetworks()])
+      // BT 장비 status 는 백엔드 poller 가 갱신한다 (변경은 topology stream 으로 도착)
+      // 이미 받은 topology 가 있으면 델타만 받는다
+      const cur = topologyRef.current
+      const fetchTopology = async () => {
+        if (cur?.meta?.revision == null) return api.getTopology()
+        const changes = await api.getTopologyChanges(cur.meta.revision, cur.meta.epoch)
+        return changes.reset ? api.getTopology() : applyTopologyChanges(cur, changes)
+      }
+      const [fetched, nets] = await Promise.all([fetchTopology(), api.listNetworks()])
+      // 요청 중에 stream 이 더 새 리비전을 적용했으면 그쪽을 유지 (오래된 응답으로 덮어쓰지 않음)
+      const topo = newerTopology(topologyRef.current, fetched)
+      topologyRef.current = topo
       setTopology(topo)
       setNetworks(nets)
       // topology.meta.this_pc_device_id 가 있으면 우선 사용
@@ -44,6 +82,26 @@ export default function App() {
 
   useEffect(() => { loadData() }, [loadData])
 
+  // 다른 곳(스캔 작업·다른 창)의 변경도 push 로 받아 적용
+  const streamEpoch = topology?.meta?.epoch
+  useEffect(() => {
+    const cur = topologyRef.current
+    if (cur?.meta?.revision == null) return
+    return api.subscribeTopology(cur.meta.revision, cur.meta.epoch, changes => {
+      if (changes.reset) {
+        topologyRef.current = null   // DB 교체·변경 로그 만료 등 — 전체를 다시 받는다
+        loadData()
+        return
+      }
+      const cur = topologyRef.current
+      // loadData 가 이미 이 리비전 이후의 topology 를 받았으면 무시
+      if (!cur || newerTopology(cur, changes) === cur) return
+      const next = applyTopologyChanges(cur, changes)
+      topologyRef.current = next
+      setTopology(next)
+    })
+  }, [streamEpoch, loadData])
+
   // 게이트웨이 역할 맵 구성 — {ip: "어댑터명 기본 게이트웨이"}
   useEffect(() => {
     api.getInterfaces()
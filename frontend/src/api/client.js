@@ -21,6 +21,14 @@ export const api = {
 
   // Topology
   getTopology: () => req('GET', '/api/topology/'),
+  // since(meta.revision) 이후 바뀐 노드/엣지만. reset 이면 getTopology 로 다시 받을 것
+  getTopologyChanges: (since, epoch) => req('GET', `/api/topology/changes?since=${since}&epoch=${encodeURIComponent(epoch ?? '')}`),
+  // 커밋마다 changes 이벤트 push. 반환값은 구독 해제 함수
+  subscribeTopology: (since, epoch, onChanges) => {
+    const es = new EventSource(`${BASE}/api/topology/stream?since=${since}&epoch=${encodeURIComponent(epoch ?? '')}`)
+    es.addEventListener('changes', e => onChanges(JSON.parse(e.data)))
+    return () => es.close()
+  },
 
   // Networks
   listNetworks: () => req('GET', '/api/networks/'),
@@ -28,9 +36,12 @@ export const api = {
   deleteNetwork: (id) => req('DELETE', `/api/networks/${id}`),
 
   // Devices
-  listDevices: () => req('GET', '/api/devices/'),
+  // params: { after, limit, network_id, status, device_type, vendor, severity, fields }
+  listDevices: (params = {}) => req('GET', `/api/devices/?${new URLSearchParams(params)}`),
   getDevice: (id) => req('GET', `/api/devices/${id}`),
   createDevice: (data) => req('POST', '/api/devices/', data),
+  // 일괄 등록/갱신 — 항목마다 network_id 또는 subnet. 응답: { created, updated, skipped, rows }
+  bulkUpsertDevices: (devices, updateExisting = true) => req('POST', '/api/devices/bulk', { devices, update_existing: updateExisting }),
   patchDevice:  (id, data) => req('PATCH', `/api/devices/${id}`, data),
   deleteDevice: (id) => req('DELETE', `/api/devices/${id}`),
 
@@ -41,6 +52,19 @@ export const api = {
   // Network scan
   getInterfaces: () => req('GET', '/api/scan/interfaces'),
   scanNetwork: (cidr) => req('POST', '/api/scan/', { cidr }),
+  scanNetworkDelta: (cidr) => req('POST', '/api/scan/delta', { cidr }),
+  // 스트리밍 스캔 (SSE) — 호스트 확인 즉시 onResult, 주기적으로 onProgress 호출. 완료 시 resolve
+  // tcpProbe: TCP 포트 probe 병행 (열린 포트·OS/유형 힌트, ping 차단 호스트 탐지)
+  // signal: AbortSignal — abort 되면 스트림을 닫고 AbortError 로 reject
+  streamScan: (cidr, { onResult, onProgress, tcpProbe = false, signal } = {}) => new Promise((resolve, reject) => {
+    if (signal?.aborted) { reject(new DOMException('스캔 취소됨', 'AbortError')); return }
+    const es = new EventSource(`${BASE}/api/scan/stream?cidr=${encodeURIComponent(cidr)}&tcp_probe=${tcpProbe}`)
+    signal?.addEventListener('abort', () => { es.close(); reject(new DOMException('스캔 취소됨', 'AbortError')) }, { once: true })
+    es.addEventListener('result', e => onResult?.(JSON.parse(e.data)))
+    es.addEventListener('progress', e => onProgress?.(JSON.parse(e.data)))
+    es.addEventListener('done', e => { es.close(); resolve(JSON.parse(e.data)) })
+    es.onerror = () => { es.close(); reject(new Error('스캔 스트림 연결 실패')) }
+  }),
 
   // Device ↔ solution assignments
   listDeviceSolutions: (deviceId) => req('GET', `/api/devices/${deviceId}/solutions`),
@@ -49,9 +73,14 @@ export const api = {
 
   // Router import
   fetchRouterClients: (password, url) => req('POST', '/api/router/clients', { password, url }),
+  // routers: [{ kind, url, password, name, network_id | subnet, options }] → 작업 (getJob 으로 진행 조회)
+  pollRouters: (routers, concurrency) => req('POST', '/api/router/poll', { routers, concurrency }),
+  listRouterKinds: () => req('GET', '/api/router/kinds'),
 
   // Bluetooth scan
-  scanBluetooth: () => req('GET', '/api/scan/bluetooth/'),
+  // cached=true: 백그라운드 poller 의 마지막 결과 (즉시 응답)
+  scanBluetooth: (cached = false) => req('GET', `/api/scan/bluetooth/?cached=${cached}`),
+  getBtStatus: () => req('GET', '/api/scan/bluetooth/status'),
   importBluetooth: (devices) => req('POST', '/api/scan/bluetooth/import', { devices }),
   refreshBtStatus: () => req('POST', '/api/scan/bluetooth/refresh-status'),
 
@@ -61,4 +90,7 @@ export const api = {
   autoscanVulns:    (deviceId) => req('POST',   `/api/devices/${deviceId}/vulnerabilities/autoscan`),
   updateVulnStatus: (deviceId, vid, data) => req('PATCH',  `/api/devices/${deviceId}/vulnerabilities/${vid}`, data),
   deleteVuln:       (deviceId, vid) => req('DELETE', `/api/devices/${deviceId}/vulnerabilities/${vid}`),
+  // 전체 장비 자동 스캔 (백그라운드 작업) — filters: { network_id, os, device_type }
+  autoscanFleet:    (filters = {}) => req('POST',   '/api/vulnerabilities/autoscan', filters),
+  getJob:           (jobId) => req('GET',    `/api/scan/jobs/${jobId}`),
 }
@@ -29,14 +29,15 @@ export default function BluetoothDialog({ onImport, onClose }) {
   const [error, setError] = useState('')
   const [importing, setImporting] = useState(false)
 
-  useEffect(() => { runScan() }, [])
+  // 처음에는 poller 캐시로 바로 표시, 다시 스캔은 실제 조회
+  useEffect(() => { runScan(true) }, [])
 
-  async function runScan() {
+  async function runScan(cached = false) {
     setPhase('scanning')
     setResults([])
     setError('')
     try {
-      const data = await api.scanBluetooth()
+      const data = await api.scanBluetooth(cached)
       setResults(data)
       setSelected(new Set(
         data.filter(d => !d.already_registered && d.mac_address).map(d => d.mac_address)
@@ -118,7 +119,7 @@ export default function BluetoothDialog({ onImport, onClose }) {
           <div style={{ textAlign: 'center', padding: '20px 0', color: '#fc8181' }}>
             <div style={{ fontSize: 28, marginBottom: 8 }}>⚠️</div>
             <div>{error}</div>
-            <button style={{ ...S.btn, background: '#2d3148', color: '#94a3b8', marginTop: 12 }} onClick={runScan}>
+            <button style={{ ...S.btn, background: '#2d3148', color: '#94a3b8', marginTop: 12 }} onClick={() => runScan()}>
               다시 시도
             </button>
           </div>
@@ -189,7 +190,7 @@ export default function BluetoothDialog({ onImport, onClose }) {
             {/* 가져오기 */}
             {newCount > 0 && (
               <div style={{ borderTop: '1px solid #2d3148', paddingTop: 14, display: 'flex', gap: 10, alignItems: 'center', justifyContent: 'flex-end' }}>
-                <button onClick={runScan} style={{ ...S.btn, background: '#2d3148', color: '#94a3b8' }}>
+                <button onClick={() => runScan()} style={{ ...S.btn, background: '#2d3148', color: '#94a3b8' }}>
                   ↺ 다시 스캔
                 </button>
                 <button
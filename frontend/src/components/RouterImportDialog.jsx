@@ -77,16 +77,14 @@ export default function RouterImportDialog({ networks, topology, onImport, onClo
         const net = await api.createNetwork({ name, subnet: '192.168.0.0/24' })
         targetNetworkId = net.id
       }
-      for (const c of toImport) {
-        await api.createDevice({
-          hostname: c.hostname || c.ip_address,
-          ip_address: c.ip_address,
-          mac_address: c.mac_address ?? undefined,
-          device_type: deviceType,
-          network_id: parseInt(targetNetworkId),
-          status: 'active',
-        })
-      }
+      await api.bulkUpsertDevices(toImport.map(c => ({
+        hostname: c.hostname || c.ip_address,
+        ip_address: c.ip_address,
+        mac_address: c.mac_address ?? undefined,
+        device_type: deviceType,
+        network_id: parseInt(targetNetworkId),
+        status: 'active',
+      })))
       onImport()
       onClose()
     } catch (e) {
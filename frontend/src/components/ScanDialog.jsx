@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { api } from '../api/client.js'
 
 const S = {
@@ -27,20 +27,39 @@ const S = {
 
 // phase: 'detecting' | 'scanning' | 'done' | 'error'
 
+// 자동 스캔은 /22(1022 호스트) 이하 인터페이스만 — docker0 같은 /16 대역은 건너뛴다
+// (큰 대역은 백그라운드 sweep 작업으로)
+const AUTO_SCAN_MIN_PREFIX = 22
+
+function prefixLength(cidr) {
+  return Number(cidr.split('/')[1] ?? 32)
+}
+
 export default function ScanDialog({ networks, onImport, onClose }) {
   const [phase, setPhase] = useState('detecting')
-  const [progress, setProgress] = useState({ current: 0, total: 0, cidr: '', adapter: '' })
+  const [progress, setProgress] = useState({ current: 0, total: 0, cidr: '', adapter: '', probed: 0, hosts: 0, live: 0 })
   const [scannedCidrs, setScannedCidrs] = useState([])
   const [results, setResults] = useState([])
   const [selected, setSelected] = useState(new Set())
-  const [deviceType, setDeviceType] = useState('workstation')
+  const [deviceType, setDeviceType] = useState('')   // '' = 지문 추정값 사용 (없으면 workstation)
+  const [tcpProbe, setTcpProbe] = useState(false)     // TCP 포트 probe 는 사용자가 켤 때만
   const [error, setError] = useState('')
   const [importing, setImporting] = useState(false)
+  const [skippedCidrs, setSkippedCidrs] = useState([])
+  const scanAbort = useRef(null)
 
-  // 다이얼로그가 열리면 즉시 자동 스캔 시작
-  useEffect(() => { runAutoScan() }, [])
+  // 다이얼로그가 열리면 즉시 자동 스캔 시작, 닫히면 진행 중인 스트림을 닫는다
+  useEffect(() => {
+    runAutoScan()
+    return () => scanAbort.current?.abort()
+  }, [])
 
   async function runAutoScan() {
+    scanAbort.current?.abort()
+    const controller = new AbortController()
+    scanAbort.current = controller
+    const { signal } = controller
+
     setPhase('detecting')
     setResults([])
     setError('')
@@ -49,10 +68,12 @@ export default function ScanDialog({ networks, onImport, onClose }) {
     try {
       ifaces = await api.getInterfaces()
     } catch (e) {
+      if (signal.aborted) return
       setError(`인터페이스 감지 실패: ${e.message}`)
       setPhase('error')
       return
     }
+    if (signal.aborted) return
 
     if (ifaces.length === 0) {
       setError('감지된 네트워크 인터페이스가 없습니다.')
@@ -60,6 +81,15 @@ export default function ScanDialog({ networks, onImport, onClose }) {
       return
     }
 
+    const skipped = ifaces.filter(i => prefixLength(i.cidr) < AUTO_SCAN_MIN_PREFIX).map(i => i.cidr)
+    setSkippedCidrs(skipped)
+    ifaces = ifaces.filter(i => prefixLength(i.cidr) >= AUTO_SCAN_MIN_PREFIX)
+    if (ifaces.length === 0) {
+      setError(`자동 스캔 가능한 인터페이스가 없습니다 (/${AUTO_SCAN_MIN_PREFIX} 보다 큰 대역 제외: ${skipped.join(', ')})`)
+      setPhase('error')
+      return
+    }
+
     setScannedCidrs(ifaces.map(i => i.cidr))
     setPhase('scanning')
 
@@ -68,20 +98,27 @@ export default function ScanDialog({ networks, onImport, onClose }) {
 
     for (let i = 0; i < ifaces.length; i++) {
       const { cidr, adapter } = ifaces[i]
-      setProgress({ current: i + 1, total: ifaces.length, cidr, adapter: adapter || '' })
+      setProgress({ current: i + 1, total: ifaces.length, cidr, adapter: adapter || '', probed: 0, hosts: 0, live: 0 })
 
       try {
-        const sub = await api.scanNetwork(cidr)
-        for (const r of sub) {
-          const key = r.hostname.toLowerCase()
-          // 이번 스캔 내 hostname 중복 제거 (다중 어댑터 동일 PC 방지)
-          if (key !== r.ip_address.toLowerCase() && seenHostnames.has(key)) continue
-          seenHostnames.add(key)
-          allResults.push({ ...r, _cidr: cidr })  // 소속 CIDR 태깅
-        }
+        // 호스트가 확인되는 즉시 목록에 추가 (SSE 스트림)
+        await api.streamScan(cidr, {
+          tcpProbe,
+          signal,
+          onResult: (r) => {
+            const key = r.hostname.toLowerCase()
+            // 이번 스캔 내 hostname 중복 제거 (다중 어댑터 동일 PC 방지)
+            if (key !== r.ip_address.toLowerCase() && seenHostnames.has(key)) return
+            seenHostnames.add(key)
+            allResults.push({ ...r, _cidr: cidr })  // 소속 CIDR 태깅
+            setResults([...allResults])
+          },
+          onProgress: (c) => setProgress(p => ({ ...p, probed: c.probed, hosts: c.total, live: c.live })),
+        })
       } catch (_) {
         // 해당 서브넷 스캔 실패는 무시하고 계속 진행
       }
+      if (signal.aborted) return
     }
 
     setResults(allResults)
@@ -98,35 +135,17 @@ export default function ScanDialog({ networks, onImport, onClose }) {
     setImporting(true)
     setError('')
     try {
-      // CIDR별로 그룹핑
-      const byCidr = {}
-      for (const host of toImport) {
-        const cidr = host._cidr || scannedCidrs[0] || '0.0.0.0/0'
-        if (!byCidr[cidr]) byCidr[cidr] = []
-        byCidr[cidr].push(host)
-      }
-
-      // 기존 네트워크 목록 최신화
-      const currentNetworks = await api.listNetworks()
-
-      for (const [cidr, hosts] of Object.entries(byCidr)) {
-        // 같은 서브넷의 기존 네트워크 찾기
-        let net = currentNetworks.find(n => n.subnet === cidr)
-        if (!net) {
-          net = await api.createNetwork({ name: cidr, subnet: cidr })
-          currentNetworks.push(net)
-        }
-        for (const host of hosts) {
-          await api.createDevice({
-            hostname: host.hostname,
-            ip_address: host.ip_address,
-            mac_address: host.mac_address ?? undefined,
-            device_type: deviceType,
-            network_id: net.id,
-            status: 'active',
-          })
-        }
-      }
+      // 한 번의 요청으로 일괄 등록 — 소속 CIDR 의 네트워크가 없으면 서버가 만든다
+      await api.bulkUpsertDevices(toImport.map(host => ({
+        hostname: host.hostname,
+        ip_address: host.ip_address,
+        mac_address: host.mac_address ?? undefined,
+        os: host.os ?? undefined,
+        device_type: deviceType || host.device_type || 'workstation',
+        open_ports: host.open_ports?.length ? host.open_ports.join(',') : undefined,
+        subnet: host._cidr || scannedCidrs[0] || '0.0.0.0/0',
+        status: 'active',
+      })))
       onImport()
       onClose()
     } catch (e) {
@@ -179,6 +198,11 @@ export default function ScanDialog({ networks, onImport, onClose }) {
               <div style={{ fontSize: 12, color: '#4a5568', marginTop: 4 }}>
                 {progress.current} / {progress.total} 서브넷
               </div>
+              {progress.hosts > 0 && (
+                <div style={{ fontSize: 12, color: '#4a5568', marginTop: 2 }}>
+                  {progress.probed} / {progress.hosts} 호스트 · 응답 {progress.live}개 · 발견 {results.length}개
+                </div>
+              )}
             </div>
             {/* 진행 바 */}
             <div style={{ background: '#0f1117', borderRadius: 4, height: 6, overflow: 'hidden' }}>
@@ -191,6 +215,11 @@ export default function ScanDialog({ networks, onImport, onClose }) {
             <div style={{ fontSize: 11, color: '#4a5568', textAlign: 'center' }}>
               감지된 서브넷: {scannedCidrs.join(', ')}
             </div>
+            {skippedCidrs.length > 0 && (
+              <div style={{ fontSize: 11, color: '#4a5568', textAlign: 'center' }}>
+                건너뜀 (/{AUTO_SCAN_MIN_PREFIX} 보다 큰 대역): {skippedCidrs.join(', ')}
+              </div>
+            )}
           </div>
         )}
 
@@ -214,6 +243,13 @@ export default function ScanDialog({ networks, onImport, onClose }) {
               <button onClick={runAutoScan} style={{ marginLeft: 10, background: 'none', border: 'none', color: '#4f5fef', fontSize: 12, cursor: 'pointer' }}>
                 ↺ 다시 스캔
               </button>
+              {skippedCidrs.length > 0 && (
+                <span style={{ marginLeft: 6 }}>· 건너뜀 (/{AUTO_SCAN_MIN_PREFIX} 보다 큰 대역): {skippedCidrs.join(', ')}</span>
+              )}
+              <label title="열린 포트·OS/유형 추정, ping 차단 호스트 탐지 (다시 스캔 시 적용)" style={{ marginLeft: 6, cursor: 'pointer' }}>
+                <input type="checkbox" checked={tcpProbe} onChange={e => setTcpProbe(e.target.checked)} style={{ verticalAlign: 'middle', marginRight: 4 }} />
+                TCP 포트 확인
+              </label>
             </div>
 
             {/* 요약 */}
@@ -259,6 +295,8 @@ export default function ScanDialog({ networks, onImport, onClose }) {
                       <div style={{ fontSize: 11, color: '#64748b', marginTop: 2, display: 'flex', gap: 6 }}>
                         {r.vendor && <span style={{ color: '#7dd3fc' }}>{r.vendor}</span>}
                         {r.role && <span>🔀 {r.role}</span>}
+                        {r.os && <span>{r.os}</span>}
+                        {r.open_ports?.length > 0 && <span title="열린 TCP 포트">🔌 {r.open_ports.join(', ')}</span>}
                       </div>
                     </div>
                     {r.mac_address && (
@@ -289,6 +327,7 @@ export default function ScanDialog({ networks, onImport, onClose }) {
                 <div style={{ minWidth: 120 }}>
                   <div style={S.label}>장비 유형</div>
                   <select style={{ ...S.input, fontFamily: 'inherit' }} value={deviceType} onChange={e => setDeviceType(e.target.value)}>
+                    <option value="">자동 (추정)</option>
                     {['workstation', 'server', 'router', 'switch', 'firewall', 'other'].map(t => (
                       <option key={t} value={t}>{t}</option>
                     ))}